@@ -0,0 +1,241 @@
+"""
+Content-addressed incremental backups of a Storage data directory
+
+A backup splits the data into chunks: one per streak in the hot data file,
+one for the restore tokens, and one per archived year segment. Chunks are
+stored once under their SHA-256, and a version is a small manifest listing
+the chunks it needs, so each backup only writes the chunks that changed.
+Year segments are re-hashed only when their size or mtime changed, and
+after a save only the streaks that changed are encoded again.
+
+Old versions are thinned out by a retention policy (the last few, then the
+newest per hour, per day and per month) and chunks no version refers to are
+deleted.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from serializer import encode_streak
+
+
+# Retention policies: name -> strftime format of the bucket each keeps one version of
+RETENTION = {
+    "hourly": "%Y%m%d%H",
+    "daily": "%Y%m%d",
+    "monthly": "%Y%m",
+}
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class BackupStore:
+    """Versioned, deduplicated backups of one Storage data file and its archive"""
+    
+    def __init__(self, storage, backup_dir: Optional[str] = None, keep_last: int = 10,
+                 keep_hourly: int = 24, keep_daily: int = 30, keep_monthly: int = 12):
+        self.storage = storage
+        self.backup_dir = Path(backup_dir) if backup_dir else \
+            storage.data_dir / f"{storage.data_file.stem}.backups"
+        self.keep_last = keep_last
+        self.keep = {"hourly": keep_hourly, "daily": keep_daily, "monthly": keep_monthly}
+        self._file_hashes: Optional[Dict[str, List]] = None  # Segment name -> [size, mtime_ns, sha]
+        self._streak_hashes: Dict[str, Tuple[Tuple, str]] = {}  # Streak id -> (change marker, sha)
+    
+    @property
+    def objects_dir(self) -> Path:
+        return self.backup_dir / "objects"
+    
+    @property
+    def versions_dir(self) -> Path:
+        return self.backup_dir / "versions"
+    
+    def _put(self, data: bytes) -> str:
+        """Store a chunk unless it is already there; returns its hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.objects_dir / digest[:2] / digest
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, data)
+        return digest
+    
+    def _has(self, digest: str) -> bool:
+        return (self.objects_dir / digest[:2] / digest).exists()
+    
+    def _get(self, digest: str) -> bytes:
+        with open(self.objects_dir / digest[:2] / digest, 'rb') as f:
+            return f.read()
+    
+    def _segment_files(self) -> List[Path]:
+        """Archive segment files of the data file"""
+        stem = self.storage.data_file.stem
+        paths = []
+        for year in self.storage.archived_years():
+            paths.extend(p for p in self.storage.data_dir.glob(f"{stem}.{year}.json*")
+                         if not p.name.endswith(".tmp"))
+        return sorted(paths)
+    
+    def _hash_file(self, path: Path) -> str:
+        """Chunk hash of a segment file, reusing the last hash if it is unchanged"""
+        if self._file_hashes is None:
+            index_path = self.backup_dir / "file_hashes.json"
+            self._file_hashes = {}
+            if index_path.exists():
+                with open(index_path, 'r') as f:
+                    self._file_hashes = json.load(f)
+        stat = path.stat()
+        cached = self._file_hashes.get(path.name)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns \
+                and self._has(cached[2]):
+            return cached[2]
+        with open(path, 'rb') as f:
+            digest = self._put(f.read())
+        self._file_hashes[path.name] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+    
+    def _hash_streak(self, streak, min_log_date: str) -> str:
+        """Chunk hash of a streak as saved, reusing the last hash if it is unchanged"""
+        rest = streak.rest_days.fingerprint() if streak.rest_days is not None else None
+        marker = (min_log_date, streak.name, streak.current_streak, streak.longest_streak,
+                  streak.last_activity_date, len(streak.activity_logs), streak.created_date,
+                  streak.rule, streak.rule_state, rest)
+        cached = self._streak_hashes.get(streak.id)
+        if cached is not None and cached[0] == marker and self._has(cached[1]):
+            return cached[1]
+        digest = self._put(encode_streak(streak, min_log_date).encode("utf-8"))
+        self._streak_hashes[streak.id] = (marker, digest)
+        return digest
+    
+    def versions(self) -> List[str]:
+        """Version ids, oldest first"""
+        if not self.versions_dir.exists():
+            return []
+        return sorted(p.stem for p in self.versions_dir.glob("*.json"))
+    
+    def manifest(self, version: str) -> Dict:
+        with open(self.versions_dir / f"{version}.json", 'r') as f:
+            return json.load(f)
+    
+    def backup(self, app_data=None, min_log_date: str = "") -> Optional[str]:
+        """
+        Back up the data as saved on disk. Storage.save passes the app_data it
+        just wrote (and the oldest log date it kept), so the file isn't read back.
+        Returns the new version id, or None if nothing changed since the last one.
+        """
+        chunk = lambda value: self._put(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        if app_data is not None:
+            manifest = {
+                "streaks": [self._hash_streak(streak, min_log_date) for streak in app_data.streaks],
+                "restore_tokens": chunk({month: token.to_dict() for month, token in app_data.restore_tokens.items()
+                                         if not token.is_unused()}),
+            }
+        elif not self.storage.data_file.exists():
+            return None
+        else:
+            with open(self.storage.data_file, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and isinstance(data.get("streaks"), list):
+                manifest = {
+                    "streaks": [chunk(streak) for streak in data["streaks"]],
+                    "restore_tokens": chunk(data.get("restore_tokens", {})),
+                }
+            else:
+                manifest = {"raw": chunk(data)}  # Legacy file, kept whole
+        manifest["segments"] = {path.name: self._hash_file(path) for path in self._segment_files()}
+        
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        existing = self.versions()
+        if existing:
+            latest = self.manifest(existing[-1])
+            latest.pop("created", None)
+            if latest == manifest:
+                return None
+        now = datetime.now()
+        version = now.strftime("%Y%m%dT%H%M%S%f")
+        manifest["created"] = now.isoformat()
+        _atomic_write(self.versions_dir / f"{version}.json", json.dumps(manifest).encode("utf-8"))
+        _atomic_write(self.backup_dir / "file_hashes.json", json.dumps(self._file_hashes).encode("utf-8"))
+        self.prune()
+        return version
+    
+    def restore(self, version: Optional[str] = None) -> str:
+        """
+        Restore a version (default the newest); returns the restored version id.
+        The current data is backed up first, so a restore can be undone.
+        """
+        versions = self.versions()
+        if not versions:
+            raise ValueError("No backups to restore")
+        version = version or versions[-1]
+        if version not in versions:
+            raise ValueError(f"No backup version {version!r}")
+        manifest = self.manifest(version)
+        
+        # Read everything before backing up, which may prune this version
+        segments = {name: self._get(digest) for name, digest in manifest["segments"].items()}
+        if "raw" in manifest:
+            data = json.loads(self._get(manifest["raw"]))
+        else:
+            data = {
+                "streaks": [json.loads(self._get(digest)) for digest in manifest["streaks"]],
+                "restore_tokens": json.loads(self._get(manifest["restore_tokens"])),
+            }
+        try:
+            self.backup()
+        except ValueError:
+            pass  # The current file is not valid JSON; nothing worth keeping
+        
+        for name, content in segments.items():
+            _atomic_write(self.storage.data_dir / name, content)
+        for path in self._segment_files():
+            if path.name not in segments:
+                path.unlink()  # Segment written after this version
+        indent = None if self.storage.compact else 2
+        _atomic_write(self.storage.data_file, json.dumps(data, indent=indent).encode("utf-8"))
+        self.storage._segments.clear()
+        return version
+    
+    def kept_versions(self, versions: List[str]) -> List[str]:
+        """Versions the retention policy keeps: the last few and the newest per hour, day and month"""
+        keep = set(versions[-max(self.keep_last, 1):])
+        for policy, fmt in RETENTION.items():
+            buckets = set()
+            for version in reversed(versions):
+                bucket = datetime.strptime(version, "%Y%m%dT%H%M%S%f").strftime(fmt)
+                if bucket in buckets:
+                    continue
+                if len(buckets) >= self.keep[policy]:
+                    break
+                buckets.add(bucket)
+                keep.add(version)
+        return sorted(keep)
+    
+    def prune(self) -> List[str]:
+        """Delete versions outside the retention policy and unreferenced chunks"""
+        versions = self.versions()
+        kept = self.kept_versions(versions)
+        removed = [v for v in versions if v not in set(kept)]
+        if not removed:
+            return []
+        for version in removed:
+            (self.versions_dir / f"{version}.json").unlink()
+        
+        live = set()
+        for version in kept:
+            manifest = self.manifest(version)
+            live.update(manifest.get("streaks", []))
+            live.update(manifest[key] for key in ("restore_tokens", "raw") if key in manifest)
+            live.update(manifest["segments"].values())
+        for path in self.objects_dir.glob("*/*"):
+            if path.name not in live:
+                path.unlink()
+        return removed
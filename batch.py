@@ -0,0 +1,144 @@
+"""
+Batch actions over several streaks
+
+mark_all, restore_all and delete_all apply one action to many streaks in a
+single in-memory transaction: either every change is kept, or (if one of
+them raises) every touched streak and restore token is put back. Callers
+save once and update their views once per batch, instead of once per streak.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from models import AppData, Streak
+from streak_logic import StreakManager, MAX_RESTORE_DAYS
+from events import bus, StreakCreated, StreakUpdated
+
+
+class BatchResult:
+    """Outcome of a batch action: streaks changed and streaks skipped (with why)"""
+    __slots__ = ("action", "done", "skipped")
+    
+    def __init__(self, action: str):
+        self.action = action
+        self.done: List[Streak] = []
+        self.skipped: List[Tuple[Streak, str]] = []
+    
+    def summary(self) -> str:
+        """Short text for one summary message"""
+        lines = [f"{self.action}: {len(self.done)} streak(s)"]
+        lines += [f"  {streak.name}" for streak in self.done[:10]]
+        if len(self.done) > 10:
+            lines.append(f"  ... and {len(self.done) - 10} more")
+        if self.skipped:
+            lines.append(f"Skipped: {len(self.skipped)}")
+            lines += [f"  {streak.name}: {reason}" for streak, reason in self.skipped[:10]]
+        return "\n".join(lines)
+
+
+class Transaction:
+    """
+    Snapshot of the streaks and restore tokens a batch may change.
+    Used as a context manager: an exception rolls every snapshot back.
+    """
+    
+    def __init__(self, app_data: AppData):
+        self.app_data = app_data
+        self._streaks: Dict[str, Tuple[Streak, Dict]] = {}
+        self._removed: List[Tuple[int, Streak]] = []
+        self._tokens = {month: (token.tokens_used, list(token.redemptions))
+                        for month, token in app_data.restore_tokens.items()}
+    
+    def touch(self, streak: Streak) -> None:
+        """Remember a streak's state before changing it"""
+        if streak.id not in self._streaks:
+            state = {slot: getattr(streak, slot) for slot in Streak.__slots__}
+            state["activity_logs"] = list(streak.activity_logs)
+            self._streaks[streak.id] = (streak, state)
+    
+    def remove(self, streak: Streak, position: int) -> None:
+        """Remove a streak from the registry, remembering its display position"""
+        self.app_data.remove_streak(streak.id)
+        self._removed.append((position, streak))
+    
+    def rollback(self) -> None:
+        for streak, state in self._streaks.values():
+            for slot, value in state.items():
+                setattr(streak, slot, value)
+            bus.publish(StreakUpdated(streak))
+        for month in [m for m in self.app_data.restore_tokens if m not in self._tokens]:
+            del self.app_data.restore_tokens[month]
+        for month, (used, redemptions) in self._tokens.items():
+            token = self.app_data.restore_tokens[month]
+            token.tokens_used, token.redemptions = used, redemptions
+        if self._removed:
+            streaks = list(self.app_data.streaks)
+            for position, streak in sorted(self._removed, key=lambda item: item[0]):
+                streaks.insert(position, streak)
+            for streak in list(self.app_data.streaks):
+                self.app_data.streaks.remove(streak.id)
+            for streak in streaks:
+                self.app_data.streaks.add(streak)
+            for _, streak in self._removed:
+                bus.publish(StreakCreated(streak))
+    
+    def __enter__(self) -> 'Transaction':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.rollback()
+        return False
+
+
+def _resolve(app_data: AppData, streak_ids: Iterable[str]) -> List[Streak]:
+    """Streaks for the given IDs in display order; unknown IDs are ignored"""
+    wanted = set(streak_ids)
+    return [streak for streak in app_data.streaks if streak.id in wanted]
+
+
+def mark_all(app_data: AppData, streak_ids: Iterable[str], day: Optional[str] = None,
+             notes: str = "") -> BatchResult:
+    """Mark activity (default today) for every given streak"""
+    day = day or StreakManager.get_today()
+    result = BatchResult("Marked")
+    with Transaction(app_data) as transaction:
+        for streak in _resolve(app_data, streak_ids):
+            transaction.touch(streak)
+            if StreakManager.mark_activity(streak, day, notes):
+                result.done.append(streak)
+            else:
+                result.skipped.append((streak, "already logged"))
+    return result
+
+
+def restore_all(app_data: AppData, streak_ids: Iterable[str],
+                load_history: Optional[Callable[[Streak], None]] = None) -> BatchResult:
+    """
+    Restore every given broken streak while this month's tokens last
+    (load_history as for StreakManager.restore_streak)
+    """
+    token = StreakManager.get_or_create_restore_token(app_data.restore_tokens)
+    result = BatchResult("Restored")
+    with Transaction(app_data) as transaction:
+        for streak in _resolve(app_data, streak_ids):
+            if StreakManager.check_streak_status(streak) != 'broken':
+                result.skipped.append((streak, "not broken"))
+            elif not token.can_restore():
+                result.skipped.append((streak, "no restore tokens left"))
+            else:
+                transaction.touch(streak)
+                if StreakManager.restore_streak(streak, token, load_history=load_history):
+                    result.done.append(streak)
+                else:
+                    result.skipped.append((streak, f"more than {MAX_RESTORE_DAYS} days missed"))
+    return result
+
+
+def delete_all(app_data: AppData, streak_ids: Iterable[str]) -> BatchResult:
+    """Delete every given streak"""
+    wanted = set(streak_ids)
+    positions = [(i, s) for i, s in enumerate(app_data.streaks) if s.id in wanted]
+    result = BatchResult("Deleted")
+    with Transaction(app_data) as transaction:
+        for position, streak in positions:
+            transaction.remove(streak, position)
+            result.done.append(streak)
+    return result
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Daily Streak Tracker
+Run directly: python benchmarks.py
+"""
+import sys
+import os
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import Streak, ActivityLog, AppData
+from serializer import write_app_data
+
+
+@dataclass
+class _DataclassLog:
+    """The original dict-backed ActivityLog layout, for comparison"""
+    date: str
+    notes: str = ""
+
+
+def make_history(num_streaks: int = 20, days: int = 3650) -> str:
+    """Build a large history as JSON text, the way Storage.load reads it"""
+    notes = ["", "", "", "Restored using token", "Commit", ""]
+    start = date.today() - timedelta(days=days)
+    app_data = AppData(streaks=[
+        Streak(name=f"Streak {i}", activity_logs=[
+            ActivityLog(date=(start + timedelta(days=d)).isoformat(), notes=notes[d % len(notes)])
+            for d in range(days)
+        ])
+        for i in range(num_streaks)
+    ])
+    return json.dumps(app_data.to_dict())
+
+
+def measure_peak(func) -> tuple:
+    """Return (seconds, peak traced bytes) for func(); timed without tracing"""
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def measure(build) -> int:
+    """Traced memory (bytes) still held by the objects returned by build()"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def bench_model_memory(num_streaks: int = 20, days: int = 3650) -> float:
+    """Compare resident memory of slotted models against dataclasses"""
+    text = make_history(num_streaks, days)
+    
+    def load_with(log_cls):
+        # Parsed dicts are dropped; only the model objects stay resident
+        return [
+            [log_cls(log["date"], log.get("notes", "")) for log in streak["activity_logs"]]
+            for streak in json.loads(text)["streaks"]
+        ]
+    
+    baseline = measure(lambda: load_with(_DataclassLog))
+    slotted = measure(lambda: load_with(ActivityLog))
+    ratio = baseline / slotted
+    
+    total = num_streaks * days
+    print(f"Model memory ({total:,} activity logs)")
+    print(f"   dataclass logs: {baseline / 1024 / 1024:8.2f} MiB")
+    print(f"   slotted logs:   {slotted / 1024 / 1024:8.2f} MiB  ({ratio:.1f}x smaller)")
+    return ratio
+
+
+def bench_save(num_streaks: int = 20, days: int = 3650) -> None:
+    """Compare json.dump(to_dict()) against the streaming encoder"""
+    app_data = AppData.from_dict(json.loads(make_history(num_streaks, days)))
+    
+    def dict_tree(indent):
+        with open(os.devnull, 'w') as f:
+            json.dump(app_data.to_dict(), f, indent=indent)
+    
+    def streaming(indent):
+        with open(os.devnull, 'w') as f:
+            write_app_data(f, app_data, indent)
+    
+    print(f"Save ({num_streaks * days:,} activity logs)")
+    for label, func, indent in [
+        ("to_dict + json.dump", dict_tree, 2),
+        ("streaming, indent=2", streaming, 2),
+        ("streaming, compact ", streaming, None),
+    ]:
+        elapsed, peak = measure_peak(lambda: func(indent))
+        print(f"   {label}: {elapsed * 1000:8.1f} ms, peak {peak / 1024 / 1024:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    bench_model_memory()
+    print()
+    bench_save()
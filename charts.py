@@ -0,0 +1,139 @@
+"""
+History series for streak charts
+
+build_series() turns a streak's activity into two per-day series: the
+streak length at the end of each day, and the share of active days in the
+trailing 30 days. lttb() reduces a series to about one point per pixel with
+Largest-Triangle-Three-Buckets, which keeps peaks and breaks visible.
+ChartCache keeps both the full and the reduced series until the streak
+changes, so redrawing or resizing a chart doesn't recompute anything.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import Streak
+from rules import StreakRule
+from snapshots import StreakSnapshots
+from streak_logic import StreakManager
+from leaderboard import WINDOW_DAYS
+
+
+# (day offset from the series start, value)
+Point = Tuple[int, float]
+
+
+class DailySeries:
+    """Streak length and rolling completion (%) for each day from the first activity"""
+    __slots__ = ("start", "lengths", "completion")
+    
+    def __init__(self, start: date, lengths: List[int], completion: List[float]):
+        self.start = start
+        self.lengths = lengths
+        self.completion = completion
+    
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+
+def build_series(rule: StreakRule, days: Iterable[str], end: date) -> DailySeries:
+    """
+    Build the per-day series for activity days (YYYY-MM-DD) up to end.
+    A day's length is 0 once the rule says the streak is broken, like
+    StreakSnapshots.streak_as_of.
+    """
+    ordinals = sorted({date.fromisoformat(day).toordinal() for day in days})
+    if not ordinals:
+        return DailySeries(end, [], [])
+    first = ordinals[0]
+    count = max(end.toordinal(), ordinals[-1]) - first + 1
+    active = bytearray(count)
+    for ordinal in ordinals:
+        active[ordinal - first] = 1
+    
+    lengths = [0] * count
+    completion = [0.0] * count
+    current = longest = state = window = 0
+    last: Optional[date] = None
+    broken_from = first  # Ordinal from which the current run counts as broken
+    for i in range(count):
+        if active[i]:
+            day = date.fromordinal(first + i)
+            current, longest, state = StreakManager.advance(rule, current, longest, last, state, day)
+            last = day
+            broken_from = rule.break_date(day, state).toordinal()
+        lengths[i] = current if first + i < broken_from else 0
+        
+        window += active[i]
+        if i >= WINDOW_DAYS:
+            window -= active[i - WINDOW_DAYS]
+        completion[i] = 100.0 * window / min(i + 1, WINDOW_DAYS)
+    return DailySeries(date.fromordinal(first), lengths, completion)
+
+
+def lttb(values: List[float], threshold: int) -> List[Point]:
+    """Downsample a series to at most threshold points (Largest-Triangle-Three-Buckets)"""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(enumerate(values))
+    
+    points = [(0, values[0])]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # Index of the previously selected point
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        stop = int((bucket + 1) * bucket_size) + 1
+        
+        # Average of the next bucket is the third triangle corner
+        next_start, next_stop = stop, min(int((bucket + 2) * bucket_size) + 1, n)
+        avg_x = (next_start + next_stop - 1) / 2
+        avg_y = sum(values[next_start:next_stop]) / (next_stop - next_start)
+        
+        ax, ay = a, values[a]
+        best, best_area = start, -1.0
+        for i in range(start, stop):
+            area = abs((ax - avg_x) * (values[i] - ay) - (ax - i) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        points.append((best, values[best]))
+        a = best
+    points.append((n - 1, values[-1]))
+    return points
+
+
+class ChartCache:
+    """Full and screen-resolution series per streak, rebuilt when the streak changes"""
+    
+    def __init__(self, storage=None):
+        self.storage = storage  # Reads archived years too when given
+        self._series: Dict[str, Tuple[Tuple, DailySeries]] = {}
+        self._reduced: Dict[Tuple[str, int], Tuple[List[Point], List[Point]]] = {}
+    
+    def series(self, streak: Streak) -> DailySeries:
+        """Per-day series of the full history up to today"""
+        key = (StreakSnapshots.fingerprint(streak), StreakManager.get_today())
+        cached = self._series.get(streak.id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        days = {log.date for log in streak.activity_logs}
+        if self.storage is not None:
+            days.update(log.date for log in self.storage.archived_logs(streak))
+        today = StreakManager.parse_date(StreakManager.get_today())
+        series = build_series(StreakManager.get_rule(streak), days, today)
+        self.invalidate(streak.id)
+        self._series[streak.id] = (key, series)
+        return series
+    
+    def reduced(self, streak: Streak, points: int) -> Tuple[List[Point], List[Point]]:
+        """(lengths, completion) reduced to at most the given number of points"""
+        series = self.series(streak)
+        reduced = self._reduced.get((streak.id, points))
+        if reduced is None:
+            reduced = (lttb(series.lengths, points), lttb(series.completion, points))
+            self._reduced[(streak.id, points)] = reduced
+        return reduced
+    
+    def invalidate(self, streak_id: str) -> None:
+        """Drop everything cached for a streak"""
+        self._series.pop(streak_id, None)
+        for key in [key for key in self._reduced if key[0] == streak_id]:
+            del self._reduced[key]
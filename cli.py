@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Command line interface for Daily Streak Tracker
+Usage: python cli.py <command> [options]  (see python cli.py --help)
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from models import Streak
+from storage import Storage
+from streak_logic import StreakManager, MAX_RESTORE_DAYS
+from search import NoteIndex
+from export import export_history, EXPORT_FORMATS
+from leaderboard import Leaderboard, BOARDS
+from sync import sync_storage
+from rest import DayBitset, RestCalendar, parse_weekdays
+from tokens import TokenLedger
+from groups import StreakGroup
+from events import bus, ActivityAdded
+
+
+def find_streak(app_data, name: str) -> Streak:
+    """Find a streak by ID or case-insensitive name, or exit with an error"""
+    streak = app_data.get_streak(name) or app_data.find_streak(name)
+    if streak is None:
+        sys.exit(f"No streak named '{name}'")
+    return streak
+
+
+def cmd_list(storage: Storage, args) -> int:
+    """List all streaks with their status"""
+    app_data = storage.load()
+    for streak in app_data.streaks:
+        status = StreakManager.check_streak_status(streak)
+        print(f"{streak.name:30} {status:7} current {streak.current_streak:4}  "
+              f"longest {streak.longest_streak:4}  last {streak.last_activity_date or '-'}")
+    return 0
+
+
+def cmd_mark(storage: Storage, args) -> int:
+    """Mark activity for a streak"""
+    day = None
+    if args.date:
+        try:
+            day = StreakManager.parse_date(args.date).isoformat()
+        except ValueError as e:
+            print(e)
+            return 1
+        if day > StreakManager.get_today():
+            print(f"Can't mark {day}: it is after today")
+            return 1
+    app_data = storage.load()
+    streak = find_streak(app_data, args.name)
+    if day and day < streak.last_activity_date:
+        storage.load_history(streak)  # A back-filled day recounts the whole streak
+    index = NoteIndex.for_storage(storage, app_data)
+    bus.subscribe(ActivityAdded, index.on_event)
+    try:
+        marked = StreakManager.mark_activity(streak, day, args.note or "")
+    finally:
+        bus.unsubscribe(ActivityAdded, index.on_event)
+    if not marked:
+        print(f"Activity for '{streak.name}' is already logged for that day")
+        return 1
+    if not storage.save(app_data):
+        return 1
+    index.save()
+    print(f"Activity marked for '{streak.name}'. Current Streak: {streak.current_streak} days 🔥")
+    return 0
+
+
+def cmd_search(storage: Storage, args) -> int:
+    """Search activity notes"""
+    app_data = storage.load()
+    index = NoteIndex.for_storage(storage, app_data)
+    index.save()
+    streak_id = find_streak(app_data, args.streak).id if args.streak else None
+    hits = index.search(args.query, streak_id=streak_id)
+    for hit in hits[:args.limit]:
+        streak = app_data.get_streak(hit[0])
+        if streak is not None:
+            print(f"{hit[1]}  {streak.name}: {index.get_notes(hit)}")
+    if not hits:
+        print("No matching notes")
+    return 0
+
+
+def cmd_export(storage: Storage, args) -> int:
+    """Export activity history to CSV, JSONL or iCalendar"""
+    try:
+        count = export_history(storage, args.output, args.format, args.streak,
+                               args.start or "", args.end or "")
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Exported {count} activities to {args.output}")
+    return 0
+
+
+def cmd_leaderboard(storage: Storage, args) -> int:
+    """Show the top streaks, optionally across several data files"""
+    board = Leaderboard()
+    board.track_all(storage.load(), storage.data_file.stem)
+    for data_file in args.include or []:
+        other = Storage(data_file=data_file, data_dir=str(storage.data_dir))
+        board.track_all(other.load(), other.data_file.stem)
+    tenants = len(args.include or []) > 0
+    for position, (streak, score) in enumerate(board.top(args.board, args.top), 1):
+        owner = f"{board.tenant_of(streak)}: " if tenants else ""
+        print(f"{position:3}. {owner + streak.name:40} {score:5}")
+    return 0
+
+
+def cmd_sync(storage: Storage, args) -> int:
+    """Exchange changes with other devices through a shared folder"""
+    try:
+        published, added = sync_storage(storage, args.shared_dir)
+    except OSError as e:
+        print(e)
+        return 1
+    if added:
+        index = NoteIndex.for_storage(storage)
+        index.save()
+    print(f"Published {published} change(s), merged {added} new activity day(s)")
+    return 0
+
+
+def cmd_backup(storage: Storage, args) -> int:
+    """List, create or restore backups"""
+    backups = storage.backups
+    if args.restore:
+        try:
+            version = backups.restore(None if args.restore == "latest" else args.restore)
+        except ValueError as e:
+            print(e)
+            return 1
+        print(f"Restored backup {version}")
+    elif args.list:
+        for version in backups.versions():
+            manifest = backups.manifest(version)
+            print(f"{version}  {manifest['created'][:19]}  {len(manifest.get('streaks', []))} streaks")
+    else:
+        version = backups.backup()
+        print(f"Created backup {version}" if version else "No changes since the last backup")
+    return 0
+
+
+def cmd_rest(storage: Storage, args) -> int:
+    """Plan rest days for a streak, or show them with the days missed recently"""
+    try:
+        weekdays = parse_weekdays(args.weekdays) if args.weekdays is not None else None
+    except ValueError as e:
+        print(e)
+        return 1
+    # Rest weekdays change the count over the whole history
+    app_data = storage.load(include_archive=weekdays is not None)
+    streak = find_streak(app_data, args.name)
+    if weekdays is not None or args.start:
+        try:
+            if weekdays is not None:
+                if streak.rest_days is None:
+                    streak.rest_days = RestCalendar()
+                streak.rest_days.set_weekdays(weekdays)
+            if args.start:
+                StreakManager.plan_rest(streak, args.start, args.end,
+                                        None if weekdays is not None else storage.load_history)
+            elif streak.activity_logs:
+                StreakManager.recalculate(streak)
+        except ValueError as e:
+            print(e)
+            return 1
+        if not storage.save(app_data):
+            return 1
+    
+    calendar = streak.rest_days or RestCalendar()
+    print(f"{streak.name}: resting {calendar.describe()}")
+    today = StreakManager.parse_date(StreakManager.get_today())
+    activity = DayBitset.from_days(log.date for log in streak.activity_logs)
+    start = today - timedelta(days=args.days - 1)
+    if activity.bits:
+        start = max(start, date.fromordinal(activity.base))  # Nothing was needed before the first day
+    missed = calendar.missed_days(activity, start, today - timedelta(days=1))
+    print(f"Missed in the last {args.days} days: {', '.join(d.isoformat() for d in missed) or 'none'}")
+    return 0
+
+
+def cmd_restore(storage: Storage, args) -> int:
+    """Spend a restore token to fill the days a broken streak missed"""
+    app_data = storage.load()
+    streak = find_streak(app_data, args.name)
+    if StreakManager.check_streak_status(streak) != 'broken':
+        print(f"'{streak.name}' is not broken")
+        return 1
+    token = StreakManager.get_or_create_restore_token(app_data.restore_tokens)
+    if not token.can_restore():
+        print("No restore tokens left this month")
+        return 1
+    if not StreakManager.restore_streak(streak, token, load_history=storage.load_history):
+        print(f"'{streak.name}' missed more than {MAX_RESTORE_DAYS} days; a token can't fill that")
+        return 1
+    if not storage.save(app_data):
+        return 1
+    days = token.redemptions[-1].days
+    print(f"Restored '{streak.name}' ({', '.join(days)}). Current Streak: {streak.current_streak} days 🔥")
+    print(f"Tokens left this month: {token.remaining_tokens()}/{token.max_tokens}")
+    return 0
+
+
+def cmd_tokens(storage: Storage, args) -> int:
+    """Show restore tokens left, usage per month and what they were spent on"""
+    app_data = storage.load()
+    ledger = TokenLedger(app_data.restore_tokens)
+    token = ledger.token()
+    print(f"{token.month}: {token.remaining_tokens()}/{token.max_tokens} restore tokens left")
+    for month, used, allowed in ledger.usage():
+        print(f"  {month}  used {used}/{allowed}")
+    streak_id = find_streak(app_data, args.streak).id if args.streak else None
+    for month, redemption in ledger.history(streak_id):
+        streak = app_data.get_streak(redemption.streak_id)
+        name = streak.name if streak is not None else redemption.streak_id
+        print(f"  {month}  {name}: {', '.join(redemption.days)}")
+    return 0
+
+
+def cmd_group(storage: Storage, args) -> int:
+    """Show the streak of days on which all (or --min) member streaks were active"""
+    files = [storage] + [Storage(data_file=f, data_dir=str(storage.data_dir)) for f in args.include or []]
+    members, labels = [], {}
+    for source in files:
+        app_data = source.load(include_archive=True)
+        for name in args.names:
+            streak = app_data.get_streak(name) or app_data.find_streak(name)
+            if streak is not None:
+                members.append(streak)
+                labels[id(streak)] = f"{source.data_file.stem}: {streak.name}" if args.include else streak.name
+    if not members:
+        print("No matching streaks")
+        return 1
+    try:
+        group = StreakGroup(", ".join(args.names), members, args.min, watch=False)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"{group.name}: {len(members)} members, {group.threshold()} needed per day")
+    print(f"Current {group.current()}  longest {group.longest_streak}  "
+          f"last {group.last_activity_date or '-'}")
+    today = StreakManager.parse_date(StreakManager.get_today())
+    missing = group.missing(today)
+    if missing and group.check_status() != 'new':
+        print(f"Not checked in today: {', '.join(labels[id(s)] for s in missing[:10])}"
+              + (f" and {len(missing) - 10} more" if len(missing) > 10 else ""))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Daily Streak Tracker")
+    parser.add_argument("--data-dir", default=None, help="data directory (default ~/.daily_streak_tracker)")
+    parser.add_argument("--data-file", default="streak_data.json", help="data file name")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    commands.add_parser("list", help="list streaks").set_defaults(func=cmd_list)
+    
+    mark = commands.add_parser("mark", help="mark activity for a streak")
+    mark.add_argument("name", help="streak name")
+    mark.add_argument("--note", help="note to store with the activity")
+    mark.add_argument("--date", help="YYYY-MM-DD (default today)")
+    mark.set_defaults(func=cmd_mark)
+    
+    search = commands.add_parser("search", help="search activity notes")
+    search.add_argument("query", help='words to find; quote phrases: \'"dynamic programming"\'')
+    search.add_argument("--streak", help="only search this streak")
+    search.add_argument("--limit", type=int, default=50, help="maximum results to show")
+    search.set_defaults(func=cmd_search)
+    
+    export = commands.add_parser("export", help="export activity history")
+    export.add_argument("output", help="output file (.csv, .jsonl or .ics)")
+    export.add_argument("--format", choices=EXPORT_FORMATS, help="override the format from the extension")
+    export.add_argument("--streak", action="append", help="only export this streak (repeatable)")
+    export.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    export.add_argument("--to", dest="end", help="last date, YYYY-MM-DD")
+    export.set_defaults(func=cmd_export)
+    
+    leaderboard = commands.add_parser("leaderboard", help="show the top streaks")
+    leaderboard.add_argument("--board", choices=BOARDS, default="current", help="what to rank by")
+    leaderboard.add_argument("--top", type=int, default=10, help="number of streaks to show")
+    leaderboard.add_argument("--include", action="append",
+                             help="also rank the streaks of this data file (repeatable)")
+    leaderboard.set_defaults(func=cmd_leaderboard)
+    
+    sync = commands.add_parser("sync", help="sync with other devices through a shared folder")
+    sync.add_argument("shared_dir", help="folder shared between devices (e.g. a synced folder)")
+    sync.set_defaults(func=cmd_sync)
+    
+    backup = commands.add_parser("backup", help="back up data (also done on every save)")
+    backup.add_argument("--list", action="store_true", help="list backup versions")
+    backup.add_argument("--restore", metavar="VERSION", help="restore a version ('latest' for the newest)")
+    backup.set_defaults(func=cmd_backup)
+    
+    rest = commands.add_parser("rest", help="plan rest days (weekends, vacations, freezes)")
+    rest.add_argument("name", help="streak name")
+    rest.add_argument("--weekdays", help="weekly rest days, e.g. sat,sun ('' for none)")
+    rest.add_argument("--from", dest="start", help="first rest day, YYYY-MM-DD")
+    rest.add_argument("--to", dest="end", help="last rest day (default --from)")
+    rest.add_argument("--days", type=int, default=30, help="days to check for misses (default 30)")
+    rest.set_defaults(func=cmd_rest)
+    
+    restore = commands.add_parser("restore", help="use a restore token on a broken streak")
+    restore.add_argument("name", help="streak name")
+    restore.set_defaults(func=cmd_restore)
+    
+    tokens = commands.add_parser("tokens", help="show restore tokens and their history")
+    tokens.add_argument("--streak", help="only show this streak's restores")
+    tokens.set_defaults(func=cmd_tokens)
+    
+    group = commands.add_parser("group", help="show a group streak over several streaks")
+    group.add_argument("names", nargs="+", help="member streak names (matched in every data file)")
+    group.add_argument("--min", type=int, help="members needed per day (default all)")
+    group.add_argument("--include", action="append",
+                       help="also take members from this data file (repeatable)")
+    group.set_defaults(func=cmd_group)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    storage = Storage(data_file=args.data_file, data_dir=args.data_dir)
+    return args.func(storage, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
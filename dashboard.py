@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Static HTML dashboard of streaks, for one or many data files (tenants)
+
+build_dashboard() writes one page per streak (statistics and a year-long
+activity heatmap), one index page per tenant and an overall index with the
+leaderboards. Streak pages are rendered in parallel by a process pool and
+only when their input changed: each page's inputs are hashed and compared
+with manifest.json from the previous build, so a nightly build over
+thousands of streaks only renders the few that saw new activity. Streak
+pages don't depend on the build date or on other streaks; the index pages
+(ranks, today's status) are cheap and rebuilt every time.
+
+Usage: python dashboard.py site/ --include partner.json
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from models import AppData, Streak
+from rest import RestCalendar
+from rules import DAILY
+from leaderboard import Leaderboard, BOARDS
+from streak_logic import StreakManager
+
+
+# Bump when the page layout changes, so every page is rendered again
+DASHBOARD_VERSION = 1
+
+HEATMAP_WEEKS = 53
+HEATMAP_CELL = 11  # Pixels per day, including a 2 pixel gap
+
+# Pages handed to a worker at a time
+PAGES_PER_TASK = 32
+
+BOARD_TITLES = {"current": "Current streak", "longest": "Longest streak", "last_30_days": "Active days (30)"}
+
+STYLE = """
+body { font-family: Arial, sans-serif; margin: 2em; color: #24292f; }
+table { border-collapse: collapse; margin: 1em 0; }
+td, th { padding: 4px 12px; border-bottom: 1px solid #ddd; text-align: left; }
+.boards { display: flex; gap: 2em; flex-wrap: wrap; }
+.muted { color: gray; }
+"""
+
+
+class BuildResult:
+    """Pages rendered, pages left as they were and pages removed by a build"""
+    __slots__ = ("rendered", "unchanged", "removed")
+    
+    def __init__(self):
+        self.rendered = 0
+        self.unchanged = 0
+        self.removed = 0
+
+
+def _page(title: str, body: str) -> str:
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<style>{STYLE}</style></head>\n<body>\n{body}\n</body></html>\n")
+
+
+def _write(path: Path, text: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _heatmap(days: List[str], rest: Optional[Dict], end: date) -> str:
+    """SVG grid of the HEATMAP_WEEKS weeks up to end, one column per week"""
+    active = set(days)
+    calendar = RestCalendar.from_dict(rest) if rest is not None else None
+    last_sunday = end + timedelta(days=6 - end.weekday())
+    first = last_sunday - timedelta(weeks=HEATMAP_WEEKS, days=-1)
+    cells = []
+    for i in range(HEATMAP_WEEKS * 7):
+        day = first + timedelta(days=i)
+        if day > end:
+            break
+        iso = day.isoformat()
+        if iso in active:
+            color = "#40c463"
+        elif calendar is not None and calendar.is_rest(day):
+            color = "#c6e2ff"
+        else:
+            color = "#ebedf0"
+        x, y = (i // 7) * HEATMAP_CELL, (i % 7) * HEATMAP_CELL
+        cells.append(f'<rect x="{x}" y="{y}" width="9" height="9" fill="{color}"><title>{iso}</title></rect>')
+    return (f'<svg width="{HEATMAP_WEEKS * HEATMAP_CELL}" height="{7 * HEATMAP_CELL}">'
+            + "".join(cells) + "</svg>")
+
+
+def render_streak_page(page: Dict) -> str:
+    """HTML for one streak page; depends only on the page's own inputs"""
+    days = page["days"]
+    end = date.fromisoformat(days[-1]) if days else date.fromisoformat(page["created"])
+    year_start = (end - timedelta(days=364)).isoformat()
+    in_year = sum(1 for day in days if day >= year_start)
+    rows = [
+        ("Goal", page["goal"]),
+        ("Rest days", page["rest_text"] or "none"),
+        ("Current streak", f"{page['current']} days"),
+        ("Longest streak", f"{page['longest']} days"),
+        ("Active days", f"{len(days)} ({in_year} in the year up to the last activity)"),
+        ("First activity", days[0] if days else "-"),
+        ("Last activity", days[-1] if days else "-"),
+        ("Breaks on", page["break_date"] or "-"),
+        ("Created", page["created"]),
+    ]
+    body = [
+        f'<p><a href="index.html">← {html.escape(page["tenant"])}</a></p>',
+        f"<h1>{html.escape(page['name'])}</h1>",
+        _heatmap(days, page["rest"], end),
+        "<table>",
+        *(f"<tr><th>{label}</th><td>{html.escape(str(value))}</td></tr>" for label, value in rows),
+        "</table>",
+    ]
+    return _page(page["name"], "\n".join(body))
+
+
+def _render_pages(out_dir: str, pages: List[Dict]) -> int:
+    """Worker task: render and write a batch of streak pages"""
+    for page in pages:
+        _write(Path(out_dir) / page["path"], render_streak_page(page))
+    return len(pages)
+
+
+def _digest(streak: Streak, archive: List) -> str:
+    """Hash of a page's inputs: the streak and its own archived years (count and range)"""
+    data = json.dumps([DASHBOARD_VERSION, streak.to_dict(), archive], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _page_inputs(tenant: str, streak: Streak, days: List[str]) -> Dict:
+    break_date = StreakManager.get_break_date(streak)
+    return {
+        "path": f"{tenant}/{streak.id}.html",
+        "tenant": tenant,
+        "name": streak.name,
+        "days": days,
+        "current": streak.current_streak,
+        "longest": streak.longest_streak,
+        "goal": (streak.rule or DAILY).describe(),
+        "rest": streak.rest_days.to_dict() if streak.rest_days is not None else None,
+        "rest_text": streak.rest_days.describe() if streak.rest_days is not None else "",
+        "break_date": break_date.isoformat() if break_date else "",
+        "created": streak.created_date,
+    }
+
+
+def _board_tables(board: Leaderboard, tenant: Optional[str], top: int) -> str:
+    tables = []
+    for name in BOARDS:
+        rows = []
+        for position, (streak, score) in enumerate(board.top(name, top, tenant), 1):
+            owner = board.tenant_of(streak)
+            link = f'{owner}/{streak.id}.html' if tenant is None else f'{streak.id}.html'
+            label = html.escape(streak.name if tenant is not None else f"{owner}: {streak.name}")
+            rows.append(f'<tr><td>{position}</td><td><a href="{link}">{label}</a></td><td>{score}</td></tr>')
+        tables.append(f"<div><h3>{BOARD_TITLES[name]}</h3><table>{''.join(rows)}</table></div>")
+    return '<div class="boards">' + "".join(tables) + "</div>"
+
+
+def _tenant_index(tenant: str, app_data: AppData, board: Leaderboard, today: str) -> str:
+    rows = []
+    for streak in app_data.streaks:
+        status = StreakManager.check_streak_status(streak)
+        rows.append(
+            f'<tr><td><a href="{streak.id}.html">{html.escape(streak.name)}</a></td><td>{status}</td>'
+            f"<td>{streak.current_streak}</td><td>{streak.longest_streak}</td>"
+            f"<td>{streak.last_activity_date or '-'}</td></tr>"
+        )
+    body = [
+        '<p><a href="../index.html">← All</a></p>',
+        f"<h1>{html.escape(tenant)}</h1>",
+        f'<p class="muted">As of {today}</p>',
+        _board_tables(board, tenant, 10),
+        "<h2>Streaks</h2><table><tr><th>Streak</th><th>Status</th><th>Current</th>"
+        "<th>Longest</th><th>Last activity</th></tr>",
+        *rows,
+        "</table>",
+    ]
+    return _page(tenant, "\n".join(body))
+
+
+def build_dashboard(storages: List, out_dir: str, workers: Optional[int] = None,
+                    force: bool = False) -> BuildResult:
+    """
+    Build the site for the given Storage objects (one tenant each, named
+    after the data file) into out_dir. Unchanged streak pages are kept
+    unless force is set.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / "manifest.json"
+    manifest: Dict[str, str] = {}
+    if manifest_path.exists() and not force:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    
+    result = BuildResult()
+    board = Leaderboard()
+    new_manifest: Dict[str, str] = {}
+    pages: List[Dict] = []
+    tenants: List[Tuple[str, AppData]] = []
+    for storage in storages:
+        tenant = storage.data_file.stem
+        app_data = storage.load()
+        board.track_all(app_data, tenant)
+        tenants.append((tenant, app_data))
+        (out / tenant).mkdir(exist_ok=True)
+        
+        archive = storage.archive_summary()
+        changed: Dict[str, str] = {}
+        for streak in app_data.streaks:
+            path = f"{tenant}/{streak.id}.html"
+            digest = _digest(streak, archive.get(streak.id) or archive.get(streak.name, []))
+            new_manifest[path] = digest
+            if manifest.get(path) == digest and (out / path).exists():
+                result.unchanged += 1
+            else:
+                changed[streak.id] = path
+        if not changed:
+            continue
+        
+        # Only changed streaks need their archived history
+        days: Dict[str, List[str]] = {streak_id: [] for streak_id in changed}
+        for streak, log in storage.iter_logs(list(changed)):
+            days[streak.id].append(log.date)
+        for streak_id in changed:
+            streak = app_data.get_streak(streak_id)
+            pages.append(_page_inputs(tenant, streak, sorted(set(days[streak_id]))))
+    
+    # Render changed streak pages across the pool
+    if pages:
+        batches = [pages[i:i + PAGES_PER_TASK] for i in range(0, len(pages), PAGES_PER_TASK)]
+        workers = max(1, min(workers or os.cpu_count() or 1, len(batches)))
+        if workers == 1:
+            result.rendered = sum(_render_pages(str(out), batch) for batch in batches)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                result.rendered = sum(pool.map(_render_pages, [str(out)] * len(batches), batches))
+    
+    # Pages of deleted streaks
+    for path in manifest:
+        if path not in new_manifest:
+            try:
+                (out / path).unlink()
+            except FileNotFoundError:
+                pass
+            result.removed += 1
+    
+    today = StreakManager.get_today()
+    for tenant, app_data in tenants:
+        _write(out / tenant / "index.html", _tenant_index(tenant, app_data, board, today))
+    links = "".join(f'<li><a href="{t}/index.html">{html.escape(t)}</a> ({len(a.streaks)} streaks)</li>'
+                    for t, a in tenants)
+    _write(out / "index.html", _page("Streak Dashboard", "\n".join([
+        "<h1>🔥 Streak Dashboard</h1>",
+        f'<p class="muted">As of {today}</p>',
+        _board_tables(board, None, 20),
+        f"<h2>Teams</h2><ul>{links}</ul>",
+    ])))
+    _write(manifest_path, json.dumps(new_manifest, indent=1))
+    return result
+
+
+def main(argv=None) -> int:
+    """Build the dashboard from the command line"""
+    from storage import Storage
+    
+    parser = argparse.ArgumentParser(description="Build a static HTML dashboard of streaks")
+    parser.add_argument("output", help="output directory")
+    parser.add_argument("--data-file", default="streak_data.json", help="data file name")
+    parser.add_argument("--data-dir", default=None, help="data directory")
+    parser.add_argument("--include", action="append", help="also include this data file (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="render every page again")
+    args = parser.parse_args(argv)
+    
+    storages = [Storage(data_file=args.data_file, data_dir=args.data_dir, backups=False)]
+    for data_file in args.include or []:
+        storages.append(Storage(data_file=data_file, data_dir=str(storages[0].data_dir), backups=False))
+    result = build_dashboard(storages, args.output, args.workers, args.force)
+    print(f"Rendered {result.rendered} page(s), {result.unchanged} unchanged, "
+          f"{result.removed} removed: {Path(args.output) / 'index.html'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,7 +44,7 @@ def demo_basic_usage():
     print_separator()
     
     # Create storage with a demo file
-    storage = Storage(data_file="demo_data.json")
+    storage = Storage(data_file="demo_data.json", backups=False)
     
     print("1️⃣  Creating a new streak tracker app...")
     app_data = AppData()
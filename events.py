@@ -0,0 +1,133 @@
+"""
+In-process change events
+
+StreakManager and AppData publish a typed event for every change they make
+(activity added, streak created, deleted, broken or recounted, restore
+token used) to the shared `bus`. Subscribers pick the event types they care
+about; subscribing to a base class such as StreakEvent receives all of its
+subclasses.
+
+Synchronous subscribers run inside publish(), on the publishing thread.
+Queued subscribers get the event appended to the bus queue instead, and run
+when their owner calls drain() (e.g. from the Tk event loop), so slow work
+like saving or redrawing happens later and in one place. Handlers per event
+type are resolved once and cached, so publishing costs a dict lookup plus
+one call per handler.
+"""
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Type
+
+
+class ChangeEvent:
+    """Base class of every change event"""
+    __slots__ = ()
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{self.__class__.__name__}({fields})"
+    
+    def _fields(self) -> List[str]:
+        return [name for cls in reversed(self.__class__.__mro__) for name in getattr(cls, "__slots__", ())]
+
+
+class StreakEvent(ChangeEvent):
+    """Something happened to one streak"""
+    __slots__ = ("streak",)
+    
+    def __init__(self, streak):
+        self.streak = streak
+
+
+class ActivityAdded(StreakEvent):
+    """An activity day was logged (counters are already updated)"""
+    __slots__ = ("date", "notes")
+    
+    def __init__(self, streak, date: str, notes: str = ""):
+        super().__init__(streak)
+        self.date = date
+        self.notes = notes
+
+
+class StreakUpdated(StreakEvent):
+    """A streak's counters were rebuilt or rolled back as a whole"""
+    __slots__ = ()
+
+
+class StreakBroken(StreakEvent):
+    """A streak's current count dropped to 0 after a missed deadline"""
+    __slots__ = ()
+
+
+class StreakCreated(StreakEvent):
+    """A streak was added to AppData"""
+    __slots__ = ()
+
+
+class StreakDeleted(StreakEvent):
+    """A streak was removed from AppData"""
+    __slots__ = ()
+
+
+class TokenUsed(ChangeEvent):
+    """A restore token was spent on a streak"""
+    __slots__ = ("token", "streak")
+    
+    def __init__(self, token, streak=None):
+        self.token = token
+        self.streak = streak
+
+
+Handler = Callable[[ChangeEvent], None]
+
+
+class EventBus:
+    """Typed publish/subscribe with synchronous and queued delivery"""
+    
+    def __init__(self):
+        self._subscriptions: List[Tuple[Type[ChangeEvent], Handler, bool]] = []
+        self._routes: Dict[type, Tuple[Tuple[Handler, ...], Tuple[Handler, ...]]] = {}
+        self._queue: Deque[Tuple[Handler, ChangeEvent]] = deque()
+    
+    def subscribe(self, event_type: Type[ChangeEvent], handler: Handler, queued: bool = False) -> Handler:
+        """Call handler for events of event_type (and its subclasses); returns handler"""
+        if (event_type, handler, queued) not in self._subscriptions:
+            self._subscriptions.append((event_type, handler, queued))
+            self._routes.clear()
+        return handler
+    
+    def unsubscribe(self, event_type: Type[ChangeEvent], handler: Handler) -> None:
+        """Stop delivering event_type to handler; already queued events are dropped"""
+        self._subscriptions = [s for s in self._subscriptions if s[:2] != (event_type, handler)]
+        self._routes.clear()
+        self._queue = deque(item for item in self._queue if item[0] != handler)
+    
+    def _route(self, event_class: type) -> Tuple[Tuple[Handler, ...], Tuple[Handler, ...]]:
+        sync = tuple(h for t, h, q in self._subscriptions if not q and issubclass(event_class, t))
+        queued = tuple(h for t, h, q in self._subscriptions if q and issubclass(event_class, t))
+        self._routes[event_class] = (sync, queued)
+        return sync, queued
+    
+    def publish(self, event: ChangeEvent) -> None:
+        """Deliver an event to synchronous handlers now and queue it for the others"""
+        route = self._routes.get(event.__class__) or self._route(event.__class__)
+        for handler in route[1]:
+            self._queue.append((handler, event))
+        for handler in route[0]:
+            handler(event)
+    
+    def pending(self) -> int:
+        """Queued deliveries not drained yet"""
+        return len(self._queue)
+    
+    def drain(self, limit: Optional[int] = None) -> int:
+        """Run queued deliveries in publish order (at most limit); returns how many ran"""
+        count = 0
+        while self._queue and (limit is None or count < limit):
+            handler, event = self._queue.popleft()
+            handler(event)
+            count += 1
+        return count
+
+
+# The bus StreakManager and AppData publish to
+bus = EventBus()
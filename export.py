@@ -0,0 +1,107 @@
+"""
+Streaming export of activity history to CSV, JSONL and iCalendar
+
+Rows come from Storage.iter_logs(), which reads archived years one at a
+time, and are written as they are produced, so exports of any size run in
+bounded memory.
+"""
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+from typing import IO, Iterable, Iterator, Optional, Tuple
+from models import ActivityLog, Streak
+from storage import Storage
+
+
+Row = Tuple[Streak, ActivityLog]
+
+EXPORT_FORMATS = ("csv", "jsonl", "ics")
+
+
+def write_csv(rows: Iterable[Row], f: IO[str]) -> int:
+    """Write rows as CSV with a header; returns the number of rows"""
+    writer = csv.writer(f)
+    writer.writerow(["streak", "date", "notes", "streak_id"])
+    count = 0
+    for streak, log in rows:
+        writer.writerow([streak.name, log.date, log.notes, streak.id])
+        count += 1
+    return count
+
+
+def write_jsonl(rows: Iterable[Row], f: IO[str]) -> int:
+    """Write one JSON object per line; returns the number of rows"""
+    count = 0
+    for streak, log in rows:
+        f.write(json.dumps({"streak": streak.name, "streak_id": streak.id,
+                            "date": log.date, "notes": log.notes}))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def _ics_escape(text: str) -> str:
+    """Escape a TEXT value (RFC 5545 section 3.3.11)"""
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _ics_lines(line: str) -> Iterator[str]:
+    """Fold a content line at 75 octets (RFC 5545 section 3.1)"""
+    data = line.encode("utf-8")
+    first = True
+    while data:
+        limit = 75 if first else 74  # Continuation lines start with a space
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1  # Don't split a UTF-8 sequence
+        yield ("" if first else " ") + data[:cut].decode("utf-8") + "\r\n"
+        data = data[cut:]
+        first = False
+
+
+def write_ics(rows: Iterable[Row], f: IO[str]) -> int:
+    """Write one all-day event per activity; returns the number of events"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Daily Streak Tracker//EN\r\n")
+    count = 0
+    for streak, log in rows:
+        day = log.date.replace("-", "")
+        next_day = (datetime.strptime(log.date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y%m%d")
+        uid = f"{streak.id}-{day}"
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}@daily-streak-tracker",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{day}",
+            f"DTEND;VALUE=DATE:{next_day}",
+            f"SUMMARY:{_ics_escape('✅ ' + streak.name)}",
+        ]
+        if log.notes:
+            lines.append(f"DESCRIPTION:{_ics_escape(log.notes)}")
+        lines.append("END:VEVENT")
+        for line in lines:
+            f.writelines(_ics_lines(line))
+        count += 1
+    f.write("END:VCALENDAR\r\n")
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "ics": write_ics}
+
+
+def export_history(storage: Storage, path: str, fmt: Optional[str] = None,
+                   streak_names: Optional[Iterable[str]] = None,
+                   start: str = "", end: str = "") -> int:
+    """
+    Export activity history to a file.
+    The format is taken from the file extension unless fmt is given.
+    Returns the number of exported activities.
+    """
+    fmt = (fmt or path.rsplit(".", 1)[-1]).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt} (use one of {', '.join(EXPORT_FORMATS)})")
+    rows = storage.iter_logs(streak_names, start, end)
+    newline = "" if fmt in ("csv", "ics") else None  # These writers emit their own line endings
+    with open(path, 'w', encoding='utf-8', newline=newline) as f:
+        return WRITERS[fmt](rows, f)
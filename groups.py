@@ -0,0 +1,164 @@
+"""
+Group streaks over several member streaks
+
+A StreakGroup counts a day as active when at least `needed` of its members
+(default all of them) logged activity that day. Members can be streaks of
+one data file or of several tenants. Each member's days are one int with a
+bit per day (as in rest.DayBitset), aligned to a shared first day, so the
+group's days are an AND of the members (everyone) or a threshold count over
+them (N of M): whole years of history per big-int operation either way.
+
+A group watches the event bus: a member's new activity day re-evaluates
+just that day, and current / longest are updated from the run of days
+around it. Recounted or rolled-back members are rebuilt from their logs.
+"""
+from datetime import date
+from functools import reduce
+from typing import Dict, Iterable, List, Optional
+from models import Streak
+from rest import DayBitset
+from streak_logic import StreakManager
+from events import bus, StreakEvent, ActivityAdded, StreakDeleted, StreakUpdated
+
+
+def at_least(bitsets: List[int], needed: int) -> int:
+    """Bits set in at least `needed` of the bitsets"""
+    if needed <= 0:
+        raise ValueError("needed must be at least 1")
+    if needed > len(bitsets):
+        return 0
+    if needed == len(bitsets):
+        return reduce(lambda a, b: a & b, bitsets)
+    if needed == 1:
+        return reduce(lambda a, b: a | b, bitsets)
+    # counts[k]: bits set in at least k of the bitsets seen so far (-1 is all ones)
+    counts = [-1] + [0] * needed
+    for i, bits in enumerate(bitsets):
+        for k in range(min(i + 1, needed), 0, -1):
+            counts[k] |= counts[k - 1] & bits
+    return counts[needed]
+
+
+def _run_at(bits: int, position: int) -> int:
+    """Length of the run of set bits through position"""
+    below = ~bits & ((1 << position) - 1)
+    above = (bits >> position) + 1  # Carry clears the run's bits from position up
+    return position - below.bit_length() + (above & -above).bit_length() - 1
+
+
+def _longest_run(bits: int) -> int:
+    longest = 0
+    while bits:
+        start = (bits & -bits).bit_length() - 1
+        filled = bits + (1 << start)
+        longest = max(longest, (filled & -filled).bit_length() - 1 - start)
+        bits &= filled  # Drop this run
+    return longest
+
+
+class StreakGroup:
+    """A streak over the days on which at least `needed` member streaks were active"""
+    
+    def __init__(self, name: str, members: Iterable[Streak] = (), needed: Optional[int] = None,
+                 watch: bool = True):
+        if needed is not None and needed < 1:
+            raise ValueError("needed must be at least 1")
+        self.name = name
+        self.needed = needed  # None: every member
+        # Keyed by object: copies of one data file (tenants) can share streak IDs
+        self.members: Dict[int, Streak] = {id(streak): streak for streak in members}
+        self.base = 0  # Ordinal of bit 0 in every bitset below (0: no days yet)
+        self._bits: Dict[int, int] = {}
+        self.bits = 0  # Group days
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.last_activity_date = ""
+        self.rebuild()
+        self._watching = watch
+        if watch:
+            bus.subscribe(StreakEvent, self.on_event)
+    
+    def close(self) -> None:
+        """Stop following member changes"""
+        if self._watching:
+            bus.unsubscribe(StreakEvent, self.on_event)
+            self._watching = False
+    
+    def threshold(self) -> int:
+        return len(self.members) if self.needed is None else min(self.needed, len(self.members))
+    
+    def add_member(self, streak: Streak) -> None:
+        self.members[id(streak)] = streak
+        self.rebuild()
+    
+    def remove_member(self, streak: Streak) -> None:
+        if self.members.pop(id(streak), None) is not None:
+            self.rebuild()
+    
+    def rebuild(self) -> None:
+        """Recompute every member's days and the group from the activity logs"""
+        days = {key: DayBitset.from_days(log.date for log in streak.activity_logs)
+                for key, streak in self.members.items()}
+        self.base = min((d.base for d in days.values() if d.bits), default=0)
+        self._bits = {key: d.bits << (d.base - self.base) if d.bits else 0 for key, d in days.items()}
+        needed = self.threshold()
+        self.bits = at_least(list(self._bits.values()), needed) if needed else 0
+        self.longest_streak = _longest_run(self.bits)
+        self._update_current()
+    
+    def _update_current(self) -> None:
+        if not self.bits:
+            self.current_streak, self.last_activity_date = 0, ""
+            return
+        top = self.bits.bit_length() - 1
+        self.last_activity_date = date.fromordinal(self.base + top).isoformat()
+        self.current_streak = _run_at(self.bits, top)
+    
+    def add_day(self, streak: Streak, day: date) -> bool:
+        """Record a member's activity day; returns True if it made the day a group day"""
+        offset = day.toordinal() - self.base
+        if offset < 0 or not self.base:
+            self.rebuild()  # First day, or before every known day: realign all bitsets
+            return bool(self.bits >> (day.toordinal() - self.base) & 1)
+        self._bits[id(streak)] |= 1 << offset
+        if self.bits >> offset & 1:
+            return False
+        count = sum(bits >> offset & 1 for bits in self._bits.values())
+        if count < self.threshold():
+            return False
+        self.bits |= 1 << offset
+        self.longest_streak = max(self.longest_streak, _run_at(self.bits, offset))
+        self._update_current()
+        return True
+    
+    def on_event(self, event) -> None:
+        """Event bus handler: follow member changes"""
+        if id(event.streak) not in self.members:
+            return
+        if isinstance(event, ActivityAdded):
+            self.add_day(event.streak, StreakManager.parse_date(event.date))
+        elif isinstance(event, StreakUpdated):
+            self.rebuild()  # Logs rebuilt or rolled back
+        elif isinstance(event, StreakDeleted):
+            self.remove_member(event.streak)
+    
+    def check_status(self) -> str:
+        """'active', 'broken' or 'new', like StreakManager.check_streak_status"""
+        if not self.bits:
+            return 'new'
+        today = StreakManager.parse_date(StreakManager.get_today())
+        return 'active' if (today - StreakManager.parse_date(self.last_activity_date)).days <= 1 else 'broken'
+    
+    def current(self) -> int:
+        """Current streak as of today (0 once the last group day is too old)"""
+        return self.current_streak if self.check_status() == 'active' else 0
+    
+    def days(self) -> List[date]:
+        """Group days, oldest first"""
+        return DayBitset(self.base, self.bits).days()
+    
+    def missing(self, day: date) -> List[Streak]:
+        """Members with no activity on day"""
+        offset = day.toordinal() - self.base
+        return [self.members[key] for key, bits in self._bits.items()
+                if offset < 0 or not bits >> offset & 1]
@@ -1,12 +1,52 @@
 """
 GUI for Daily Streak Tracker
 """
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-from datetime import date
+from datetime import date, datetime, timedelta
 from models import Streak, AppData
 from storage import Storage
-from streak_logic import StreakManager
+from streak_logic import StreakManager, MAX_RESTORE_DAYS
+from reminders import ReminderScheduler
+from search import NoteIndex
+from leaderboard import Leaderboard
+from charts import ChartCache
+from batch import mark_all, restore_all, delete_all
+from events import bus, ActivityAdded
+from sync import merge_app_data
+from rules import EveryNDaysRule, TimesPerWeekRule, WeekdaysRule
+
+
+# Goal choices in the add dialog: label -> rule factory taking N
+RULE_CHOICES = {
+    "Every day": lambda n: None,
+    "Weekdays only": lambda n: WeekdaysRule(),
+    "Every N days": lambda n: EveryNDaysRule(n),
+    "N times per week": lambda n: TimesPerWeekRule(min(n, 7)),
+}
+
+
+# Sort choices: label -> key function (None keeps creation order)
+SORT_CHOICES = {
+    "Created": None,
+    "Name": lambda s: AppData.name_key(s.name),
+    "Current streak": lambda s: (-s.current_streak, AppData.name_key(s.name)),
+    "Longest streak": lambda s: (-s.longest_streak, AppData.name_key(s.name)),
+    "Last activity": lambda s: (s.last_activity_date == "", _reverse_date(s.last_activity_date)),
+}
+
+# Cards rendered at once; narrow the search to see the rest
+MAX_CARDS = 200
+
+# Chart layout: margin around each plot and pixels per drawn point
+CHART_MARGIN = 40
+CHART_PIXELS_PER_POINT = 2
+
+
+def _reverse_date(date_str):
+    """Sort key that orders YYYY-MM-DD strings newest first"""
+    return tuple(-int(part) for part in date_str.split("-")) if date_str else ()
 
 
 class StreakTrackerGUI:
@@ -19,8 +59,25 @@ class StreakTrackerGUI:
         
         # Initialize storage and data
         self.storage = Storage()
+        self._disk_stamp = self.storage.disk_stamp()  # Data file as last loaded or saved here
         self.app_data = self.storage.load()
         self.streak_manager = StreakManager()
+        self._order = None  # Streaks in the current sort order, rebuilt on data changes
+        self._search_job = None
+        self._cards = {}  # Streak id -> card frame currently shown
+        self._selected = set()  # Streak ids checked for batch actions
+        self._select_vars = {}  # Streak id -> checkbox variable of its card
+        self._day = date.today()
+        self._tick_job = None
+        
+        self.note_index = NoteIndex.for_storage(self.storage, self.app_data)
+        bus.subscribe(ActivityAdded, self.note_index.on_event)  # Index notes as they are logged
+        
+        self.charts = ChartCache(self.storage)
+        
+        # Leaderboard follows change events from here on
+        self.leaderboard = Leaderboard().attach()
+        self.leaderboard.track_all(self.app_data)
         
         # Update broken streaks on startup
         for streak in self.app_data.streaks:
@@ -30,6 +87,17 @@ class StreakTrackerGUI:
         self.create_menu()
         self.create_widgets()
         self.refresh_streak_list()
+        
+        # Reminders fire on a background thread; hand them to Tk via a queue
+        self.reminder_queue = queue.Queue()
+        self.reminders = ReminderScheduler(
+            lambda streak, deadline: self.reminder_queue.put((streak, deadline))
+        )
+        self.reminders.update_all(self.app_data.streaks)
+        self.reminders.start()
+        self.poll_reminders()
+        self.poll_data_file()
+        self.schedule_midnight_tick()
     
     def create_menu(self):
         """Create menu bar"""
@@ -42,6 +110,16 @@ class StreakTrackerGUI:
         file_menu.add_command(label="Save", command=self.save_data)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing)
+        
+        # Search menu
+        search_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Search", menu=search_menu)
+        search_menu.add_command(label="Search Notes...", command=self.search_notes)
+        
+        # View menu
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Leaderboard...", command=self.show_leaderboard)
     
     def create_widgets(self):
         """Create main widgets"""
@@ -58,8 +136,8 @@ class StreakTrackerGUI:
         info_frame.pack(pady=5)
         
         today_str = date.today().strftime("%B %d, %Y")
-        today_label = tk.Label(info_frame, text=f"Today: {today_str}", font=("Arial", 10))
-        today_label.pack(side=tk.LEFT, padx=10)
+        self.today_label = tk.Label(info_frame, text=f"Today: {today_str}", font=("Arial", 10))
+        self.today_label.pack(side=tk.LEFT, padx=10)
         
         self.token_label = tk.Label(info_frame, text="", font=("Arial", 10))
         self.token_label.pack(side=tk.LEFT, padx=10)
@@ -91,6 +169,55 @@ class StreakTrackerGUI:
         )
         refresh_btn.pack(side=tk.LEFT, padx=5)
         
+        # Batch actions on the checked cards
+        batch_frame = tk.Frame(self.root)
+        batch_frame.pack(pady=(0, 5))
+        
+        tk.Button(
+            batch_frame,
+            text="✓ Mark All Today",
+            command=self.mark_all_today,
+            font=("Arial", 9)
+        ).pack(side=tk.LEFT, padx=2)
+        tk.Button(
+            batch_frame,
+            text="🎫 Restore Selected",
+            command=self.restore_selected,
+            font=("Arial", 9)
+        ).pack(side=tk.LEFT, padx=2)
+        tk.Button(
+            batch_frame,
+            text="🗑 Delete Selected",
+            command=self.delete_selected,
+            font=("Arial", 9)
+        ).pack(side=tk.LEFT, padx=2)
+        tk.Button(
+            batch_frame,
+            text="Clear Selection",
+            command=self.clear_selection,
+            font=("Arial", 9)
+        ).pack(side=tk.LEFT, padx=2)
+        self.selection_label = tk.Label(batch_frame, text="", font=("Arial", 9), fg="gray")
+        self.selection_label.pack(side=tk.LEFT, padx=5)
+        
+        # Search and sort bar
+        filter_frame = tk.Frame(self.root)
+        filter_frame.pack(pady=(0, 5))
+        
+        tk.Label(filter_frame, text="🔍 Filter:", font=("Arial", 10)).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self.on_search_changed)
+        tk.Entry(filter_frame, textvariable=self.search_var, font=("Arial", 10), width=25).pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(filter_frame, text="Sort by:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(10, 0))
+        self.sort_var = tk.StringVar(value="Created")
+        tk.OptionMenu(
+            filter_frame,
+            self.sort_var,
+            *SORT_CHOICES,
+            command=lambda _: self.refresh_streak_list()
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Streak list frame
         list_frame = tk.Frame(self.root)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -130,21 +257,116 @@ class StreakTrackerGUI:
         canvas_width = event.width
         self.canvas.itemconfig(self.canvas_window, width=canvas_width)
     
+    def poll_reminders(self):
+        """Show any reminders queued by the scheduler thread"""
+        try:
+            while True:
+                streak, deadline = self.reminder_queue.get_nowait()
+                self.show_reminder(streak, deadline)
+        except queue.Empty:
+            pass
+        self.root.after(1000, self.poll_reminders)
+    
+    def poll_data_file(self):
+        """Pick up check-ins other processes (watchers.py, the CLI) saved meanwhile"""
+        self.merge_disk_changes()
+        self.root.after(5000, self.poll_data_file)
+    
+    def merge_disk_changes(self):
+        """Merge the data file into app_data if another process saved it since we did"""
+        stamp = self.storage.disk_stamp()
+        if stamp == self._disk_stamp:
+            return 0
+        added = merge_app_data(self.app_data, self.storage.load(), self.storage.load_history)
+        self._disk_stamp = stamp
+        if added:
+            self.reminders.update_all(self.app_data.streaks)
+            self.refresh_streak_list()
+        return added
+    
+    def show_reminder(self, streak, deadline):
+        """Show a non-blocking reminder window for a streak about to break"""
+        toast = tk.Toplevel(self.root)
+        toast.title("Streak Reminder")
+        toast.attributes("-topmost", True)
+        tk.Label(
+            toast,
+            text=f"⏰ '{streak.name}' breaks at {deadline:%H:%M on %b %d}.\n"
+                 f"Current Streak: {streak.current_streak} days - mark it today!",
+            font=("Arial", 11),
+            padx=20,
+            pady=15
+        ).pack()
+        tk.Button(
+            toast,
+            text="✓ Mark Today",
+            command=lambda: (toast.destroy(), self.mark_activity(streak.id)),
+            bg="#2196F3",
+            fg="white",
+            font=("Arial", 9, "bold")
+        ).pack(pady=(0, 10))
+        self.root.bell()
+        toast.after(60 * 1000, toast.destroy)
+    
+    def schedule_midnight_tick(self):
+        """Run on_day_rollover just after the next local midnight"""
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay_ms = int((midnight - now).total_seconds() * 1000) + 1000  # A second of slack
+        self._tick_job = self.root.after(delay_ms, self.on_day_rollover)
+    
+    def on_day_rollover(self):
+        """Update the date and the cards of streaks that broke at midnight"""
+        today = date.today()
+        if today != self._day:
+            previous, self._day = self._day, today
+            self.today_label.config(text=f"Today: {today.strftime('%B %d, %Y')}")
+            self.update_token_display()  # Tokens reset with the month
+            
+            # Only streaks whose break date passed since the last tick change state
+            for streak in self.app_data.query(break_date__gt=previous.isoformat(),
+                                              break_date__lte=today.isoformat()):
+                self.streak_manager.update_streak_if_broken(streak)
+                self.update_streak_card(streak)
+        self.schedule_midnight_tick()
+    
     def update_token_display(self):
         """Update restore token display"""
-        current_month = self.streak_manager.get_current_month()
-        token = self.streak_manager.get_or_create_restore_token(
-            self.app_data.restore_tokens, 
-            current_month
-        )
+        token = self.streak_manager.get_restore_token(self.app_data.restore_tokens)
         remaining = token.remaining_tokens()
         self.token_label.config(text=f"🎫 Restore Tokens: {remaining}/{token.max_tokens}")
     
-    def refresh_streak_list(self):
+    def on_search_changed(self, *args):
+        """Re-filter shortly after typing pauses"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(150, lambda: self.refresh_streak_list(reorder=False))
+    
+    def get_visible_streaks(self):
+        """Streaks matching the filter, in the selected sort order"""
+        if self._order is None:
+            key = SORT_CHOICES[self.sort_var.get()]
+            streaks = self.app_data.streaks
+            self._order = sorted(streaks, key=key) if key else list(streaks)
+        
+        query = AppData.name_key(self.search_var.get())
+        if not query:
+            return self._order
+        return [s for s in self._order if query in AppData.name_key(s.name)]
+    
+    def refresh_streak_list(self, reorder=True):
         """Refresh the streak list display"""
+        self._search_job = None
+        if reorder:
+            self._order = None  # Data or sort mode changed
+        
         # Clear existing widgets
         for widget in self.streak_frame.winfo_children():
             widget.destroy()
+        self._cards.clear()
+        self._select_vars.clear()
+        self._selected = {sid for sid in self._selected if sid in self.app_data.streaks}
+        self.update_selection_label()
         
         if not self.app_data.streaks:
             no_streak_label = tk.Label(
@@ -156,14 +378,38 @@ class StreakTrackerGUI:
             no_streak_label.pack(pady=50)
             return
         
+        visible = self.get_visible_streaks()
+        if not visible:
+            tk.Label(
+                self.streak_frame,
+                text="No streaks match the filter.",
+                font=("Arial", 12),
+                fg="gray"
+            ).pack(pady=50)
+        
         # Create streak cards
-        for i, streak in enumerate(self.app_data.streaks):
-            self.create_streak_card(streak, i)
+        for streak in visible[:MAX_CARDS]:
+            self.create_streak_card(streak)
+        if len(visible) > MAX_CARDS:
+            tk.Label(
+                self.streak_frame,
+                text=f"... and {len(visible) - MAX_CARDS} more. Type to filter.",
+                font=("Arial", 10),
+                fg="gray"
+            ).pack(pady=10)
         
         self.update_token_display()
     
-    def create_streak_card(self, streak, index):
-        """Create a card widget for a streak"""
+    def update_streak_card(self, streak):
+        """Re-render one streak's card in place, if it is shown"""
+        old_card = self._cards.get(streak.id)
+        if old_card is None:
+            return
+        self.create_streak_card(streak, before=old_card)
+        old_card.destroy()
+    
+    def create_streak_card(self, streak, before=None):
+        """Create a card widget for a streak (placed before another card if given)"""
         # Main card frame
         card = tk.Frame(
             self.streak_frame,
@@ -171,7 +417,8 @@ class StreakTrackerGUI:
             borderwidth=2,
             bg="white"
         )
-        card.pack(fill=tk.X, padx=5, pady=5)
+        card.pack(fill=tk.X, padx=5, pady=5, before=before)
+        self._cards[streak.id] = card
         
         # Determine status and color
         status = self.streak_manager.check_streak_status(streak)
@@ -198,6 +445,16 @@ class StreakTrackerGUI:
         )
         name_label.pack(side=tk.LEFT, padx=10, pady=5)
         
+        select_var = tk.BooleanVar(value=streak.id in self._selected)
+        self._select_vars[streak.id] = select_var
+        tk.Checkbutton(
+            header_frame,
+            variable=select_var,
+            command=lambda sid=streak.id: self.toggle_selected(sid),
+            bg=status_color,
+            activebackground=status_color
+        ).pack(side=tk.LEFT, before=name_label, padx=(5, 0))
+        
         status_label = tk.Label(
             header_frame,
             text=status_text,
@@ -228,6 +485,26 @@ class StreakTrackerGUI:
         )
         longest_label.pack(anchor=tk.W)
         
+        if streak.rule is not None:
+            rule_label = tk.Label(
+                info_frame,
+                text=f"Goal: {streak.rule.describe()}",
+                font=("Arial", 10),
+                fg="gray",
+                bg="white"
+            )
+            rule_label.pack(anchor=tk.W)
+        
+        if streak.rest_days is not None:
+            rest_label = tk.Label(
+                info_frame,
+                text=f"Rest days: {streak.rest_days.describe()}",
+                font=("Arial", 10),
+                fg="gray",
+                bg="white"
+            )
+            rest_label.pack(anchor=tk.W)
+        
         if streak.last_activity_date:
             last_label = tk.Label(
                 info_frame,
@@ -246,7 +523,7 @@ class StreakTrackerGUI:
         mark_btn = tk.Button(
             btn_frame,
             text="✓ Mark Today",
-            command=lambda s=streak: self.mark_activity(s),
+            command=lambda sid=streak.id: self.mark_activity(sid),
             bg="#2196F3",
             fg="white",
             font=("Arial", 9, "bold")
@@ -258,18 +535,27 @@ class StreakTrackerGUI:
             restore_btn = tk.Button(
                 btn_frame,
                 text="🎫 Restore",
-                command=lambda s=streak: self.restore_streak(s),
+                command=lambda sid=streak.id: self.restore_streak(sid),
                 bg="#FF9800",
                 fg="white",
                 font=("Arial", 9, "bold")
             )
             restore_btn.pack(side=tk.LEFT, padx=2)
         
+        # History chart button
+        chart_btn = tk.Button(
+            btn_frame,
+            text="📈 History",
+            command=lambda sid=streak.id: self.show_chart(sid),
+            font=("Arial", 9)
+        )
+        chart_btn.pack(side=tk.LEFT, padx=2)
+        
         # Delete button
         delete_btn = tk.Button(
             btn_frame,
             text="🗑 Delete",
-            command=lambda idx=index: self.delete_streak(idx),
+            command=lambda sid=streak.id: self.delete_streak(sid),
             bg="#f44336",
             fg="white",
             font=("Arial", 9)
@@ -280,7 +566,7 @@ class StreakTrackerGUI:
         """Open dialog to add a new streak"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Add New Streak")
-        dialog.geometry("400x200")
+        dialog.geometry("400x250")
         dialog.transient(self.root)
         dialog.grab_set()
         
@@ -313,6 +599,17 @@ class StreakTrackerGUI:
             command=lambda: set_name("LeetCode Problem")
         ).pack(side=tk.LEFT, padx=2)
         
+        # Goal (streak rule)
+        rule_frame = tk.Frame(dialog)
+        rule_frame.pack(pady=5)
+        
+        tk.Label(rule_frame, text="Goal:", font=("Arial", 9)).pack(side=tk.LEFT)
+        rule_var = tk.StringVar(value="Every day")
+        tk.OptionMenu(rule_frame, rule_var, *RULE_CHOICES).pack(side=tk.LEFT, padx=2)
+        tk.Label(rule_frame, text="N =", font=("Arial", 9)).pack(side=tk.LEFT)
+        n_spinbox = tk.Spinbox(rule_frame, from_=1, to=30, width=4)
+        n_spinbox.pack(side=tk.LEFT, padx=2)
+        
         # Buttons
         def on_add():
             name = name_entry.get().strip()
@@ -321,14 +618,22 @@ class StreakTrackerGUI:
                 return
             
             # Check if streak already exists
-            for streak in self.app_data.streaks:
-                if streak.name.lower() == name.lower():
-                    messagebox.showwarning("Duplicate", f"Streak '{name}' already exists.")
-                    return
+            if self.app_data.has_streak(name):
+                messagebox.showwarning("Duplicate", f"Streak '{name}' already exists.")
+                return
+            
+            try:
+                n = int(n_spinbox.get())
+                rule = RULE_CHOICES[rule_var.get()](n)
+            except ValueError:
+                messagebox.showwarning("Invalid Input", "N must be a positive whole number.")
+                return
             
             # Create new streak
-            new_streak = Streak(name=name)
-            self.app_data.streaks.append(new_streak)
+            new_streak = Streak(name=name, rule=rule)
+            self.app_data.add_streak(new_streak)
+            self.leaderboard.track(new_streak)
+            self.reminders.update(new_streak)
             self.save_data()
             self.refresh_streak_list()
             dialog.destroy()
@@ -358,8 +663,18 @@ class StreakTrackerGUI:
         # Enter key binding
         name_entry.bind("<Return>", lambda e: on_add())
     
-    def mark_activity(self, streak):
+    def get_streak(self, streak_id):
+        """Look up a streak by ID; refreshes the list if it no longer exists"""
+        streak = self.app_data.get_streak(streak_id)
+        if streak is None:
+            self.refresh_streak_list()
+        return streak
+    
+    def mark_activity(self, streak_id):
         """Mark activity for today"""
+        streak = self.get_streak(streak_id)
+        if streak is None:
+            return
         today = self.streak_manager.get_today()
         
         # Check if already marked
@@ -375,6 +690,7 @@ class StreakTrackerGUI:
         success = self.streak_manager.mark_activity(streak, today, "")
         
         if success:
+            self.reminders.update(streak)
             self.save_data()
             self.refresh_streak_list()
             messagebox.showinfo(
@@ -384,8 +700,11 @@ class StreakTrackerGUI:
         else:
             messagebox.showerror("Error", "Failed to mark activity.")
     
-    def restore_streak(self, streak):
+    def restore_streak(self, streak_id):
         """Restore a broken streak using a token"""
+        streak = self.get_streak(streak_id)
+        if streak is None:
+            return
         current_month = self.streak_manager.get_current_month()
         token = self.streak_manager.get_or_create_restore_token(
             self.app_data.restore_tokens,
@@ -404,7 +723,8 @@ class StreakTrackerGUI:
         result = messagebox.askyesno(
             "Restore Streak",
             f"Restore '{streak.name}' streak?\n\n"
-            f"This will use 1 restore token.\n"
+            f"This will use 1 restore token to fill the missed days\n"
+            f"(up to {MAX_RESTORE_DAYS}).\n"
             f"Remaining tokens: {token.remaining_tokens()}/{token.max_tokens}\n\n"
             f"Continue?"
         )
@@ -413,9 +733,10 @@ class StreakTrackerGUI:
             return
         
         # Restore
-        success = self.streak_manager.restore_streak(streak, token)
+        success = self.streak_manager.restore_streak(streak, token, load_history=self.storage.load_history)
         
         if success:
+            self.reminders.update(streak)
             self.save_data()
             self.refresh_streak_list()
             messagebox.showinfo(
@@ -425,11 +746,97 @@ class StreakTrackerGUI:
                 f"Remaining tokens: {token.remaining_tokens()}/{token.max_tokens}"
             )
         else:
-            messagebox.showerror("Error", "Failed to restore streak.")
+            messagebox.showerror(
+                "Error",
+                f"Failed to restore streak.\n"
+                f"A token can fill at most {MAX_RESTORE_DAYS} missed days."
+            )
+    
+    def toggle_selected(self, streak_id):
+        """Add or remove a streak from the batch selection"""
+        if self._select_vars[streak_id].get():
+            self._selected.add(streak_id)
+        else:
+            self._selected.discard(streak_id)
+        self.update_selection_label()
+    
+    def clear_selection(self):
+        """Uncheck every card"""
+        self._selected.clear()
+        for var in self._select_vars.values():
+            var.set(False)
+        self.update_selection_label()
     
-    def delete_streak(self, index):
+    def update_selection_label(self):
+        count = len(self._selected)
+        self.selection_label.config(text=f"{count} selected" if count else "")
+    
+    def mark_all_today(self):
+        """Mark today for the selected streaks (all shown streaks if none are selected)"""
+        streak_ids = self._selected or [s.id for s in self.get_visible_streaks()]
+        self.finish_batch(mark_all(self.app_data, streak_ids))
+    
+    def restore_selected(self):
+        """Restore the selected broken streaks with restore tokens"""
+        if not self._selected:
+            messagebox.showwarning("Nothing Selected", "Check the streaks to restore first.")
+            return
+        token = self.streak_manager.get_restore_token(self.app_data.restore_tokens)
+        if not messagebox.askyesno(
+            "Restore Streaks",
+            f"Restore {len(self._selected)} selected streak(s)?\n\n"
+            f"Each broken streak uses 1 restore token.\n"
+            f"Remaining tokens: {token.remaining_tokens()}/{token.max_tokens}"
+        ):
+            return
+        self.finish_batch(restore_all(self.app_data, self._selected, self.storage.load_history))
+    
+    def delete_selected(self):
+        """Delete the selected streaks"""
+        if not self._selected:
+            messagebox.showwarning("Nothing Selected", "Check the streaks to delete first.")
+            return
+        if not messagebox.askyesno(
+            "Delete Streaks",
+            f"Are you sure you want to delete {len(self._selected)} selected streak(s)?\n\n"
+            f"This action cannot be undone."
+        ):
+            return
+        result = delete_all(self.app_data, self._selected)
+        for streak in result.done:
+            self.reminders.remove(streak)
+            self.charts.invalidate(streak.id)
+            self.note_index.remove_streak(streak.id)
+        self.finish_batch(result, deleted=True)
+    
+    def finish_batch(self, result, deleted=False):
+        """Save once, update only the affected cards and show one summary"""
+        if result.done:
+            if not deleted:
+                for streak in result.done:
+                    self.reminders.update(streak)
+            self.save_data()
+            
+            self._order = None  # Re-sorted on the next full refresh
+            if deleted and not self.app_data.streaks:
+                self.refresh_streak_list()
+            for streak in result.done:
+                if deleted:
+                    card = self._cards.pop(streak.id, None)
+                    if card is not None:
+                        card.destroy()
+                    self._select_vars.pop(streak.id, None)
+                else:
+                    self.update_streak_card(streak)
+            self.update_token_display()
+        self.clear_selection()
+        messagebox.showinfo("Batch Update", result.summary())
+    
+    def delete_streak(self, streak_id):
         """Delete a streak"""
-        streak = self.app_data.streaks[index]
+        streak = self.get_streak(streak_id)
+        if streak is None:
+            return
         
         result = messagebox.askyesno(
             "Delete Streak",
@@ -438,17 +845,138 @@ class StreakTrackerGUI:
         )
         
         if result:
-            self.app_data.streaks.pop(index)
+            self.app_data.remove_streak(streak_id)
+            self.reminders.remove(streak)
+            self.charts.invalidate(streak_id)
+            self.note_index.remove_streak(streak_id)
             self.save_data()
             self.refresh_streak_list()
             messagebox.showinfo("Success", f"Streak '{streak.name}' deleted.")
     
+    def search_notes(self):
+        """Open a dialog to search activity notes"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Search Notes")
+        dialog.geometry("500x400")
+        dialog.transient(self.root)
+        
+        tk.Label(
+            dialog,
+            text='Words to find (quote phrases, e.g. "dynamic programming"):',
+            font=("Arial", 10)
+        ).pack(pady=(10, 5))
+        
+        query_entry = tk.Entry(dialog, font=("Arial", 11), width=40)
+        query_entry.pack(pady=5)
+        query_entry.focus()
+        
+        count_label = tk.Label(dialog, text="", font=("Arial", 9), fg="gray")
+        count_label.pack()
+        
+        results = tk.Listbox(dialog, font=("Arial", 10))
+        results.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def run_search(event=None):
+            hits = self.note_index.search(query_entry.get())
+            results.delete(0, tk.END)
+            for hit in hits[:500]:
+                streak = self.app_data.get_streak(hit[0])
+                name = streak.name if streak is not None else "(deleted)"
+                results.insert(tk.END, f"{hit[1]}  {name}: {self.note_index.get_notes(hit)}")
+            count_label.config(text=f"{len(hits)} matching notes" if query_entry.get().strip() else "")
+        
+        query_entry.bind("<KeyRelease>", run_search)
+    
+    def show_leaderboard(self):
+        """Open a window with the top streaks on each board"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Leaderboard")
+        dialog.geometry("420x400")
+        dialog.transient(self.root)
+        
+        self.leaderboard.sweep()  # Catch up with streaks that broke since the last change
+        titles = {"current": "Current streak", "longest": "Longest streak",
+                  "last_30_days": "Active days (last 30)"}
+        notebook = ttk.Notebook(dialog)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        for board, title in titles.items():
+            results = tk.Listbox(notebook, font=("Arial", 10))
+            for position, (streak, score) in enumerate(self.leaderboard.top(board, 10), 1):
+                results.insert(tk.END, f"{position:2}. {streak.name}  ({score})")
+            notebook.add(results, text=title)
+    
+    def show_chart(self, streak_id):
+        """Open a window charting a streak's length and 30-day completion over time"""
+        streak = self.get_streak(streak_id)
+        if streak is None:
+            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"History: {streak.name}")
+        dialog.geometry("700x450")
+        dialog.transient(self.root)
+        
+        canvas = tk.Canvas(dialog, bg="white", highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True)
+        canvas.bind("<Configure>", lambda e: self.draw_chart(canvas, streak))
+    
+    def draw_chart(self, canvas, streak):
+        """Draw both history plots at the canvas' current size"""
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        series = self.charts.series(streak)
+        if not len(series):
+            canvas.create_text(width / 2, height / 2, text="No activity yet", fill="gray",
+                               font=("Arial", 12))
+            return
+        
+        # One point per few pixels; widths are rounded so resizing reuses cached reductions
+        plot_width = max(width - 2 * CHART_MARGIN, 50)
+        points = max(plot_width // CHART_PIXELS_PER_POINT // 25 * 25, 25)
+        lengths, completion = self.charts.reduced(streak, points)
+        half = height / 2
+        self.draw_plot(canvas, lengths, len(series), max(max(series.lengths), 1),
+                       0, half, "Streak length (days)", "#2196F3")
+        self.draw_plot(canvas, completion, len(series), 100,
+                       half, half, "Active days in the last 30 (%)", "#4CAF50")
+        
+        last_day = series.start + timedelta(days=len(series) - 1)
+        for x, text, anchor in ((CHART_MARGIN, series.start.isoformat(), tk.W),
+                                (width - CHART_MARGIN, last_day.isoformat(), tk.E)):
+            canvas.create_text(x, height - 12, text=text, anchor=anchor, fill="gray",
+                               font=("Arial", 8))
+    
+    def draw_plot(self, canvas, points, days, top_value, y, height, title, color):
+        """Draw one line plot of (day, value) points into a horizontal band of the canvas"""
+        left = CHART_MARGIN
+        right = canvas.winfo_width() - CHART_MARGIN
+        top, bottom = y + 25, y + height - 25
+        canvas.create_text(left, y + 12, text=title, anchor=tk.W, font=("Arial", 10, "bold"))
+        canvas.create_text(left - 5, top, text=f"{top_value:g}", anchor=tk.E, fill="gray",
+                           font=("Arial", 8))
+        canvas.create_line(left, bottom, right, bottom, fill="#cccccc")
+        
+        x_scale = (right - left) / max(days - 1, 1)
+        y_scale = (bottom - top) / top_value
+        coords = []
+        for day, value in points:
+            coords.extend((left + day * x_scale, bottom - value * y_scale))
+        if len(coords) == 2:
+            coords.extend(coords)  # A single day still draws a dot
+        canvas.create_line(*coords, fill=color, width=2)
+    
     def save_data(self):
-        """Save application data"""
-        self.storage.save(self.app_data)
+        """Save application data, keeping changes other processes saved meanwhile"""
+        self.merge_disk_changes()
+        if self.storage.save(self.app_data):
+            self._disk_stamp = self.storage.disk_stamp()
+        self.note_index.save()
     
     def on_closing(self):
         """Handle window closing"""
+        self.reminders.stop()
+        self.leaderboard.detach()
+        if self._tick_job is not None:
+            self.root.after_cancel(self._tick_job)
         self.save_data()
         self.root.destroy()
 
@@ -0,0 +1,233 @@
+"""
+Leaderboards across streaks and data files
+
+A board ranks streaks by one small integer score: the current streak, the
+longest streak, or active days in the last 30. Ranking keeps a Fenwick tree of
+how many streaks hold each score plus the streaks per score, so updates, rank
+queries and each step of a top-k walk cost O(log max score) instead of a sort.
+
+Leaderboard subscribes to the event bus and re-scores a streak whenever it is
+marked, restored, recalculated or found broken, and drops deleted streaks. Call sweep() once a day so
+streaks that broke silently and the sliding 30-day window catch up.
+"""
+import heapq
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from models import AppData, Streak
+from streak_logic import StreakManager
+from events import bus, StreakEvent, StreakDeleted
+
+
+BOARDS = ("current", "longest", "last_30_days")
+
+WINDOW_DAYS = 30
+
+
+class Ranking:
+    """Order statistics over non-negative integer scores"""
+    
+    def __init__(self):
+        self._size = 64  # Scores the tree can hold; always a power of two
+        self._tree = [0] * (self._size + 1)
+        self._scores: Dict[str, int] = {}
+        self._buckets: Dict[int, Set[str]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._scores)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._scores
+    
+    def _add(self, score: int, delta: int) -> None:
+        i = score + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+    
+    def _count_below(self, score: int) -> int:
+        """Number of keys scoring less than score"""
+        i = min(score, self._size)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+    
+    def _kth_lowest(self, k: int) -> int:
+        """Score of the k-th lowest key (1-based)"""
+        pos, step = 0, self._size
+        while step:
+            if pos + step <= self._size and self._tree[pos + step] < k:
+                pos += step
+                k -= self._tree[pos]
+            step >>= 1
+        return pos
+    
+    def _grow(self, score: int) -> None:
+        while self._size <= score:
+            self._size *= 2
+        self._tree = [0] * (self._size + 1)
+        for bucket_score, keys in self._buckets.items():
+            self._add(bucket_score, len(keys))
+    
+    def set(self, key: str, score: int) -> None:
+        """Set a key's score"""
+        if score < 0:
+            raise ValueError("scores must not be negative")
+        old = self._scores.get(key)
+        if old == score:
+            return
+        if old is not None:
+            self.remove(key)
+        if score >= self._size:
+            self._grow(score)
+        self._scores[key] = score
+        self._buckets.setdefault(score, set()).add(key)
+        self._add(score, 1)
+    
+    def remove(self, key: str) -> None:
+        """Forget a key"""
+        score = self._scores.pop(key, None)
+        if score is None:
+            return
+        bucket = self._buckets[score]
+        bucket.discard(key)
+        if not bucket:
+            del self._buckets[score]
+        self._add(score, -1)
+    
+    def score(self, key: str) -> Optional[int]:
+        return self._scores.get(key)
+    
+    def rank(self, key: str) -> Optional[int]:
+        """1-based rank, highest score first; equal scores share a rank"""
+        score = self._scores.get(key)
+        if score is None:
+            return None
+        return len(self._scores) - self._count_below(score + 1) + 1
+    
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """The k highest (key, score) pairs; ties are ordered by key"""
+        result: List[Tuple[str, int]] = []
+        seen, total = 0, len(self._scores)
+        while len(result) < k and seen < total:
+            score = self._kth_lowest(total - seen)
+            bucket = self._buckets[score]
+            result.extend((key, score) for key in heapq.nsmallest(k - len(result), bucket))
+            seen += len(bucket)
+        return result
+
+
+class Leaderboard:
+    """Rankings of tracked streaks, overall and per tenant (data file or user)"""
+    
+    def __init__(self):
+        self._rankings: Dict[Tuple[str, Optional[str]], Ranking] = {}
+        # Keyed by (tenant, streak id): copies of one data file (tenants) can share streak IDs
+        self._streaks: Dict[Tuple[str, str], Streak] = {}
+        self._tenants: Dict[int, str] = {}  # id() of each tracked streak object -> its tenant
+        self._today: Optional[str] = None
+    
+    def __len__(self) -> int:
+        return len(self._streaks)
+    
+    def attach(self) -> 'Leaderboard':
+        """Start following streak change events"""
+        bus.subscribe(StreakEvent, self.on_event)
+        return self
+    
+    def detach(self) -> None:
+        bus.unsubscribe(StreakEvent, self.on_event)
+    
+    def on_event(self, event: StreakEvent) -> None:
+        if isinstance(event, StreakDeleted):
+            self.untrack(event.streak)
+        else:
+            self.on_streak_changed(event.streak)
+    
+    def today(self) -> str:
+        """Day scores are computed for (the last sweep, or today)"""
+        return self._today or StreakManager.get_today()
+    
+    def _ranking(self, board: str, tenant: Optional[str]) -> Ranking:
+        ranking = self._rankings.get((board, tenant))
+        if ranking is None:
+            if board not in BOARDS:
+                raise ValueError(f"Unknown leaderboard: {board!r} (use one of {', '.join(BOARDS)})")
+            ranking = self._rankings[(board, tenant)] = Ranking()
+        return ranking
+    
+    def scores(self, streak: Streak) -> Dict[str, int]:
+        """Score of a streak on every board"""
+        today = StreakManager.parse_date(self.today())
+        break_date = StreakManager.get_break_date(streak)
+        current = streak.current_streak if break_date is None or today < break_date else 0
+        
+        # Logs are appended in date order, so only the tail is in the window
+        start = (today - timedelta(days=WINDOW_DAYS - 1)).isoformat()
+        end = today.isoformat()
+        recent = 0
+        for log in reversed(streak.activity_logs):
+            if log.date < start:
+                break
+            if log.date <= end:
+                recent += 1
+        return {"current": current, "longest": streak.longest_streak, "last_30_days": recent}
+    
+    def _key(self, streak: Streak) -> Optional[Tuple[str, str]]:
+        tenant = self._tenants.get(id(streak))
+        return (tenant, streak.id) if tenant is not None else None
+    
+    def track(self, streak: Streak, tenant: str = "") -> None:
+        """Add or re-score a streak"""
+        old_tenant = self._tenants.get(id(streak))
+        if old_tenant is not None and old_tenant != tenant:
+            self.untrack(streak)  # Moved to another tenant
+        key = (tenant, streak.id)
+        previous = self._streaks.get(key)
+        if previous is not None and previous is not streak:
+            self._tenants.pop(id(previous), None)  # Replaced by a reloaded copy
+        self._streaks[key] = streak
+        self._tenants[id(streak)] = tenant
+        for board, score in self.scores(streak).items():
+            self._ranking(board, None).set(key, score)
+            self._ranking(board, tenant).set(key, score)
+    
+    def track_all(self, app_data: AppData, tenant: str = "") -> None:
+        for streak in app_data.streaks:
+            self.track(streak, tenant)
+    
+    def untrack(self, streak: Streak) -> None:
+        """Remove a streak from every board"""
+        key = self._key(streak)
+        if key is None:
+            return
+        del self._tenants[id(streak)]
+        del self._streaks[key]
+        for board in BOARDS:
+            self._ranking(board, None).remove(key)
+            self._ranking(board, key[0]).remove(key)
+    
+    def on_streak_changed(self, streak: Streak) -> None:
+        """Re-score a changed streak; streaks that aren't tracked are ignored"""
+        tenant = self._tenants.get(id(streak))
+        if tenant is not None:
+            self.track(streak, tenant)
+    
+    def sweep(self, today: Optional[str] = None) -> None:
+        """Re-score every streak for a new day (None means the real date)"""
+        self._today = today
+        for (tenant, _), streak in list(self._streaks.items()):
+            self.track(streak, tenant)
+    
+    def top(self, board: str, k: int = 10, tenant: Optional[str] = None) -> List[Tuple[Streak, int]]:
+        """Top k (streak, score) pairs on a board, overall or for one tenant"""
+        return [(self._streaks[key], score) for key, score in self._ranking(board, tenant).top(k)]
+    
+    def rank(self, board: str, streak: Streak, tenant: Optional[str] = None) -> Optional[int]:
+        """1-based rank of a streak on a board, or None if it isn't tracked"""
+        key = self._key(streak)
+        return self._ranking(board, tenant).rank(key) if key is not None else None
+    
+    def tenant_of(self, streak: Streak) -> Optional[str]:
+        return self._tenants.get(id(streak))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Loader and migrator for the legacy streaks.json format
+
+The first version of the tracker (streak_app.py) stored a dict keyed by
+streak name with "count", "last_date", "restores" and "restore_month".
+Everything here converts that layout into the AppData schema.
+"""
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+from models import AppData, ActivityLog, Streak
+from streak_logic import StreakManager
+
+
+FORMAT_APPDATA = "appdata"
+FORMAT_LEGACY = "legacy"
+
+LEGACY_NOTES = "Imported from streaks.json"
+LEGACY_KEYS = {"count", "last_date", "restores", "restore_month"}
+
+
+def detect_format(data) -> str:
+    """Return FORMAT_APPDATA or FORMAT_LEGACY for parsed JSON data"""
+    if not isinstance(data, dict):
+        raise ValueError("Unrecognized data format: expected a JSON object")
+    if isinstance(data.get("streaks"), list) or not data:
+        return FORMAT_APPDATA
+    if all(isinstance(v, dict) and LEGACY_KEYS & v.keys() for v in data.values()):
+        return FORMAT_LEGACY
+    raise ValueError("Unrecognized data format")
+
+
+def legacy_streak(key: str, entry: Dict) -> Streak:
+    """
+    Convert one legacy entry into a Streak.
+    The legacy count is expanded into that many consecutive logged days
+    ending on last_date, so the converted streak has a consistent history.
+    """
+    count = entry.get("count") or 0
+    last_date = entry.get("last_date")
+    streak = Streak(name=entry.get("name") or key)
+    if last_date and count > 0:
+        last_day = StreakManager.parse_date(last_date)
+        streak.activity_logs = [
+            ActivityLog(date=(last_day - timedelta(days=offset)).isoformat(), notes=LEGACY_NOTES)
+            for offset in range(count - 1, -1, -1)
+        ]
+        streak.created_date = streak.activity_logs[0].date
+        streak.current_streak = streak.longest_streak = count
+        streak.last_activity_date = last_date
+    return streak
+
+
+def merge_into(app_data: AppData, other: AppData) -> AppData:
+    """Merge streaks and token usage from other into app_data"""
+    for streak in other.streaks:
+        existing = app_data.find_streak(streak.name)
+        if existing is None:
+            app_data.add_streak(streak)
+            continue
+        existing.activity_logs.extend(streak.activity_logs)
+        existing.created_date = min(existing.created_date, streak.created_date)
+        StreakManager.recalculate(existing)
+    
+    for month, token in other.restore_tokens.items():
+        mine = StreakManager.get_or_create_restore_token(app_data.restore_tokens, month)
+        mine.tokens_used = max(mine.tokens_used, token.tokens_used)
+    return app_data
+
+
+def convert_legacy(data: Dict) -> AppData:
+    """Convert a parsed legacy streaks.json dict into AppData"""
+    app_data = merge_into(AppData(), AppData(
+        streaks=[legacy_streak(key, entry) for key, entry in data.items()]
+    ))
+    for entry in data.values():
+        # restore_month is a bare month number; take the year from last_date
+        month = entry.get("restore_month")
+        if month and entry.get("restores"):
+            year = (entry.get("last_date") or date.today().isoformat())[:4]
+            token = StreakManager.get_or_create_restore_token(
+                app_data.restore_tokens, f"{year}-{int(month):02d}"
+            )
+            token.tokens_used = min(token.max_tokens, max(token.tokens_used, entry["restores"]))
+    return app_data
+
+
+def from_any_dict(data) -> AppData:
+    """Build AppData from parsed JSON in either supported format"""
+    if detect_format(data) == FORMAT_LEGACY:
+        return convert_legacy(data)
+    return AppData.from_dict(data)
+
+
+def load_any(path: str) -> AppData:
+    """Load a data file in either format"""
+    with open(path, 'r') as f:
+        return from_any_dict(json.load(f))
+
+
+def migrate_files(paths: Iterable[str], app_data: Optional[AppData] = None) -> AppData:
+    """
+    Merge any number of data files into one AppData in a single pass.
+    Files are parsed one at a time, so only one file's JSON is alive at once.
+    """
+    if app_data is None:
+        app_data = AppData()
+    for path in paths:
+        merge_into(app_data, load_any(path))
+    return app_data
+
+
+def main(argv=None) -> int:
+    """Command line entry point: migrate files into a Storage data file"""
+    from storage import Storage
+    
+    parser = argparse.ArgumentParser(description="Migrate legacy streaks.json files")
+    parser.add_argument("files", nargs="+", help="legacy or current data files to merge")
+    parser.add_argument("--data-file", default="streak_data.json", help="target data file name")
+    parser.add_argument("--data-dir", default=None, help="target data directory")
+    args = parser.parse_args(argv)
+    
+    storage = Storage(data_file=args.data_file, data_dir=args.data_dir)
+    app_data = migrate_files(args.files, storage.load(include_archive=True))
+    if not storage.save(app_data):
+        return 1
+    print(f"Migrated {len(args.files)} file(s) into {storage.get_data_path()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
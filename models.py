@@ -1,17 +1,52 @@
 """
 Data models for Daily Streak Tracker
+
+ActivityLog, Streak and RestoreToken use __slots__ instead of dataclasses:
+large histories hold one ActivityLog per check-in, and dropping the
+per-instance __dict__ (plus interning dates and notes) keeps them small.
 """
+import sys
+import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, date
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Union
+from rules import StreakRule
+from rest import RestCalendar
+from events import bus, StreakCreated, StreakDeleted
 import json
 
 
-@dataclass
+# Shared value for the (very common) empty note
+EMPTY_NOTES = ""
+
+# Notes up to this length are interned, so repeated notes such as
+# "Restored using token" share a single string object
+INTERN_NOTES_MAX = 64
+
+
+def _intern_notes(notes: str) -> str:
+    if not notes:
+        return EMPTY_NOTES
+    if len(notes) <= INTERN_NOTES_MAX:
+        return sys.intern(notes)
+    return notes
+
+
 class ActivityLog:
     """Represents a single activity log entry"""
-    date: str  # YYYY-MM-DD format
-    notes: str = ""
+    __slots__ = ("date", "notes")
+    
+    def __init__(self, date: str, notes: str = EMPTY_NOTES):
+        self.date = sys.intern(date)  # YYYY-MM-DD format
+        self.notes = _intern_notes(notes)
+    
+    def __repr__(self) -> str:
+        return f"ActivityLog(date={self.date!r}, notes={self.notes!r})"
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.date == other.date and self.notes == other.notes
     
     def to_dict(self) -> Dict:
         return {
@@ -23,22 +58,51 @@ class ActivityLog:
     def from_dict(cls, data: Dict) -> 'ActivityLog':
         return cls(
             date=data["date"],
-            notes=data.get("notes", "")
+            notes=data.get("notes", EMPTY_NOTES)
         )
 
 
-@dataclass
+def new_streak_id() -> str:
+    """Generate a new stable streak ID"""
+    return uuid.uuid4().hex
+
+
 class Streak:
     """Represents a streak for a specific activity"""
-    name: str
-    current_streak: int = 0
-    longest_streak: int = 0
-    last_activity_date: str = ""  # YYYY-MM-DD format
-    activity_logs: List[ActivityLog] = field(default_factory=list)
-    created_date: str = field(default_factory=lambda: date.today().isoformat())
+    __slots__ = ("id", "name", "current_streak", "longest_streak", "last_activity_date",
+                 "activity_logs", "created_date", "rule", "rule_state", "rest_days")
+    
+    def __init__(self, name: str, current_streak: int = 0, longest_streak: int = 0,
+                 last_activity_date: str = "", activity_logs: Optional[List[ActivityLog]] = None,
+                 created_date: Optional[str] = None, rule: Optional[StreakRule] = None,
+                 rule_state: int = 0, id: Optional[str] = None,
+                 rest_days: Optional[RestCalendar] = None):
+        self.id = id or new_streak_id()  # Stable across renames, reorders and devices
+        self.name = name
+        self.current_streak = current_streak
+        self.longest_streak = longest_streak
+        self.last_activity_date = last_activity_date  # YYYY-MM-DD format
+        self.activity_logs = activity_logs if activity_logs is not None else []
+        self.created_date = created_date or date.today().isoformat()
+        self.rule = rule  # None means the classic one-activity-per-day streak
+        self.rule_state = rule_state  # Small per-rule counter, see rules.py
+        self.rest_days = rest_days  # Planned rest days, see rest.py
+    
+    def __repr__(self) -> str:
+        return (f"Streak(id={self.id!r}, name={self.name!r}, current_streak={self.current_streak}, "
+                f"longest_streak={self.longest_streak}, "
+                f"last_activity_date={self.last_activity_date!r}, "
+                f"activity_logs=<{len(self.activity_logs)} logs>, "
+                f"created_date={self.created_date!r}, rule={self.rule!r})")
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
     
     def to_dict(self) -> Dict:
-        return {
+        data = {
+            "id": self.id,
             "name": self.name,
             "current_streak": self.current_streak,
             "longest_streak": self.longest_streak,
@@ -46,6 +110,12 @@ class Streak:
             "activity_logs": [log.to_dict() for log in self.activity_logs],
             "created_date": self.created_date
         }
+        if self.rule is not None:
+            data["rule"] = self.rule.to_dict()
+            data["rule_state"] = self.rule_state
+        if self.rest_days is not None:
+            data["rest_days"] = self.rest_days.to_dict()
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'Streak':
@@ -55,16 +125,63 @@ class Streak:
             longest_streak=data.get("longest_streak", 0),
             last_activity_date=data.get("last_activity_date", ""),
             activity_logs=[ActivityLog.from_dict(log) for log in data.get("activity_logs", [])],
-            created_date=data.get("created_date", date.today().isoformat())
+            created_date=data.get("created_date", date.today().isoformat()),
+            rule=StreakRule.from_dict(data["rule"]) if data.get("rule") else None,
+            rule_state=data.get("rule_state", 0),
+            id=data.get("id"),
+            rest_days=RestCalendar.from_dict(data["rest_days"]) if "rest_days" in data else None
         )
 
 
-@dataclass
+class Redemption:
+    """One restore token spent on a streak, with the days it filled"""
+    __slots__ = ("streak_id", "days")
+    
+    def __init__(self, streak_id: str, days: List[str]):
+        self.streak_id = streak_id
+        self.days = days  # YYYY-MM-DD, oldest first
+    
+    def __repr__(self) -> str:
+        return f"Redemption(streak_id={self.streak_id!r}, days={self.days!r})"
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.streak_id, self.days) == (other.streak_id, other.days)
+    
+    def to_list(self) -> List[str]:
+        """Compact form: [streak_id, day, day, ...]"""
+        return [self.streak_id] + self.days
+    
+    @classmethod
+    def from_list(cls, data: List[str]) -> 'Redemption':
+        return cls(streak_id=data[0], days=list(data[1:]))
+
+
 class RestoreToken:
-    """Manages restore tokens for streak recovery"""
-    month: str  # YYYY-MM format
-    tokens_used: int = 0
-    max_tokens: int = 2  # Maximum tokens per month
+    """
+    Manages restore tokens for streak recovery.
+    One per month: tokens_used is the month's counter, redemptions the
+    tokens spent in the app (synced-in usage only raises the counter).
+    """
+    __slots__ = ("month", "tokens_used", "max_tokens", "redemptions")
+    
+    def __init__(self, month: str, tokens_used: int = 0, max_tokens: int = 2,
+                 redemptions: Optional[List[Redemption]] = None):
+        self.month = month  # YYYY-MM format
+        self.tokens_used = tokens_used
+        self.max_tokens = max_tokens  # Maximum tokens per month
+        self.redemptions = redemptions if redemptions is not None else []
+    
+    def __repr__(self) -> str:
+        return (f"RestoreToken(month={self.month!r}, tokens_used={self.tokens_used}, "
+                f"max_tokens={self.max_tokens}, redemptions={self.redemptions!r})")
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.month, self.tokens_used, self.max_tokens, self.redemptions) == \
+            (other.month, other.tokens_used, other.max_tokens, other.redemptions)
     
     def can_restore(self) -> bool:
         return self.tokens_used < self.max_tokens
@@ -78,32 +195,173 @@ class RestoreToken:
     def remaining_tokens(self) -> int:
         return max(0, self.max_tokens - self.tokens_used)
     
+    def is_unused(self) -> bool:
+        """Nothing spent and the default allowance: not worth saving"""
+        return not self.tokens_used and not self.redemptions and self.max_tokens == 2
+    
     def to_dict(self) -> Dict:
-        return {
+        data = {
             "month": self.month,
             "tokens_used": self.tokens_used,
             "max_tokens": self.max_tokens
         }
+        if self.redemptions:
+            data["redemptions"] = [r.to_list() for r in self.redemptions]
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'RestoreToken':
         return cls(
             month=data["month"],
             tokens_used=data.get("tokens_used", 0),
-            max_tokens=data.get("max_tokens", 2)
+            max_tokens=data.get("max_tokens", 2),
+            redemptions=[Redemption.from_list(r) for r in data.get("redemptions", [])]
         )
 
 
+class StreakRegistry:
+    """
+    Streaks keyed by their stable ID, kept in display order.
+    Lookup, update and removal by ID are O(1); iteration yields streaks.
+    """
+    
+    def __init__(self, streaks=()):
+        self._by_id: Dict[str, Streak] = {}
+        self._names: Dict[str, Streak] = {}  # Case-folded name -> streak
+        self.version = 0  # Bumped on every add, remove and rename
+        for streak in streaks:
+            self.add(streak)
+    
+    @staticmethod
+    def name_key(name: str) -> str:
+        """Key used to compare streak names (case-insensitive)"""
+        return name.strip().casefold()
+    
+    def __iter__(self) -> Iterator[Streak]:
+        return iter(self._by_id.values())
+    
+    def __len__(self) -> int:
+        return len(self._by_id)
+    
+    def __contains__(self, item) -> bool:
+        if isinstance(item, Streak):
+            return self._by_id.get(item.id) is item
+        return item in self._by_id
+    
+    def __getitem__(self, key: Union[str, int]) -> Streak:
+        if isinstance(key, int):
+            # Positional access, kept for list-style callers; O(n)
+            return list(self._by_id.values())[key]
+        return self._by_id[key]
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StreakRegistry):
+            return NotImplemented
+        return list(self) == list(other)
+    
+    def __repr__(self) -> str:
+        return f"StreakRegistry({list(self)!r})"
+    
+    def get(self, streak_id: str) -> Optional[Streak]:
+        """Get a streak by ID"""
+        return self._by_id.get(streak_id)
+    
+    def find(self, name: str) -> Optional[Streak]:
+        """Get a streak by case-insensitive name"""
+        return self._names.get(self.name_key(name))
+    
+    def add(self, streak: Streak) -> None:
+        """Add a streak at the end of the display order"""
+        if streak.id in self._by_id:
+            raise ValueError(f"Duplicate streak id: {streak.id}")
+        self._by_id[streak.id] = streak
+        self._names.setdefault(self.name_key(streak.name), streak)
+        self.version += 1
+    
+    append = add  # list-style alias
+    
+    def remove(self, streak_id: str) -> Streak:
+        """Remove and return a streak by ID"""
+        streak = self._by_id.pop(streak_id)
+        key = self.name_key(streak.name)
+        if self._names.get(key) is streak:
+            del self._names[key]
+            # Another streak may share the name (e.g. hand-edited files)
+            for other in self._by_id.values():
+                if self.name_key(other.name) == key:
+                    self._names[key] = other
+                    break
+        self.version += 1
+        return streak
+    
+    def rename(self, streak_id: str, name: str) -> None:
+        """Rename a streak, keeping the name index current"""
+        streak = self._by_id[streak_id]
+        old_key = self.name_key(streak.name)
+        if self._names.get(old_key) is streak:
+            del self._names[old_key]
+        streak.name = name
+        self._names.setdefault(self.name_key(name), streak)
+        self.version += 1
+
+
 @dataclass
 class AppData:
     """Container for all application data"""
-    streaks: List[Streak] = field(default_factory=list)
+    streaks: StreakRegistry = field(default_factory=StreakRegistry)
     restore_tokens: Dict[str, RestoreToken] = field(default_factory=dict)
+    _index: Optional[object] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        if not isinstance(self.streaks, StreakRegistry):
+            self.streaks = StreakRegistry(self.streaks)
+    
+    name_key = staticmethod(StreakRegistry.name_key)
+    
+    def get_streak(self, streak_id: str) -> Optional[Streak]:
+        """Get a streak by its stable ID"""
+        return self.streaks.get(streak_id)
+    
+    def find_streak(self, name: str) -> Optional[Streak]:
+        """Find a streak by case-insensitive name"""
+        return self.streaks.find(name)
+    
+    def has_streak(self, name: str) -> bool:
+        """Check if a streak with this name (ignoring case) exists"""
+        return self.streaks.find(name) is not None
+    
+    def add_streak(self, streak: Streak) -> bool:
+        """Add a streak; returns False if the name is already taken"""
+        if self.has_streak(streak.name):
+            return False
+        self.streaks.add(streak)
+        bus.publish(StreakCreated(streak))
+        return True
+    
+    def remove_streak(self, streak: Union[Streak, str]) -> Optional[Streak]:
+        """Remove a streak (or streak ID); returns the removed streak"""
+        streak_id = streak.id if isinstance(streak, Streak) else streak
+        if streak_id not in self.streaks:
+            return None
+        removed = self.streaks.remove(streak_id)
+        bus.publish(StreakDeleted(removed))
+        return removed
+    
+    def query(self, **filters) -> List[Streak]:
+        """
+        Find streaks through secondary indexes, e.g.
+        query(current_streak__gte=7, last_active_within=3, name_contains="leet").
+        See query.StreakIndex for the supported filters.
+        """
+        if self._index is None or self._index.registry is not self.streaks:
+            from query import StreakIndex  # query imports streak_logic, which imports this module
+            self._index = StreakIndex(self.streaks)
+        return self._index.query(**filters)
     
     def to_dict(self) -> Dict:
         return {
             "streaks": [streak.to_dict() for streak in self.streaks],
-            "restore_tokens": {k: v.to_dict() for k, v in self.restore_tokens.items()}
+            "restore_tokens": {k: v.to_dict() for k, v in self.restore_tokens.items() if not v.is_unused()}
         }
     
     @classmethod
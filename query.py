@@ -0,0 +1,219 @@
+"""
+Indexed queries over streaks
+
+StreakIndex keeps sorted (value, streak id) lists for the current streak,
+longest streak, last activity day and break day, plus a trigram index over
+names. Change events from StreakManager (every mark, restore, recount and
+break) move each index entry in O(log n) instead of rescanning.
+
+A query starts from the most selective filter's index range and checks the
+remaining filters on just those candidates. Filters:
+    
+    current_streak, longest_streak        =, __gt, __gte, __lt, __lte (ints)
+    last_activity_date                    =, __gt, __gte, __lt, __lte (YYYY-MM-DD)
+    break_date                            =, __gt, __gte, __lt, __lte (YYYY-MM-DD; never new streaks)
+    last_active_within=N                  last activity in the last N days
+    status="active" | "broken" | "new"    as StreakManager.check_streak_status
+    name_contains="leet"                  case-insensitive substring
+"""
+import weakref
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from models import Streak, StreakRegistry
+from streak_logic import StreakManager
+from events import bus, StreakEvent, StreakCreated, StreakDeleted
+
+
+# Sorts after every streak id, so (value, _MAX_ID) is past every entry with that value
+_MAX_ID = "\U0010ffff"
+
+_name_key = StreakRegistry.name_key
+
+# (field, lowest value, highest value); None leaves that side open
+Range = Tuple[str, Optional[int], Optional[int]]
+
+# Comparison suffix -> inclusive (low, high) bounds; values are integers
+OPERATORS: Dict[str, Callable[[int], Tuple[Optional[int], Optional[int]]]] = {
+    "eq": lambda v: (v, v),
+    "gt": lambda v: (v + 1, None),
+    "gte": lambda v: (v, None),
+    "lt": lambda v: (None, v - 1),
+    "lte": lambda v: (None, v),
+}
+
+# Status -> break day bounds for a given today (break day 0 means no activity yet)
+STATUS_RANGES: Dict[str, Callable[[int], Tuple[Optional[int], Optional[int]]]] = {
+    "new": lambda today: (0, 0),
+    "active": lambda today: (today + 1, None),
+    "broken": lambda today: (1, today),
+}
+
+
+def _ordinal(date_str: str) -> int:
+    return date.fromisoformat(date_str).toordinal() if date_str else 0
+
+
+def _break_ordinal(streak: Streak) -> int:
+    """Ordinal of StreakManager.get_break_date(), or 0 for a new streak"""
+    if not streak.last_activity_date:
+        return 0
+    last = date.fromisoformat(streak.last_activity_date)
+    return StreakManager.get_rule(streak).break_date(last, streak.rule_state).toordinal()
+
+
+# Indexed fields: name -> value function (0 stands for "no activity yet")
+FIELDS: Dict[str, Callable[[Streak], int]] = {
+    "current_streak": lambda s: s.current_streak,
+    "longest_streak": lambda s: s.longest_streak,
+    "last_activity_date": lambda s: _ordinal(s.last_activity_date),
+    "break_date": _break_ordinal,
+}
+FIELD_POSITIONS = {field: i for i, field in enumerate(FIELDS)}
+
+
+class SortedIndex:
+    """Sorted (value, id) pairs with range lookups"""
+    
+    def __init__(self):
+        self._keys: List[Tuple[int, str]] = []
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def add(self, value: int, streak_id: str) -> None:
+        insort(self._keys, (value, streak_id))
+    
+    def load(self, keys: List[Tuple[int, str]]) -> None:
+        """Replace the contents in one sort (bulk build)"""
+        self._keys = sorted(keys)
+    
+    def remove(self, value: int, streak_id: str) -> None:
+        i = bisect_left(self._keys, (value, streak_id))
+        if i < len(self._keys) and self._keys[i] == (value, streak_id):
+            del self._keys[i]
+    
+    def bounds(self, low: Optional[int], high: Optional[int]) -> Tuple[int, int]:
+        """Positions [start, stop) of the entries with low <= value <= high"""
+        start = 0 if low is None else bisect_left(self._keys, (low, ""))
+        stop = len(self._keys) if high is None else bisect_right(self._keys, (high, _MAX_ID))
+        return start, max(start, stop)
+    
+    def ids(self, start: int, stop: int) -> List[str]:
+        return [key[1] for key in self._keys[start:stop]]
+
+
+# Live indexes, updated through one event bus subscription
+_indexes: "weakref.WeakSet[StreakIndex]" = weakref.WeakSet()
+
+
+def _on_streak_changed(event: StreakEvent) -> None:
+    # Created and deleted streaks bump the registry version instead
+    if not isinstance(event, (StreakCreated, StreakDeleted)):
+        for index in list(_indexes):
+            index.update(event.streak)
+
+
+bus.subscribe(StreakEvent, _on_streak_changed)
+
+
+class StreakIndex:
+    """Secondary indexes over the streaks of one registry"""
+    
+    def __init__(self, registry: StreakRegistry):
+        self.registry = registry
+        self._version = -1
+        self.rebuild()
+        _indexes.add(self)
+    
+    def rebuild(self) -> None:
+        """Re-index every streak (after streaks were added, removed or renamed)"""
+        self._values: Dict[str, Tuple[int, ...]] = {}
+        self._positions: Dict[str, int] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        for position, streak in enumerate(self.registry):
+            self._positions[streak.id] = position
+            self._values[streak.id] = tuple(value(streak) for value in FIELDS.values())
+            for gram in self._grams(_name_key(streak.name)):
+                self._trigrams.setdefault(gram, set()).add(streak.id)
+        self._indexes = {field: SortedIndex() for field in FIELDS}
+        for i, index in enumerate(self._indexes.values()):
+            index.load([(values[i], streak_id) for streak_id, values in self._values.items()])
+        self._version = self.registry.version
+    
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def _insert(self, streak: Streak) -> None:
+        values = tuple(value(streak) for value in FIELDS.values())
+        self._values[streak.id] = values
+        for index, value in zip(self._indexes.values(), values):
+            index.add(value, streak.id)
+    
+    def update(self, streak: Streak) -> None:
+        """Move a changed streak to its new index positions"""
+        old = self._values.get(streak.id)
+        if old is None or self.registry.get(streak.id) is not streak:
+            return  # Not one of ours
+        for index, value in zip(self._indexes.values(), old):
+            index.remove(value, streak.id)
+        self._insert(streak)
+    
+    def query(self, **filters) -> List[Streak]:
+        """Streaks matching every filter, in display order"""
+        if self._version != self.registry.version:
+            self.rebuild()
+        
+        # Every filter except the name becomes an inclusive range on one index
+        today = StreakManager.parse_date(StreakManager.get_today()).toordinal()
+        ranges: List[Range] = []
+        name_part = None
+        for key, value in filters.items():
+            field, _, op = key.partition("__")
+            if key == "name_contains":
+                name_part = _name_key(value)
+            elif key == "last_active_within":
+                ranges.append(("last_activity_date", today - int(value), None))
+            elif key == "status":
+                if value not in STATUS_RANGES:
+                    raise ValueError(f"Unknown status {value!r} (use one of {', '.join(STATUS_RANGES)})")
+                low, high = STATUS_RANGES[value](today)
+                ranges.append(("break_date", low, high))
+            elif field in FIELDS and (op or "eq") in OPERATORS:
+                if field in ("last_activity_date", "break_date"):
+                    value = _ordinal(value)
+                low, high = OPERATORS[op or "eq"](value)
+                if field == "break_date" and low is None:
+                    low = 1  # New streaks (0) have no break day
+                ranges.append((field, low, high))
+            else:
+                raise ValueError(f"Unsupported query filter: {key}")
+        
+        # Start from the smallest candidate set and check the rest per candidate
+        plans = []  # (size, range or None for the name, candidate ids or index bounds)
+        for r in ranges:
+            start, stop = self._indexes[r[0]].bounds(r[1], r[2])
+            plans.append((stop - start, r, (start, stop)))
+        if name_part is not None and len(name_part) >= 3:
+            matches = min((self._trigrams.get(g, set()) for g in self._grams(name_part)), key=len)
+            plans.append((len(matches), None, matches))
+        if plans:
+            _, chosen, found = min(plans, key=lambda plan: plan[0])
+            candidates = list(found) if chosen is None else self._indexes[chosen[0]].ids(*found)
+            checks = [(FIELD_POSITIONS[r[0]], r[1], r[2]) for r in ranges if r is not chosen]
+        else:
+            candidates, checks = list(self._values), []
+        
+        result = []
+        for streak_id in candidates:
+            values = self._values[streak_id]
+            if any((low is not None and values[i] < low) or (high is not None and values[i] > high)
+                   for i, low, high in checks):
+                continue
+            streak = self.registry.get(streak_id)
+            if name_part is not None and name_part not in _name_key(streak.name):
+                continue
+            result.append(streak)
+        result.sort(key=lambda streak: self._positions[streak.id])
+        return result
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Reminders for streaks that are about to break
+
+A streak breaks at the midnight that starts its rule's break date (for the
+default daily rule, once a full day has passed without activity).
+ReminderScheduler keeps those deadlines in a min-heap and a background
+thread sleeps until the next reminder is due, so idle streaks cost nothing.
+Call update() after activity is marked to push the deadline.
+"""
+import argparse
+import heapq
+import itertools
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from models import Streak
+from streak_logic import StreakManager
+
+
+# callback(streak, deadline) is called when a reminder fires
+ReminderCallback = Callable[[Streak, datetime], None]
+
+
+class ReminderScheduler:
+    """Deadline heap with a sleeping background thread"""
+    
+    def __init__(self, callback: ReminderCallback, lead: timedelta = timedelta(hours=4),
+                 clock: Callable[[], float] = time.time):
+        self.callback = callback
+        self.lead = lead
+        self.clock = clock
+        self._heap: List[Tuple[float, int, str]] = []  # (remind at, sequence, streak id)
+        self._entries: Dict[str, Tuple[int, Streak, datetime]] = {}  # Latest entry per streak
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+    
+    @staticmethod
+    def break_deadline(streak: Streak) -> Optional[datetime]:
+        """Local time at which the streak counts as broken, or None if it has no activity"""
+        break_date = StreakManager.get_break_date(streak)
+        if break_date is None:
+            return None
+        return datetime.combine(break_date, datetime.min.time())
+    
+    def update(self, streak: Streak) -> None:
+        """(Re)schedule the reminder for one streak; O(log n)"""
+        deadline = self.break_deadline(streak)
+        with self._cond:
+            if deadline is None or deadline.timestamp() <= self.clock():
+                self._entries.pop(streak.id, None)  # Nothing left to warn about
+                return
+            seq = next(self._counter)
+            remind_at = (deadline - self.lead).timestamp()
+            self._entries[streak.id] = (seq, streak, deadline)
+            heapq.heappush(self._heap, (remind_at, seq, streak.id))
+            if self._heap[0][1] == seq:
+                self._cond.notify()  # New earliest reminder; wake the thread
+    
+    def update_all(self, streaks) -> None:
+        """Schedule reminders for every streak"""
+        for streak in streaks:
+            self.update(streak)
+    
+    def remove(self, streak: Streak) -> None:
+        """Forget a streak; its heap entry is discarded lazily"""
+        with self._cond:
+            self._entries.pop(streak.id, None)
+    
+    def next_reminder(self) -> Optional[float]:
+        """Timestamp of the next live reminder, or None"""
+        with self._cond:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[Streak, datetime]]:
+        """Remove and return every reminder due at or before now"""
+        if now is None:
+            now = self.clock()
+        due = []
+        with self._cond:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, streak_id = heapq.heappop(self._heap)
+                _, streak, deadline = self._entries.pop(streak_id)
+                if deadline.timestamp() > now:
+                    due.append((streak, deadline))
+                self._drop_stale()
+        return due
+    
+    def _drop_stale(self) -> None:
+        """Pop heap entries superseded by a later update() or remove()"""
+        heap, entries = self._heap, self._entries
+        while heap:
+            entry = entries.get(heap[0][2])
+            if entry is not None and entry[0] == heap[0][1]:
+                return
+            heapq.heappop(heap)
+    
+    def start(self) -> None:
+        """Start the background thread"""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="streak-reminders", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        while True:
+            for streak, deadline in self.pop_due():
+                try:
+                    self.callback(streak, deadline)
+                except Exception as e:
+                    print(f"Error in reminder callback: {e}")
+            with self._cond:
+                if not self._running:
+                    return
+                self._drop_stale()
+                timeout = None
+                if self._heap:
+                    timeout = max(0.0, self._heap[0][0] - self.clock())
+                self._cond.wait(timeout)
+                if not self._running:
+                    return
+
+
+def command_hook(command: List[str]) -> ReminderCallback:
+    """Build a callback that runs command with the streak name and deadline appended"""
+    def run(streak: Streak, deadline: datetime) -> None:
+        subprocess.run(command + [streak.name, deadline.isoformat()], check=False)
+    return run
+
+
+def main(argv=None) -> int:
+    """Run reminders from the command line until interrupted"""
+    from storage import Storage
+    
+    parser = argparse.ArgumentParser(description="Remind before streaks break")
+    parser.add_argument("--hours", type=float, default=4, help="hours of warning before a break")
+    parser.add_argument("--hook", nargs=argparse.REMAINDER,
+                        help="command to run per reminder (gets name and deadline)")
+    args = parser.parse_args(argv)
+    
+    storage = Storage()
+    if args.hook:
+        notify = command_hook(args.hook)
+    else:
+        def notify(streak, deadline):
+            print(f"⏰ '{streak.name}' breaks at {deadline:%Y-%m-%d %H:%M} - mark it today!")
+    
+    def callback(streak, deadline):
+        # The GUI may have marked activity since we loaded; re-check the file
+        fresh = storage.load().get_streak(streak.id)
+        if fresh is None:
+            return
+        if scheduler.break_deadline(fresh) != deadline:
+            scheduler.update(fresh)
+        else:
+            notify(fresh, deadline)
+    
+    scheduler = ReminderScheduler(callback, lead=timedelta(hours=args.hours))
+    scheduler.update_all(storage.load().streaks)
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Planned rest days for streaks
+
+A RestCalendar marks days on which a streak doesn't need activity: a weekly
+pattern (e.g. weekends) plus explicit days such as vacations, holidays and
+after-the-fact freezes. Explicit days are a DayBitset, a Python int with one
+bit per day, so a two-week vacation is a handful of bits instead of a list.
+
+Rest days pause a rule's clock: RestRule pushes the rule's break date back
+by one day for every rest day in between. Finding that date, and the days
+missed between two dates, are masks and popcounts over whole windows of
+days, so the cost grows with the number of machine words a span covers
+rather than with the number of days or exemptions in it.
+"""
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from rules import StreakRule
+
+
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Days examined per step when searching for an open (non-rest) day
+WINDOW = 512
+
+
+def _weekday_of(ordinal: int) -> int:
+    return (ordinal - 1) % 7  # date.fromordinal(1) is a Monday
+
+
+def _popcount(bits: int) -> int:
+    """Number of set bits (int.bit_count() needs Python 3.10)"""
+    return bin(bits).count("1")
+
+
+def _select(bits: int, n: int) -> int:
+    """Position of the n-th (1-based) set bit; bits must have at least n set"""
+    position = 0
+    width = max(bits.bit_length(), 1)
+    while width > 1:
+        half = width // 2
+        low = bits & ((1 << half) - 1)
+        count = _popcount(low)
+        if count >= n:
+            bits, width = low, half
+        else:
+            bits, width, n, position = bits >> half, width - half, n - count, position + half
+    return position
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    """Positions of the set bits, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class DayBitset:
+    """A set of days stored as the bits of one int (bit i is day base + i)"""
+    __slots__ = ("base", "bits")
+    
+    def __init__(self, base: int = 0, bits: int = 0):
+        self.base = base  # Ordinal of bit 0
+        self.bits = bits
+    
+    @classmethod
+    def from_days(cls, days: Iterable[str]) -> 'DayBitset':
+        """Build from YYYY-MM-DD strings (e.g. a streak's activity days)"""
+        ordinals = [date.fromisoformat(day).toordinal() for day in days]
+        if not ordinals:
+            return cls()
+        base = min(ordinals)
+        flags = bytearray((max(ordinals) - base) // 8 + 1)
+        for ordinal in ordinals:
+            offset = ordinal - base
+            flags[offset >> 3] |= 1 << (offset & 7)
+        return cls(base, int.from_bytes(flags, "little"))
+    
+    def __len__(self) -> int:
+        return _popcount(self.bits)
+    
+    def __contains__(self, day: date) -> bool:
+        offset = day.toordinal() - self.base
+        return offset >= 0 and bool(self.bits >> offset & 1)
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.key() == other.key()
+    
+    def key(self) -> Tuple[int, int]:
+        """Comparable (base, bits) with the base moved to the first day"""
+        if not self.bits:
+            return (0, 0)
+        skip = (self.bits & -self.bits).bit_length() - 1
+        return (self.base + skip, self.bits >> skip)
+    
+    def add_range(self, start: date, end: date) -> None:
+        """Add every day from start to end (inclusive)"""
+        first, last = start.toordinal(), end.toordinal()
+        if last < first:
+            raise ValueError("end is before start")
+        if not self.bits:
+            self.base = first
+        elif first < self.base:
+            self.bits <<= self.base - first
+            self.base = first
+        self.bits |= ((1 << (last - first + 1)) - 1) << (first - self.base)
+    
+    def remove_range(self, start: date, end: date) -> None:
+        """Remove every day from start to end (inclusive)"""
+        first = max(start.toordinal(), self.base)
+        last = end.toordinal()
+        if last >= first:
+            self.bits &= ~(((1 << (last - first + 1)) - 1) << (first - self.base))
+        self.base, self.bits = self.key()
+    
+    def union(self, other: 'DayBitset') -> 'DayBitset':
+        """Days in either set"""
+        if not other.bits:
+            return DayBitset(self.base, self.bits)
+        if not self.bits:
+            return DayBitset(other.base, other.bits)
+        base = min(self.base, other.base)
+        return DayBitset(base, self.bits << (self.base - base) | other.bits << (other.base - base))
+    
+    def count(self, start: int, end: int) -> int:
+        """Number of days with ordinals start .. end (inclusive)"""
+        return _popcount(self.window(start, end - start + 1)) if end >= start else 0
+    
+    def window(self, start: int, length: int) -> int:
+        """Bits for the ordinals start .. start + length - 1"""
+        shift = start - self.base
+        bits = self.bits >> shift if shift >= 0 else self.bits << -shift
+        return bits & ((1 << length) - 1)
+    
+    def days(self) -> List[date]:
+        return [date.fromordinal(self.base + i) for i in _iter_bits(self.bits)]
+    
+    def to_dict(self) -> Dict:
+        base, bits = self.key()
+        if not bits:
+            return {}
+        return {"start": date.fromordinal(base).isoformat(), "bits": format(bits, "x")}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DayBitset':
+        if not data:
+            return cls()
+        return cls(date.fromisoformat(data["start"]).toordinal(), int(data["bits"], 16))
+
+
+class RestCalendar:
+    """Weekly rest days plus explicit rest days (vacations, holidays, freezes)"""
+    __slots__ = ("weekdays", "days")
+    
+    def __init__(self, weekdays: Iterable[int] = (), days: Optional[DayBitset] = None):
+        self.weekdays = 0  # Bit d set: weekday d (Monday = 0) is a rest day
+        self.set_weekdays(weekdays)
+        self.days = days if days is not None else DayBitset()
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.fingerprint() == other.fingerprint()
+    
+    def __repr__(self) -> str:
+        return f"RestCalendar({self.describe()!r})"
+    
+    def fingerprint(self) -> Tuple[int, int, int]:
+        """Cheap change marker (see StreakSnapshots.fingerprint)"""
+        return (self.weekdays,) + self.days.key()
+    
+    def set_weekdays(self, weekdays: Iterable[int]) -> None:
+        mask = 0
+        for weekday in weekdays:
+            if not 0 <= weekday <= 6:
+                raise ValueError(f"Weekday out of range: {weekday}")
+            mask |= 1 << weekday
+        if mask == 0x7F:
+            raise ValueError("At least one weekday must need activity")
+        self.weekdays = mask
+    
+    def add_days(self, start: date, end: Optional[date] = None) -> None:
+        """Plan rest from start to end (inclusive, default just start)"""
+        self.days.add_range(start, end or start)
+    
+    def remove_days(self, start: date, end: Optional[date] = None) -> None:
+        self.days.remove_range(start, end or start)
+    
+    def is_rest(self, day: date) -> bool:
+        return bool(self.weekdays >> day.weekday() & 1) or day in self.days
+    
+    def window(self, start: int, length: int) -> int:
+        """Rest bits for the ordinals start .. start + length - 1"""
+        bits = self.days.window(start, length)
+        if self.weekdays:
+            # Rotate the week so bit 0 is the weekday of start, then repeat it
+            w = _weekday_of(start)
+            week = ((self.weekdays >> w) | (self.weekdays << (7 - w))) & 0x7F
+            weeks = (length + 6) // 7
+            bits |= week * (((1 << (7 * weeks)) - 1) // 0x7F) & ((1 << length) - 1)
+        return bits
+    
+    def open_day(self, after: date, n: int) -> date:
+        """The n-th day after `after` that is not a rest day"""
+        start = after.toordinal() + 1
+        mask = (1 << WINDOW) - 1
+        while True:
+            open_bits = ~self.window(start, WINDOW) & mask
+            count = _popcount(open_bits)
+            if count >= n:
+                return date.fromordinal(start + _select(open_bits, n))
+            n -= count
+            start += WINDOW
+    
+    def missed_days(self, activity: DayBitset, start: date, end: date) -> List[date]:
+        """Days from start to end (inclusive) that needed activity but had none"""
+        first, length = start.toordinal(), (end - start).days + 1
+        if length <= 0:
+            return []
+        missed = ~(activity.window(first, length) | self.window(first, length)) & ((1 << length) - 1)
+        return [date.fromordinal(first + i) for i in _iter_bits(missed)]
+    
+    def describe(self) -> str:
+        parts = [WEEKDAY_NAMES[d].capitalize() for d in range(7) if self.weekdays >> d & 1]
+        if self.days.bits:
+            parts.append(f"{len(self.days)} planned day(s)")
+        return ", ".join(parts) or "none"
+    
+    def to_dict(self) -> Dict:
+        data = {"weekdays": [d for d in range(7) if self.weekdays >> d & 1]}
+        if self.days.bits:
+            data["days"] = self.days.to_dict()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RestCalendar':
+        return cls(data.get("weekdays", ()), DayBitset.from_dict(data.get("days", {})))
+
+
+def parse_weekdays(text: str) -> List[int]:
+    """Parse 'sat,sun' (names or 0-6, Monday = 0) into weekday numbers"""
+    weekdays = []
+    for part in filter(None, (p.strip().lower() for p in text.split(","))):
+        if part[:3] in WEEKDAY_NAMES:
+            weekdays.append(WEEKDAY_NAMES.index(part[:3]))
+        elif part.isdigit():
+            weekdays.append(int(part))
+        else:
+            raise ValueError(f"Unknown weekday: {part!r}")
+    return weekdays
+
+
+class RestRule(StreakRule):
+    """Another rule with its clock paused on rest days"""
+    
+    def __init__(self, rule: StreakRule, calendar: RestCalendar):
+        self.rule = rule
+        self.calendar = calendar
+        self.kind = rule.kind
+    
+    def break_date(self, last: date, state: int) -> date:
+        # The rule's deadline counted in open days only
+        return self.calendar.open_day(last, (self.rule.break_date(last, state) - last).days)
+    
+    def next_state(self, last: Optional[date], state: int, day: date) -> int:
+        return self.rule.next_state(last, state, day)
+    
+    def describe(self) -> str:
+        return f"{self.rule.describe()}, resting {self.calendar.describe()}"
+    
+    def to_dict(self) -> Dict:
+        return self.rule.to_dict()
+    
+    def __eq__(self, other) -> bool:
+        return other.__class__ is self.__class__ and other.rule == self.rule \
+            and other.calendar == self.calendar
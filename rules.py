@@ -0,0 +1,147 @@
+"""
+Streak rules for Daily Streak Tracker
+
+A rule decides how often activity is needed to keep a streak alive. Rules are
+evaluated incrementally: each one only looks at the last activity date and a
+small integer of rule state kept on the Streak, never at the whole log.
+"""
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+
+class StreakRule:
+    """Base rule: activity is needed before break_date() to continue"""
+    kind = ""
+    
+    def break_date(self, last: date, state: int) -> date:
+        """First day on which a streak last active on `last` counts as broken"""
+        raise NotImplementedError
+    
+    def continues(self, last: date, state: int, day: date) -> bool:
+        """Whether activity on `day` extends a streak last active on `last`"""
+        return last < day < self.break_date(last, state)
+    
+    def next_state(self, last: Optional[date], state: int, day: date) -> int:
+        """Rule state after activity on `day` (most rules keep none)"""
+        return 0
+    
+    def describe(self) -> str:
+        """Short human readable description"""
+        raise NotImplementedError
+    
+    def to_dict(self) -> Dict:
+        return {"type": self.kind}
+    
+    @staticmethod
+    def from_dict(data: Dict) -> 'StreakRule':
+        rule_type = RULE_TYPES.get(data.get("type"))
+        if rule_type is None:
+            raise ValueError(f"Unknown streak rule: {data.get('type')!r}")
+        return rule_type.from_params(data)
+    
+    @classmethod
+    def from_params(cls, data: Dict) -> 'StreakRule':
+        return cls()
+    
+    def __eq__(self, other) -> bool:
+        return other.__class__ is self.__class__ and other.to_dict() == self.to_dict()
+    
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+class DailyRule(StreakRule):
+    """Activity every calendar day (the default)"""
+    kind = "daily"
+    
+    def break_date(self, last: date, state: int) -> date:
+        return last + timedelta(days=2)
+    
+    def continues(self, last: date, state: int, day: date) -> bool:
+        return abs((day - last).days) == 1  # Same as StreakManager.mark_activity
+    
+    def describe(self) -> str:
+        return "Every day"
+
+
+class EveryNDaysRule(StreakRule):
+    """Activity at least once every N days"""
+    kind = "every_n_days"
+    
+    def __init__(self, days: int):
+        if days < 1:
+            raise ValueError("days must be at least 1")
+        self.days = days
+    
+    def break_date(self, last: date, state: int) -> date:
+        return last + timedelta(days=self.days + 1)
+    
+    def describe(self) -> str:
+        return f"Every {self.days} days"
+    
+    def to_dict(self) -> Dict:
+        return {"type": self.kind, "days": self.days}
+    
+    @classmethod
+    def from_params(cls, data: Dict) -> 'StreakRule':
+        return cls(days=data["days"])
+
+
+class WeekdaysRule(StreakRule):
+    """Activity every Monday to Friday; weekends may be skipped"""
+    kind = "weekdays"
+    
+    def break_date(self, last: date, state: int) -> date:
+        # Broken the day after the next weekday passes without activity
+        next_day = last + timedelta(days=1)
+        if next_day.weekday() >= 5:
+            next_day += timedelta(days=7 - next_day.weekday())
+        return next_day + timedelta(days=1)
+    
+    def describe(self) -> str:
+        return "Weekdays only"
+
+
+class TimesPerWeekRule(StreakRule):
+    """
+    At least N active days in every Monday-Sunday week.
+    The rule state is the number of active days in the week of the last activity.
+    """
+    kind = "times_per_week"
+    
+    def __init__(self, times: int):
+        if not 1 <= times <= 7:
+            raise ValueError("times must be between 1 and 7")
+        self.times = times
+    
+    @staticmethod
+    def week_start(day: date) -> date:
+        return day - timedelta(days=day.weekday())
+    
+    def break_date(self, last: date, state: int) -> date:
+        # A completed week carries the streak through the following week
+        weeks = 2 if state >= self.times else 1
+        return self.week_start(last) + timedelta(weeks=weeks)
+    
+    def next_state(self, last: Optional[date], state: int, day: date) -> int:
+        if last is not None and self.week_start(last) == self.week_start(day):
+            return state + 1
+        return 1
+    
+    def describe(self) -> str:
+        return f"{self.times}x per week"
+    
+    def to_dict(self) -> Dict:
+        return {"type": self.kind, "times": self.times}
+    
+    @classmethod
+    def from_params(cls, data: Dict) -> 'StreakRule':
+        return cls(times=data["times"])
+
+
+RULE_TYPES = {
+    rule.kind: rule
+    for rule in (DailyRule, EveryNDaysRule, WeekdaysRule, TimesPerWeekRule)
+}
+
+DAILY = DailyRule()
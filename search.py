@@ -0,0 +1,180 @@
+"""
+Full-text search over activity notes
+
+NoteIndex is an inverted index from note words to (streak id, date)
+pairs. It is persisted next to the data file and kept up to date
+incrementally: on_event() indexes each new log as it is marked (subscribe
+it to ActivityAdded on the event bus), and update_from() catches up with
+logs added while the index was closed.
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from models import AppData, ActivityLog
+from events import ActivityAdded
+
+
+# (streak id, YYYY-MM-DD date)
+Hit = Tuple[str, str]
+
+_WORD = re.compile(r"\w+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words"""
+    return _WORD.findall(text.lower())
+
+
+class NoteIndex:
+    """Persistent inverted index over ActivityLog notes"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._postings: Dict[str, Set[Hit]] = {}
+        self._notes: Dict[Hit, str] = {}
+        self._watermarks: Dict[str, str] = {}  # Streak id -> newest indexed date
+        self._dirty = False
+        if self.path is not None and self.path.exists():
+            self.load()
+    
+    @classmethod
+    def for_storage(cls, storage, app_data: Optional[AppData] = None) -> 'NoteIndex':
+        """Open the index kept next to a Storage data file and bring it up to date"""
+        path = storage.data_dir / f"{storage.data_file.stem}.notes_index.json"
+        index = cls(str(path))
+        if not path.exists():
+            app_data = storage.load(include_archive=True)  # First build covers archived years
+        elif app_data is None:
+            app_data = storage.load()
+        index.update_from(app_data)
+        return index
+    
+    def __len__(self) -> int:
+        return len(self._notes)
+    
+    def add(self, streak_id: str, log: ActivityLog) -> None:
+        """Index one activity log"""
+        if log.date > self._watermarks.get(streak_id, ""):
+            self._watermarks[streak_id] = log.date
+            self._dirty = True
+        if not log.notes:
+            return
+        hit = (streak_id, log.date)
+        if hit in self._notes:
+            self._unindex(hit)
+        self._notes[hit] = log.notes
+        for word in set(tokenize(log.notes)):
+            self._postings.setdefault(word, set()).add(hit)
+        self._dirty = True
+    
+    def on_event(self, event: ActivityAdded) -> None:
+        """Event bus handler: index a newly marked log"""
+        self.add(event.streak.id, ActivityLog(date=event.date, notes=event.notes))
+    
+    def update_from(self, app_data: AppData) -> int:
+        """Index logs added since the last update; returns how many were new"""
+        added = 0
+        for streak in app_data.streaks:
+            watermark = self._watermarks.get(streak.id, "")
+            for log in streak.activity_logs:
+                # Back-filled logs sit after newer ones, so check every log, not just the tail
+                if log.date > watermark or (log.notes and self._notes.get((streak.id, log.date)) != log.notes):
+                    self.add(streak.id, log)
+                    added += 1
+        return added
+    
+    def remove_streak(self, streak_id: str) -> None:
+        """Drop every entry of a deleted streak"""
+        for hit in [hit for hit in self._notes if hit[0] == streak_id]:
+            self._unindex(hit)
+            del self._notes[hit]
+        self._watermarks.pop(streak_id, None)
+        self._dirty = True
+    
+    def _unindex(self, hit: Hit) -> None:
+        for word in set(tokenize(self._notes[hit])):
+            hits = self._postings.get(word)
+            if hits is not None:
+                hits.discard(hit)
+                if not hits:
+                    del self._postings[word]
+    
+    def search(self, query: str, streak_id: Optional[str] = None) -> List[Hit]:
+        """
+        Find notes containing every word of the query, newest first.
+        Quoted parts ("dynamic programming") must appear as a phrase.
+        """
+        words, phrases = [], []
+        for phrase, word in _QUERY.findall(query):
+            if phrase:
+                phrases.append(" ".join(tokenize(phrase)))
+                words.extend(tokenize(phrase))
+            else:
+                words.extend(tokenize(word))
+        if not words:
+            return []
+        
+        # Intersect postings from the rarest word up
+        postings = [self._postings.get(word) for word in set(words)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        hits = set(postings[0])
+        for other in postings[1:]:
+            hits &= other
+            if not hits:
+                return []
+        
+        if streak_id is not None:
+            hits = {hit for hit in hits if hit[0] == streak_id}
+        if phrases:
+            hits = {
+                hit for hit in hits
+                if all(f" {p} " in f" {' '.join(tokenize(self._notes[hit]))} " for p in phrases)
+            }
+        return sorted(hits, key=lambda hit: (hit[1], hit[0]), reverse=True)
+    
+    def get_notes(self, hit: Hit) -> str:
+        """Get the note text for a search hit"""
+        return self._notes.get(hit, "")
+    
+    def load(self) -> None:
+        """Load the index from its file"""
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        self._watermarks = data.get("watermarks", {})
+        self._notes = {}
+        for streak_id, notes in data.get("notes", {}).items():
+            for day, text in notes.items():
+                self._notes[(streak_id, day)] = text
+        self._postings = {
+            word: {tuple(hit) for hit in hits}
+            for word, hits in data.get("postings", {}).items()
+        }
+        self._dirty = False
+    
+    def save(self) -> bool:
+        """Write the index to its file if it changed"""
+        if self.path is None or not self._dirty:
+            return True
+        notes: Dict[str, Dict[str, str]] = {}
+        for (streak_id, day), text in self._notes.items():
+            notes.setdefault(streak_id, {})[day] = text
+        data = {
+            "watermarks": self._watermarks,
+            "notes": notes,
+            "postings": {word: [list(hit) for hit in hits] for word, hits in self._postings.items()},
+        }
+        try:
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"Error saving search index: {e}")
+            return False
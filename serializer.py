@@ -0,0 +1,114 @@
+"""
+Streaming JSON encoder for Daily Streak Tracker data
+
+Writes AppData straight to a file without building the nested to_dict()
+tree first. The output is byte-for-byte what json.dump(app_data.to_dict())
+produces with indent=2 (or compact separators when indent is None), so it
+loads back with AppData.from_dict.
+"""
+import json
+from json.encoder import encode_basestring_ascii as _str
+from typing import IO, Iterator, Optional
+from models import AppData, Streak
+
+
+# Chunks are joined and written in batches of roughly this many strings
+WRITE_BATCH = 512
+
+
+class _Layout:
+    """Whitespace for one output style"""
+    
+    def __init__(self, indent: Optional[int]):
+        self.compact = indent is None
+        self.colon = ":" if self.compact else ": "
+        self.indent = indent
+        self.separators = (",", ":") if self.compact else None
+        self._indent = indent or 0
+    
+    def pad(self, level: int) -> str:
+        """Newline plus indentation before an item at the given depth"""
+        if self.compact:
+            return ""
+        return "\n" + " " * (self._indent * level)
+
+
+def _iter_logs(streak: Streak, layout: _Layout, level: int, min_log_date: str) -> Iterator[str]:
+    """Yield one chunk per activity log (the hot path)"""
+    outer, inner, colon = layout.pad(level + 1), layout.pad(level + 2), layout.colon
+    date_key = f'{inner}"date"{colon}'
+    notes_key = f',{inner}"notes"{colon}'
+    first = True
+    for log in streak.activity_logs:
+        if log.date < min_log_date:
+            continue
+        yield ("" if first else ",") + outer + "{" + date_key + _str(log.date) \
+            + notes_key + _str(log.notes) + outer + "}"
+        first = False
+    yield "]" if first else layout.pad(level) + "]"
+
+
+def _iter_streak(streak: Streak, layout: _Layout, level: int, min_log_date: str) -> Iterator[str]:
+    pad, colon = layout.pad(level + 1), layout.colon
+    yield (
+        "{"
+        f'{pad}"id"{colon}{_str(streak.id)},'
+        f'{pad}"name"{colon}{_str(streak.name)},'
+        f'{pad}"current_streak"{colon}{int(streak.current_streak)},'
+        f'{pad}"longest_streak"{colon}{int(streak.longest_streak)},'
+        f'{pad}"last_activity_date"{colon}{_str(streak.last_activity_date)},'
+        f'{pad}"activity_logs"{colon}['
+    )
+    yield from _iter_logs(streak, layout, level + 1, min_log_date)
+    tail = f',{pad}"created_date"{colon}{_str(streak.created_date)}'
+    if streak.rule is not None:
+        rule = json.dumps(streak.rule.to_dict(), indent=layout.indent, separators=layout.separators)
+        rule = rule.replace("\n", layout.pad(level + 1))
+        tail += f',{pad}"rule"{colon}{rule},{pad}"rule_state"{colon}{int(streak.rule_state)}'
+    if streak.rest_days is not None:
+        rest = json.dumps(streak.rest_days.to_dict(), indent=layout.indent, separators=layout.separators)
+        tail += f',{pad}"rest_days"{colon}' + rest.replace("\n", layout.pad(level + 1))
+    yield tail + layout.pad(level) + "}"
+
+
+def encode_streak(streak: Streak, min_log_date: str = "") -> str:
+    """One streak in compact form, as json.dumps(streak.to_dict(), separators=(",", ":"))"""
+    return "".join(_iter_streak(streak, _Layout(None), 0, min_log_date))
+
+
+def iter_app_data(app_data: AppData, indent: Optional[int] = 2,
+                  min_log_date: str = "") -> Iterator[str]:
+    """
+    Yield the JSON encoding of app_data in chunks.
+    Activity logs dated before min_log_date (YYYY-MM-DD) are left out.
+    """
+    layout = _Layout(indent)
+    colon = layout.colon
+    yield "{" + layout.pad(1) + '"streaks"' + colon + "["
+    first = True
+    for streak in app_data.streaks:
+        yield ("" if first else ",") + layout.pad(2)
+        yield from _iter_streak(streak, layout, 2, min_log_date)
+        first = False
+    yield ("]" if first else layout.pad(1) + "]") + "," + layout.pad(1) + '"restore_tokens"' + colon + "{"
+    
+    first = True
+    for key, token in app_data.restore_tokens.items():
+        if token.is_unused():
+            continue  # Left out by to_dict() too
+        encoded = json.dumps(token.to_dict(), indent=layout.indent, separators=layout.separators)
+        yield ("" if first else ",") + layout.pad(2) + _str(key) + colon + encoded.replace("\n", layout.pad(2))
+        first = False
+    yield ("}" if first else layout.pad(1) + "}") + layout.pad(0) + "}"
+
+
+def write_app_data(f: IO[str], app_data: AppData, indent: Optional[int] = 2,
+                   min_log_date: str = "") -> None:
+    """Stream app_data to an open text file"""
+    batch = []
+    for chunk in iter_app_data(app_data, indent, min_log_date):
+        batch.append(chunk)
+        if len(batch) >= WRITE_BATCH:
+            f.write("".join(batch))
+            batch.clear()
+    f.write("".join(batch))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Time-compressed simulation of many users for capacity planning
+
+Each simulated user owns one daily streak and a set of monthly restore
+tokens, and lives through the simulated days on a virtual clock: the real
+StreakManager decides when the streak breaks, restore_streak spends real
+RestoreTokens, and mark_activity logs the check-ins. Users are split into
+chunks that run in parallel worker processes; the per-chunk statistics are
+merged into one report (break frequency, restores, token exhaustion, and
+the storage the check-ins would take).
+
+Simulated logs are trimmed as the run goes, like Storage's hot window, so
+each day costs the same no matter how many years are simulated.
+
+Usage: python simulate.py --users 10000 --years 5 --checkin 0.9 --restore min:7
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, List, Optional, Tuple
+from models import AppData, ActivityLog, Streak
+from serializer import iter_app_data
+from streak_logic import StreakManager
+
+
+# Logs kept per simulated streak; mark_activity only needs the recent ones
+KEEP_LOGS = 4
+
+# Chunks per worker, so a slow chunk doesn't leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+
+@dataclass
+class SimulationConfig:
+    """What to simulate"""
+    users: int = 1000
+    days: int = 365
+    start: str = "2026-01-01"
+    checkin_probability: float = 0.9  # Chance of checking in on a weekday
+    weekend_probability: float = 0.7  # ... on Saturday and Sunday
+    restore_policy: str = "always"  # never | always | min:N (restore streaks of N+ days)
+    max_tokens: int = 2
+    seed: int = 0
+    
+    def wants_restore(self) -> Callable[[int], bool]:
+        """Policy as a function of the length of the streak about to break"""
+        if self.restore_policy == "never":
+            return lambda length: False
+        if self.restore_policy == "always":
+            return lambda length: True
+        kind, _, value = self.restore_policy.partition(":")
+        if kind == "min" and value.isdigit():
+            minimum = int(value)
+            return lambda length: length >= minimum
+        raise ValueError(f"Unknown restore policy: {self.restore_policy!r} (use never, always or min:N)")
+
+
+@dataclass
+class SimulationStats:
+    """Aggregate outcome of a simulation (or of one chunk of users)"""
+    users: int = 0
+    days: int = 0  # Simulated user-days
+    checkins: int = 0
+    breaks: int = 0
+    restores: int = 0
+    denied_restores: int = 0  # Restores wanted with no tokens left that month
+    exhausted_months: int = 0  # User-months in which every token was used
+    users_denied: int = 0  # Users who wanted a restore at least once with none left
+    longest: List[int] = field(default_factory=list)  # Longest streak per user
+    elapsed: float = 0.0
+    
+    def merge(self, other: 'SimulationStats') -> None:
+        for name in ("users", "days", "checkins", "breaks", "restores", "denied_restores",
+                     "exhausted_months", "users_denied"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.longest.extend(other.longest)
+    
+    def report(self) -> str:
+        """Human readable summary"""
+        per_year = lambda count: 365 * count / max(self.days, 1)
+        longest = sorted(self.longest) or [0]
+        rate = self.days / self.elapsed if self.elapsed else 0
+        lines = [
+            f"Simulated {self.users} users, {self.days:,} user-days in {self.elapsed:.2f}s "
+            f"({rate:,.0f} days/s)",
+            f"Check-ins:        {self.checkins:,} ({100 * self.checkins / max(self.days, 1):.1f}% of days)",
+            f"Breaks:           {self.breaks:,} ({per_year(self.breaks):.1f} per user-year)",
+            f"Restores:         {self.restores:,} ({per_year(self.restores):.1f} per user-year)",
+            f"Denied restores:  {self.denied_restores:,} by {self.users_denied} users "
+            f"({100 * self.users_denied / max(self.users, 1):.1f}%)",
+            f"Exhausted months: {self.exhausted_months:,}",
+            f"Longest streak:   median {longest[len(longest) // 2]}, "
+            f"p90 {longest[int(len(longest) * 0.9)]}, max {longest[-1]} days",
+            f"Storage:          ~{self.checkins * bytes_per_log() / 1e6:,.1f} MB of activity logs",
+        ]
+        return "\n".join(lines)
+
+
+class VirtualClock:
+    """A settable "today" for StreakManager.set_clock"""
+    
+    def __init__(self, today: date):
+        self.today = today
+    
+    def __call__(self) -> date:
+        return self.today
+
+
+def bytes_per_log() -> int:
+    """Bytes one activity log adds to the saved data file"""
+    streak = Streak(name="x", activity_logs=[ActivityLog(date="2026-01-01")])
+    one = len("".join(iter_app_data(AppData(streaks=[streak]))))
+    streak.activity_logs.append(ActivityLog(date="2026-01-02"))
+    return len("".join(iter_app_data(AppData(streaks=[streak])))) - one
+
+
+def _calendar(config: SimulationConfig) -> List[Tuple[date, str, bool, str]]:
+    """(day, YYYY-MM-DD, is weekend, YYYY-MM) for every simulated day"""
+    start = date.fromisoformat(config.start)
+    days = []
+    for i in range(config.days):
+        day = start + timedelta(days=i)
+        iso = day.isoformat()
+        days.append((day, iso, day.weekday() >= 5, iso[:7]))
+    return days
+
+
+def simulate_users(config: SimulationConfig, first_user: int, count: int) -> SimulationStats:
+    """Simulate users first_user .. first_user + count - 1 in this process"""
+    started = time.perf_counter()
+    stats = SimulationStats()
+    calendar = _calendar(config)
+    wants_restore = config.wants_restore()
+    clock = VirtualClock(calendar[0][0] if calendar else date.fromisoformat(config.start))
+    manager = StreakManager
+    StreakManager.set_clock(clock)
+    try:
+        for user in range(first_user, first_user + count):
+            rng = random.Random(config.seed * 1_000_003 + user)  # Same result for any chunking
+            streak = Streak(name=f"user {user}", created_date=config.start)
+            tokens = {}
+            denied = 0
+            missed = False  # No check-in on the previous simulated day
+            for day, iso, weekend, month in calendar:
+                clock.today = day
+                # A daily streak can only have broken since yesterday if yesterday was missed
+                if missed and streak.current_streak and manager.check_streak_status(streak) == 'broken':
+                    token = tokens.get(month)
+                    if token is None:
+                        token = manager.get_or_create_restore_token(tokens, month)
+                        token.max_tokens = config.max_tokens
+                    if wants_restore(streak.current_streak):
+                        if not token.can_restore():
+                            denied += 1
+                        elif manager.restore_streak(streak, token):
+                            stats.restores += 1
+                    if manager.check_streak_status(streak) == 'broken':
+                        stats.breaks += 1
+                        manager.update_streak_if_broken(streak)
+                
+                missed = rng.random() >= (config.weekend_probability if weekend else config.checkin_probability)
+                if not missed:
+                    manager.mark_activity(streak, iso)
+                    stats.checkins += 1
+                    if len(streak.activity_logs) > 2 * KEEP_LOGS:
+                        del streak.activity_logs[:-KEEP_LOGS]
+            
+            stats.users += 1
+            stats.days += len(calendar)
+            stats.denied_restores += denied
+            stats.users_denied += denied > 0
+            stats.exhausted_months += sum(not t.can_restore() for t in tokens.values())
+            stats.longest.append(streak.longest_streak)
+    finally:
+        StreakManager.set_clock(None)
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def run_simulation(config: SimulationConfig, workers: Optional[int] = None) -> SimulationStats:
+    """Simulate every user, in parallel over worker processes (1 runs in this process)"""
+    config.wants_restore()  # Reject a bad policy before starting workers
+    workers = max(1, min(workers or os.cpu_count() or 1, config.users))
+    started = time.perf_counter()
+    if workers == 1:
+        stats = simulate_users(config, 0, config.users)
+    else:
+        chunks = min(config.users, workers * CHUNKS_PER_WORKER)
+        bounds = [config.users * i // chunks for i in range(chunks + 1)]
+        stats = SimulationStats()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(simulate_users, config, bounds[i], bounds[i + 1] - bounds[i])
+                       for i in range(chunks)]
+            for future in futures:
+                stats.merge(future.result())
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def main(argv=None) -> int:
+    """Run a simulation from the command line and print the report"""
+    parser = argparse.ArgumentParser(description="Simulate many users' streaks on a virtual clock")
+    parser.add_argument("--users", type=int, default=1000, help="simulated users")
+    parser.add_argument("--years", type=float, default=1.0, help="simulated years per user")
+    parser.add_argument("--start", default="2026-01-01", help="first simulated day, YYYY-MM-DD")
+    parser.add_argument("--checkin", type=float, default=0.9, help="weekday check-in probability")
+    parser.add_argument("--weekend", type=float, default=0.7, help="weekend check-in probability")
+    parser.add_argument("--restore", default="always", help="restore policy: never, always or min:N")
+    parser.add_argument("--tokens", type=int, default=2, help="restore tokens per month")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(argv)
+    
+    config = SimulationConfig(
+        users=args.users, days=int(args.years * 365), start=args.start,
+        checkin_probability=args.checkin, weekend_probability=args.weekend,
+        restore_policy=args.restore, max_tokens=args.tokens, seed=args.seed,
+    )
+    try:
+        stats = run_simulation(config, args.workers)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(stats.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
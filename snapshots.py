@@ -0,0 +1,134 @@
+"""
+Point-in-time ("as of") queries for Daily Streak Tracker
+"""
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+from models import AppData, Streak
+from streak_logic import StreakManager
+
+
+# (checkpoint ordinal, log position, current, longest, last activity ordinal, rule state)
+Checkpoint = Tuple[int, int, int, int, int, int]
+
+
+def _to_ordinal(day: Union[str, date]) -> int:
+    """Convert a date or YYYY-MM-DD string to a proleptic ordinal"""
+    if isinstance(day, str):
+        day = StreakManager.parse_date(day)
+    return day.toordinal()
+
+
+def _month_starts(first: date, last: date) -> List[int]:
+    """Ordinals of every first-of-month in (first, last]"""
+    starts = []
+    year, month = first.year, first.month
+    while True:
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+        start = date(year, month, 1)
+        if start > last:
+            return starts
+        starts.append(start.toordinal())
+
+
+class _StreakHistory:
+    """Sorted activity days plus monthly state checkpoints for one streak"""
+    
+    def __init__(self, streak: Streak):
+        self.fingerprint = StreakSnapshots.fingerprint(streak)
+        self.rule = StreakManager.get_rule(streak)
+        self.days = sorted({_to_ordinal(log.date) for log in streak.activity_logs})
+        self.checkpoints: List[Checkpoint] = []
+        self.keys: List[int] = []
+        if not self.days:
+            return
+        
+        # Walk the history once, recording the state reached just before
+        # each month boundary
+        first = date.fromordinal(self.days[0])
+        last = date.fromordinal(self.days[-1])
+        boundaries = iter(_month_starts(first, last))
+        boundary = next(boundaries, None)
+        current = longest = last_day = state = 0
+        for pos, day in enumerate(self.days):
+            while boundary is not None and day >= boundary:
+                self.checkpoints.append((boundary, pos, current, longest, last_day, state))
+                boundary = next(boundaries, None)
+            current, longest, state = self.advance(current, longest, last_day, state, day)
+            last_day = day
+        self.keys = [cp[0] for cp in self.checkpoints]
+    
+    def advance(self, current: int, longest: int, last_day: int, state: int,
+                day: int) -> Tuple[int, int, int]:
+        """Apply one activity day with the streak's rule"""
+        return StreakManager.advance(
+            self.rule, current, longest,
+            date.fromordinal(last_day) if last_day else None, state, date.fromordinal(day)
+        )
+    
+    def as_of(self, day: int) -> Tuple[int, int]:
+        """Return (current, longest) at the end of the given day"""
+        idx = bisect_right(self.keys, day) - 1
+        if idx >= 0:
+            _, pos, current, longest, last_day, state = self.checkpoints[idx]
+        else:
+            pos = current = longest = last_day = state = 0
+        
+        # Replay only the days since the checkpoint (at most one month)
+        days = self.days
+        while pos < len(days) and days[pos] <= day:
+            current, longest, state = self.advance(current, longest, last_day, state, days[pos])
+            last_day = days[pos]
+            pos += 1
+        
+        if not last_day or day >= self.rule.break_date(date.fromordinal(last_day), state).toordinal():
+            current = 0  # Broken (or not started) on that day
+        return current, longest
+
+
+class StreakSnapshots:
+    """
+    Snapshot index answering "what was the streak on date D" queries.
+    
+    Each streak's history is checkpointed on the first of every month, so a
+    query bisects to the nearest checkpoint and replays at most a month of
+    activity. Histories are rebuilt lazily when a streak's logs change.
+    """
+    
+    def __init__(self, app_data: AppData):
+        self.app_data = app_data
+        self._histories: Dict[str, _StreakHistory] = {}
+    
+    @staticmethod
+    def fingerprint(streak: Streak) -> Tuple:
+        """Cheap change marker for a streak's activity history"""
+        rest = streak.rest_days.fingerprint() if streak.rest_days is not None else None
+        return (len(streak.activity_logs), streak.last_activity_date, streak.rule, rest)
+    
+    def _history(self, streak: Streak) -> _StreakHistory:
+        history = self._histories.get(streak.id)
+        if history is None or history.fingerprint != self.fingerprint(streak):
+            history = _StreakHistory(streak)
+            self._histories[streak.id] = history
+        return history
+    
+    def streak_as_of(self, streak: Streak, day: Union[str, date]) -> Tuple[int, int]:
+        """Return (current, longest) for one streak as of the given day"""
+        return self._history(streak).as_of(_to_ordinal(day))
+    
+    def as_of(self, day: Union[str, date]) -> Dict[str, Tuple[int, int]]:
+        """Return {streak id: (current, longest)} as of the given day"""
+        ordinal = _to_ordinal(day)
+        return {
+            streak.id: self._history(streak).as_of(ordinal)
+            for streak in self.app_data.streaks
+        }
+    
+    def invalidate(self, streak_id: Optional[str] = None) -> None:
+        """Drop cached history for one streak, or for all of them"""
+        if streak_id is None:
+            self._histories.clear()
+        else:
+            self._histories.pop(streak_id, None)
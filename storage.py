@@ -1,47 +1,295 @@
 """
 Local storage management for Daily Streak Tracker
 """
+import gzip
 import json
+import lzma
 import os
+from datetime import date, timedelta
 from pathlib import Path
-from models import AppData
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from models import AppData, ActivityLog, Streak
+from legacy import from_any_dict
+from serializer import write_app_data
+from backup import BackupStore
+
+
+# Compression schemes for archived years: name -> (file suffix, opener)
+ARCHIVE_FORMATS = {
+    "gzip": (".gz", gzip.open),
+    "lzma": (".xz", lzma.open),
+}
 
 
 class Storage:
     """Handles local file-based storage"""
     
-    def __init__(self, data_file: str = "streak_data.json"):
-        self.data_dir = Path.home() / ".daily_streak_tracker"
+    def __init__(self, data_file: str = "streak_data.json", data_dir: Optional[str] = None,
+                 hot_days: int = 90, compression: str = "gzip", compact: bool = False,
+                 backups: bool = True):
+        self.data_dir = Path(data_dir) if data_dir else Path.home() / ".daily_streak_tracker"
         self.data_file = self.data_dir / data_file
+        self.hot_days = hot_days
+        self.compression = compression
+        self.compact = compact  # Write without indentation
+        self._segments: Dict[int, Dict[str, List[Dict]]] = {}  # Cache of read archive years
         self._ensure_data_dir()
+        self.backups = BackupStore(self) if backups else None  # Versioned copy after each save
     
     def _ensure_data_dir(self):
         """Create data directory if it doesn't exist"""
         self.data_dir.mkdir(parents=True, exist_ok=True)
     
     def save(self, app_data: AppData) -> bool:
-        """Save application data to local file"""
+        """
+        Save application data to local file.
+        Data is streamed to disk without building a full dict tree first.
+        Activity older than the hot window is moved into yearly archives.
+        The file is replaced atomically, then backed up.
+        """
         try:
-            with open(self.data_file, 'w') as f:
-                json.dump(app_data.to_dict(), f, indent=2)
-            return True
+            cutoff = self.get_cutoff_date()
+            self._archive_old_logs(app_data, cutoff)
+            tmp_path = self.data_file.with_name(self.data_file.name + ".tmp")
+            with open(tmp_path, 'w') as f:
+                write_app_data(f, app_data, None if self.compact else 2, min_log_date=cutoff)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.data_file)
         except Exception as e:
             print(f"Error saving data: {e}")
             return False
+        
+        if self.backups is not None:
+            try:
+                self.backups.backup(app_data, cutoff)
+            except Exception as e:
+                print(f"Error backing up data: {e}")
+        return True
     
-    def load(self) -> AppData:
-        """Load application data from local file"""
+    def load(self, include_archive: bool = False) -> AppData:
+        """
+        Load application data from local file (current or legacy format).
+        Only the hot window of activity is loaded unless include_archive is set.
+        """
         if not self.data_file.exists():
             return AppData()
         
         try:
             with open(self.data_file, 'r') as f:
                 data = json.load(f)
-            return AppData.from_dict(data)
+            app_data = from_any_dict(data)
         except Exception as e:
             print(f"Error loading data: {e}")
             return AppData()
+        
+        if include_archive:
+            self._merge_archive(app_data.streaks)
+        return app_data
+    
+    def disk_stamp(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the data file, to notice saves by other processes"""
+        try:
+            stat = self.data_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
     
     def get_data_path(self) -> str:
         """Get the full path to the data file"""
         return str(self.data_file)
+    
+    def get_cutoff_date(self) -> str:
+        """Oldest activity date (YYYY-MM-DD) that stays in the hot file"""
+        return (date.today() - timedelta(days=self.hot_days)).isoformat()
+    
+    def get_archive_path(self, year: int, compression: Optional[str] = None) -> Path:
+        """Get the archive segment path for a given year"""
+        suffix = ARCHIVE_FORMATS[compression or self.compression][0]
+        return self.data_dir / f"{self.data_file.stem}.{year}.json{suffix}"
+    
+    def archived_years(self) -> List[int]:
+        """List the years that have an archive segment on disk"""
+        years = set()
+        for suffix, _ in ARCHIVE_FORMATS.values():
+            for path in self.data_dir.glob(f"{self.data_file.stem}.*.json{suffix}"):
+                year = path.name[len(self.data_file.stem) + 1:].split(".", 1)[0]
+                if year.isdigit():
+                    years.add(int(year))
+        return sorted(years)
+    
+    def archive_summary(self) -> Dict[str, List[List]]:
+        """
+        Per streak (key as in the segments: ID, or name in older ones), one
+        [year, log count, first day, last day] per archived year. Cached in
+        <data file>.archive_index.json and recomputed only for segments whose
+        file changed since, so it is cheap to call on every build.
+        """
+        path = self.data_dir / f"{self.data_file.stem}.archive_index.json"
+        cached: Dict[str, Dict] = {}
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = {}
+        index, changed = {}, False
+        for year in self.archived_years():
+            stamp = []
+            for name in ARCHIVE_FORMATS:
+                archive = self.get_archive_path(year, name)
+                if archive.exists():
+                    stat = archive.stat()
+                    stamp = [archive.name, stat.st_size, stat.st_mtime_ns]
+                    break
+            entry = cached.get(str(year))
+            if entry is None or entry["stamp"] != stamp:
+                segment = self._read_segment(year, cache=False)
+                entry = {"stamp": stamp, "streaks": {
+                    key: [len(logs), logs[0]["date"], logs[-1]["date"]] for key, logs in segment.items() if logs
+                }}
+                changed = True
+            index[str(year)] = entry
+        if changed or len(index) != len(cached):
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        
+        summary: Dict[str, List[List]] = {}
+        for year, entry in index.items():
+            for key, stats in entry["streaks"].items():
+                summary.setdefault(key, []).append([int(year)] + stats)
+        return summary
+    
+    def archived_logs(self, streak: Streak) -> List[ActivityLog]:
+        """One streak's archived logs, oldest first, reading only the years that have some"""
+        summary = self.archive_summary()
+        years = sorted({entry[0] for key in (streak.id, streak.name) for entry in summary.get(key, [])})
+        logs = []
+        for year in years:
+            segment = self._read_segment(year, cache=False)
+            logs.extend(ActivityLog.from_dict(log) for log in self._segment_logs(segment, streak))
+        return logs
+    
+    def load_archived_logs(self, year: int) -> Dict[str, List[ActivityLog]]:
+        """Load one archived year as {streak id: [ActivityLog, ...]}"""
+        segment = self._read_segment(year)
+        return {
+            name: [ActivityLog.from_dict(log) for log in logs]
+            for name, logs in segment.items()
+        }
+    
+    def iter_logs(self, streak_names: Optional[Iterable[str]] = None, start: str = "",
+                  end: str = "") -> Iterator[Tuple[Streak, ActivityLog]]:
+        """
+        Yield (streak, ActivityLog) over the full history, oldest year first.
+        Archive years are read one at a time and not cached, so memory stays
+        bounded by the largest year. start/end are inclusive YYYY-MM-DD bounds;
+        streak_names are matched case-insensitively (IDs work too).
+        """
+        app_data = self.load()
+        streaks = list(app_data.streaks)
+        if streak_names:
+            streaks = [app_data.get_streak(n) or app_data.find_streak(n) for n in streak_names]
+            streaks = [s for s in streaks if s is not None]
+        
+        def in_range(log_date: str) -> bool:
+            return log_date >= start and (not end or log_date <= end)
+        
+        for year in self.archived_years():
+            if (start and str(year) < start[:4]) or (end and str(year) > end[:4]):
+                continue
+            segment = self._read_segment(year, cache=False)
+            for streak in streaks:
+                for log in self._segment_logs(segment, streak):
+                    if in_range(log["date"]):
+                        yield streak, ActivityLog.from_dict(log)
+        
+        for streak in streaks:
+            for log in streak.activity_logs:
+                if in_range(log.date):
+                    yield streak, log
+    
+    @staticmethod
+    def _segment_logs(segment: Dict[str, List[Dict]], streak: Streak) -> List[Dict]:
+        """A streak's logs in a segment (older segments are keyed by name)"""
+        logs = segment.get(streak.id)
+        if logs is None:
+            logs = segment.get(streak.name, [])
+        return logs
+    
+    def _read_segment(self, year: int, cache: bool = True) -> Dict[str, List[Dict]]:
+        """Read (and cache) the raw log dicts of one archive segment"""
+        if year in self._segments:
+            return self._segments[year]
+        
+        segment: Dict[str, List[Dict]] = {}
+        for name, (_, opener) in ARCHIVE_FORMATS.items():
+            path = self.get_archive_path(year, name)
+            if path.exists():
+                with opener(path, 'rt', encoding='utf-8') as f:
+                    segment = json.load(f).get("streaks", {})
+                break
+        if cache:
+            self._segments[year] = segment
+        return segment
+    
+    def _write_segment(self, year: int, segment: Dict[str, List[Dict]]) -> None:
+        """Write one archive segment, replacing any other compression of it"""
+        path = self.get_archive_path(year)
+        opener = ARCHIVE_FORMATS[self.compression][1]
+        tmp_path = path.with_name(path.name + ".tmp")
+        with opener(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({"year": year, "streaks": segment}, f)
+        os.replace(tmp_path, path)
+        for name in ARCHIVE_FORMATS:
+            other = self.get_archive_path(year, name)
+            if other != path and other.exists():
+                other.unlink()
+        self._segments[year] = segment
+    
+    def _archive_old_logs(self, app_data: AppData, cutoff: str) -> None:
+        """Merge in-memory logs older than the cutoff into their year segments"""
+        by_year: Dict[int, Dict[str, List[ActivityLog]]] = {}
+        for streak in app_data.streaks:
+            for log in streak.activity_logs:
+                if log.date < cutoff:
+                    year_logs = by_year.setdefault(int(log.date[:4]), {})
+                    year_logs.setdefault(streak.id, []).append(log)
+        
+        for year, streak_logs in by_year.items():
+            segment = self._read_segment(year)
+            merged = dict(segment)
+            changed = False
+            for streak_id, logs in streak_logs.items():
+                existing = merged.get(streak_id, [])
+                known = {log["date"] for log in existing}
+                new_logs = [log.to_dict() for log in logs if log.date not in known]
+                if new_logs:
+                    merged[streak_id] = sorted(existing + new_logs, key=lambda log: log["date"])
+                    changed = True
+            if changed:
+                self._write_segment(year, merged)
+    
+    def load_history(self, streak: Streak) -> None:
+        """Add one loaded streak's archived logs (e.g. before recounting it)"""
+        self._merge_archive([streak])
+    
+    def _merge_archive(self, streaks: Iterable[Streak]) -> None:
+        """Prepend archived logs to the matching streaks, oldest first"""
+        streaks = list(streaks)
+        archived: Dict[str, List[ActivityLog]] = {}
+        for year in self.archived_years():
+            segment = self._read_segment(year)
+            for streak in streaks:
+                archived.setdefault(streak.id, []).extend(
+                    ActivityLog.from_dict(log) for log in self._segment_logs(segment, streak)
+                )
+        
+        for streak in streaks:
+            logs = archived.get(streak.id)
+            if logs:
+                hot_dates = {log.date for log in streak.activity_logs}
+                old_logs = [log for log in logs if log.date not in hot_dates]
+                streak.activity_logs = old_logs + streak.activity_logs
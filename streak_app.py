@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-from streak_data import load_streaks, save_streaks
-from streak_logic import check_in, restore_streak
+from streak_data import load_streaks, save_streaks, storage
+from models import Streak
+from streak_logic import StreakManager
 
 # Load streaks from file
 streaks = load_streaks()
@@ -17,14 +18,7 @@ frame.pack(pady=20)
 
 # Function to dynamically create streaks
 def create_streak(streaks, name):
-    if name not in streaks:
-        streaks[name] = {
-            "name": name,
-            "count": 0,
-            "last_date": None,
-            "restores": 0,
-            "restore_month": None
-        }
+    if streaks.add_streak(Streak(name=name)):
         save_streaks(streaks)  # save immediately
         print(f"✅ Streak '{name}' created!")
     else:
@@ -35,23 +29,20 @@ def update_display():
     for widget in frame.winfo_children():
         widget.destroy()  # clear previous widgets
 
-    for name, streak in streaks.items():
+    for streak in streaks.streaks:
         # Display streak info
-        streak_name = streak.get('name', name)
-        count = streak.get('count', 0)
-        last_date = streak.get('last_date', None)
-        label = tk.Label(frame, text=f"{streak_name} - Streak: {count} - Last: {last_date}")
+        last_date = streak.last_activity_date or None
+        label = tk.Label(frame, text=f"{streak.name} - Streak: {streak.current_streak} - Last: {last_date}")
         label.pack(pady=5)
 
         # Check-in button
         def make_checkin(s=streak):
             def inner():
-                from streak_logic import check_in
-                success = check_in(s)
+                success = StreakManager.mark_activity(s)
                 if success:
                     save_streaks(streaks)
                     update_display()
-                    tk.messagebox.showinfo("Check-in", f"✅ Checked in! Current streak: {s['count']}")
+                    tk.messagebox.showinfo("Check-in", f"✅ Checked in! Current streak: {s.current_streak}")
                 else:
                     tk.messagebox.showwarning("Check-in", "⚠️ Already checked in today!")
             return inner
@@ -62,8 +53,12 @@ def update_display():
         # Restore button
         def make_restore(s=streak):
             def inner():
-                from streak_logic import restore_streak
-                success, message = restore_streak(s)
+                token = StreakManager.get_or_create_restore_token(streaks.restore_tokens)
+                success = StreakManager.restore_streak(s, token, load_history=storage.load_history)
+                if success:
+                    message = f"✅ Streak restored! Tokens left this month: {token.remaining_tokens()}"
+                else:
+                    message = "⚠️ Nothing to restore, or no tokens left this month."
                 save_streaks(streaks)
                 update_display()
                 tk.messagebox.showinfo("Restore", message)
@@ -1,13 +1,12 @@
-import json
+from models import AppData
+from storage import Storage
 FILENAME = "streaks.json"
 
-def load_streaks():
-    try:
-        with open(FILENAME, 'r') as f:
-            streaks = json.load(f)
-    except FileNotFoundError:
-        streaks = {}
-    return streaks
-def save_streaks(streaks):
-    with open(FILENAME, 'w') as f:
-        json.dump(streaks, f, indent=4)
\ No newline at end of file
+# Legacy front end storage: same Storage code path as the main GUI, kept in
+# the working directory. Old dict-keyed files are converted on load.
+storage = Storage(data_file=FILENAME, data_dir=".")
+
+def load_streaks() -> AppData:
+    return storage.load()
+def save_streaks(app_data: AppData):
+    storage.save(app_data)
@@ -2,27 +2,44 @@
 Business logic for streak management
 """
 from datetime import datetime, date, timedelta
-from typing import Optional
-from models import Streak, ActivityLog, RestoreToken
+from typing import Callable, List, Optional, Tuple
+from models import Streak, ActivityLog, RestoreToken, Redemption
+from rules import StreakRule, DAILY
+from rest import RestCalendar, RestRule
+from events import bus, ActivityAdded, StreakBroken, StreakUpdated, TokenUsed
+
+
+# Most missed days one restore token can fill
+MAX_RESTORE_DAYS = 7
 
 
 class StreakManager:
-    """Manages streak calculations and updates"""
+    """Manages streak calculations and updates (changes are published to events.bus)"""
+    
+    _clock: Callable[[], date] = date.today
+    
+    @staticmethod
+    def set_clock(clock: Optional[Callable[[], date]]) -> None:
+        """Read "today" from clock instead of the system date (None restores it)"""
+        StreakManager._clock = clock or date.today
     
     @staticmethod
     def get_today() -> str:
         """Get today's date in YYYY-MM-DD format"""
-        return date.today().isoformat()
+        return StreakManager._clock().isoformat()
     
     @staticmethod
     def get_current_month() -> str:
         """Get current month in YYYY-MM format"""
-        return date.today().strftime("%Y-%m")
+        return StreakManager._clock().isoformat()[:7]
     
     @staticmethod
     def parse_date(date_str: str) -> date:
         """Parse date string to date object"""
-        return datetime.strptime(date_str, "%Y-%m-%d").date()
+        try:
+            return date.fromisoformat(date_str)  # Much faster than strptime
+        except ValueError:
+            return datetime.strptime(date_str, "%Y-%m-%d").date()  # e.g. unpadded "2026-1-5"
     
     @staticmethod
     def days_between(date1_str: str, date2_str: str) -> int:
@@ -31,6 +48,43 @@ class StreakManager:
         d2 = StreakManager.parse_date(date2_str)
         return abs((d2 - d1).days)
     
+    @staticmethod
+    def get_rule(streak: Streak) -> StreakRule:
+        """Get the rule a streak is evaluated with"""
+        if streak.rest_days is not None:
+            return RestRule(streak.rule or DAILY, streak.rest_days)
+        return streak.rule or DAILY
+    
+    @staticmethod
+    def is_rule_based(streak: Streak) -> bool:
+        """Whether the streak needs its rule (or rest days) instead of the classic daily count"""
+        return streak.rule is not None or streak.rest_days is not None
+    
+    @staticmethod
+    def get_break_date(streak: Streak) -> Optional[date]:
+        """First day on which the streak counts as broken, or None if it is new"""
+        if not streak.last_activity_date:
+            return None
+        last = StreakManager.parse_date(streak.last_activity_date)
+        return StreakManager.get_rule(streak).break_date(last, streak.rule_state)
+    
+    @staticmethod
+    def advance(rule: StreakRule, current: int, longest: int, last: Optional[date],
+                state: int, day: date) -> Tuple[int, int, int]:
+        """
+        Apply one activity day to a streak's counters.
+        Returns the new (current, longest, rule state).
+        """
+        if last is None:
+            current = 1  # First activity
+        elif day == last:
+            return current, longest, state  # Same day
+        elif rule.continues(last, state, day):
+            current += 1
+        else:
+            current = 1  # Streak broken
+        return current, max(longest, current), rule.next_state(last, state, day)
+    
     @staticmethod
     def check_streak_status(streak: Streak) -> str:
         """
@@ -40,6 +94,11 @@ class StreakManager:
         if not streak.last_activity_date:
             return 'new'
         
+        if StreakManager.is_rule_based(streak):
+            # Rule-based streaks break at a precomputed day
+            today = StreakManager.parse_date(StreakManager.get_today())
+            return 'broken' if today >= StreakManager.get_break_date(streak) else 'active'
+        
         today = StreakManager.get_today()
         last_date = streak.last_activity_date
         days_diff = StreakManager.days_between(last_date, today)
@@ -69,6 +128,24 @@ class StreakManager:
         log = ActivityLog(date=activity_date, notes=notes)
         streak.activity_logs.append(log)
         
+        last = streak.last_activity_date
+        day = StreakManager.parse_date(activity_date)
+        if last and day < StreakManager.parse_date(last):
+            # Back-filled day: the counters have to be rebuilt (from all loaded logs)
+            StreakManager._recount(streak)
+            bus.publish(ActivityAdded(streak, activity_date, notes))
+            bus.publish(StreakUpdated(streak))
+            return True
+        
+        if StreakManager.is_rule_based(streak):
+            streak.current_streak, streak.longest_streak, streak.rule_state = StreakManager.advance(
+                StreakManager.get_rule(streak), streak.current_streak, streak.longest_streak,
+                StreakManager.parse_date(last) if last else None, streak.rule_state, day
+            )
+            streak.last_activity_date = activity_date
+            bus.publish(ActivityAdded(streak, activity_date, notes))
+            return True
+        
         # Update streak
         if not streak.last_activity_date:
             # First activity
@@ -88,12 +165,45 @@ class StreakManager:
                 streak.current_streak = 1
         
         streak.last_activity_date = activity_date
+        bus.publish(ActivityAdded(streak, activity_date, notes))
         return True
     
     @staticmethod
-    def restore_streak(streak: Streak, restore_token: RestoreToken) -> bool:
+    def gap_days(streak: Streak, max_days: int = MAX_RESTORE_DAYS) -> Optional[List[date]]:
+        """
+        Days to fill so a broken streak is active again today, oldest first
+        (each one the last day the rule still allows). Empty if the streak is
+        not broken; None if more than max_days are needed or the rule can't
+        be satisfied by filling days (e.g. several check-ins a week).
+        """
+        if not streak.last_activity_date:
+            return None
+        rule = StreakManager.get_rule(streak)
+        today = StreakManager.parse_date(StreakManager.get_today())
+        last, state = StreakManager.parse_date(streak.last_activity_date), streak.rule_state
+        days = []
+        while True:
+            day = rule.break_date(last, state) - timedelta(days=1)
+            if day >= today:
+                return days
+            if day <= last or len(days) == max_days:
+                return None
+            state = rule.next_state(last, state, day)
+            last = day
+            days.append(day)
+    
+    @staticmethod
+    def restore_streak(streak: Streak, restore_token: RestoreToken,
+                       max_days: int = MAX_RESTORE_DAYS,
+                       load_history: Optional[Callable[[Streak], None]] = None) -> bool:
         """
-        Restore a broken streak using a restore token
+        Restore a broken streak using a restore token.
+        One token fills every missed day up to yesterday (at most max_days);
+        the days are added together and the counters recomputed once.
+        A streak already reset to 0 needs the logs of its run before the gap;
+        if they go back past the loaded (hot) logs, load_history (e.g.
+        Storage.load_history) is called to load the rest, and without it
+        the restore fails.
         Returns True if restoration was successful
         """
         status = StreakManager.check_streak_status(streak)
@@ -104,16 +214,40 @@ class StreakManager:
         if not restore_token.can_restore():
             return False  # No tokens available
         
+        days = StreakManager.gap_days(streak, max_days)
+        if not days:
+            return False  # Gap too long to fill
+        
+        run = streak.current_streak
+        if not run:
+            # The count was reset when the streak broke: count the run before the gap
+            run = StreakManager._run_before_gap(streak)
+            if run is None and load_history is not None:
+                load_history(streak)
+                run = StreakManager._run_before_gap(streak)
+            if run is None:
+                return False  # Older logs are needed and not loaded
+        
         # Use token
         if not restore_token.use_token():
             return False
+        filled = [day.isoformat() for day in days]
+        restore_token.redemptions.append(Redemption(streak.id, filled))
+        bus.publish(TokenUsed(restore_token, streak))
         
-        # Restore streak by marking yesterday's activity
-        today = StreakManager.get_today()
-        yesterday = (StreakManager.parse_date(today) - timedelta(days=1)).isoformat()
-        
-        # Mark activity for yesterday
-        return StreakManager.mark_activity(streak, yesterday, "Restored using token")
+        notes = "Restored using token"
+        streak.activity_logs.extend(ActivityLog(date=day, notes=notes) for day in filled)
+        rule = StreakManager.get_rule(streak)
+        current, longest, state = run, streak.longest_streak, streak.rule_state
+        last = StreakManager.parse_date(streak.last_activity_date)
+        for day in days:
+            current, longest, state = StreakManager.advance(rule, current, longest, last, state, day)
+            last = day
+        streak.current_streak, streak.longest_streak, streak.rule_state = current, longest, state
+        streak.last_activity_date = filled[-1]
+        for day in filled:
+            bus.publish(ActivityAdded(streak, day, notes))
+        return True
     
     @staticmethod
     def update_streak_if_broken(streak: Streak) -> None:
@@ -121,8 +255,99 @@ class StreakManager:
         Update streak current count to 0 if it's broken
         """
         status = StreakManager.check_streak_status(streak)
-        if status == 'broken':
+        if status == 'broken' and streak.current_streak:
             streak.current_streak = 0
+            bus.publish(StreakBroken(streak))
+    
+    @staticmethod
+    def recalculate(streak: Streak) -> None:
+        """
+        Rebuild a streak's counts from its activity logs.
+        Used after logs were merged in from elsewhere; logs end up sorted by date.
+        """
+        if StreakManager._recount(streak):
+            bus.publish(StreakUpdated(streak))
+    
+    @staticmethod
+    def _sort_logs(streak: Streak) -> None:
+        """Sort a streak's logs by date, dropping duplicate days"""
+        logs = {}
+        for log in streak.activity_logs:
+            logs.setdefault(log.date, log)
+        streak.activity_logs = [logs[d] for d in sorted(logs)]
+    
+    @staticmethod
+    def _count(streak: Streak) -> Tuple[int, int, int]:
+        """(current, longest, rule state) counted over the (sorted) logs"""
+        rule = StreakManager.get_rule(streak)
+        current = longest = state = 0
+        previous = None
+        for log in streak.activity_logs:
+            day = StreakManager.parse_date(log.date)
+            current, longest, state = StreakManager.advance(rule, current, longest, previous, state, day)
+            previous = day
+        return current, longest, state
+    
+    @staticmethod
+    def _run_before_gap(streak: Streak) -> Optional[int]:
+        """
+        Length of the run ending at the last activity, counted from the logs.
+        None when the run reaches the oldest loaded log but is shorter than
+        the longest streak: it may continue into logs that are not loaded.
+        """
+        StreakManager._sort_logs(streak)
+        run = StreakManager._count(streak)[0]
+        if run == len(streak.activity_logs) and run < streak.longest_streak:
+            return None
+        return run
+    
+    @staticmethod
+    def _recount(streak: Streak) -> bool:
+        """Recount without publishing; False if there are no logs"""
+        StreakManager._sort_logs(streak)
+        if not streak.activity_logs:
+            return False  # Nothing to rebuild from
+        
+        current, longest, state = StreakManager._count(streak)
+        streak.current_streak = current
+        streak.longest_streak = max(longest, streak.longest_streak)
+        streak.rule_state = state
+        streak.last_activity_date = streak.activity_logs[-1].date
+        return True
+    
+    @staticmethod
+    def plan_rest(streak: Streak, start: str, end: Optional[str] = None,
+                  load_history: Optional[Callable[[Streak], None]] = None) -> None:
+        """
+        Mark start..end (YYYY-MM-DD, inclusive) as rest days for a streak.
+        Past days act as a freeze: the streak is recounted, so a gap covered
+        by the new rest days no longer breaks it. The recount needs the logs
+        of the whole current run; if it may go back past the loaded (hot)
+        logs, load_history (e.g. Storage.load_history) is called first.
+        Rest days after the last activity don't change the count.
+        """
+        if streak.rest_days is None:
+            streak.rest_days = RestCalendar()
+        first = StreakManager.parse_date(start)
+        streak.rest_days.add_days(first, StreakManager.parse_date(end) if end else first)
+        if not streak.activity_logs or first > StreakManager.parse_date(streak.last_activity_date):
+            if streak.activity_logs:
+                bus.publish(StreakUpdated(streak))  # The break day may have moved
+            return
+        if load_history is not None and (streak.current_streak >= len(streak.activity_logs)
+                                         or StreakManager._run_before_gap(streak) is None):
+            load_history(streak)
+        StreakManager.recalculate(streak)
+    
+    @staticmethod
+    def get_restore_token(restore_tokens: dict, month: str = None) -> RestoreToken:
+        """
+        Restore token for a month without adding it to restore_tokens
+        (for showing what is left; a fresh token if the month has none)
+        """
+        if month is None:
+            month = StreakManager.get_current_month()
+        return restore_tokens.get(month) or RestoreToken(month=month)
     
     @staticmethod
     def get_or_create_restore_token(restore_tokens: dict, month: str = None) -> RestoreToken:
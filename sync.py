@@ -0,0 +1,317 @@
+"""
+Delta sync between devices through a shared directory
+
+Every device appends its own changes to <shared>/<device id>.jsonl: one line
+per streak with the activity days added since its last sync, and one line
+with restore token usage that went up. Peers read each other's logs from the
+byte offset they reached last time, so a sync only touches what changed.
+
+Merging is conflict-free: a streak's activity is the union of the days both
+devices logged, and token usage per month is the maximum of both. Streaks
+are matched by ID, then by name. Deletions are not synced.
+"""
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from models import AppData, ActivityLog, Streak
+from rules import StreakRule
+from rest import DayBitset, RestCalendar
+from streak_logic import StreakManager
+from events import bus, ActivityAdded, StreakUpdated
+
+
+# (device id, parsed delta line)
+Delta = Tuple[str, Dict]
+
+
+class DeltaSync:
+    """One device's view of a shared sync directory"""
+    
+    def __init__(self, state_path: str, shared_dir: str):
+        self.state_path = Path(state_path)
+        self.shared_dir = Path(shared_dir)
+        self.device = uuid.uuid4().hex
+        self._published: Dict[str, DayBitset] = {}  # Streak id -> days already published
+        self._tokens: Dict[str, int] = {}  # Month -> tokens_used already published
+        self._offsets: Dict[str, int] = {}  # Peer device -> bytes of its log already read
+        self._pending_offsets: Dict[str, int] = {}
+        self._dirty: Set[str] = set()  # Streaks published or merged into since the last commit
+        if self.state_path.exists():
+            self.load()
+    
+    @classmethod
+    def for_storage(cls, storage, shared_dir: str) -> 'DeltaSync':
+        """Open the sync state kept next to a Storage data file"""
+        path = storage.data_dir / f"{storage.data_file.stem}.sync.json"
+        return cls(str(path), shared_dir)
+    
+    @property
+    def log_path(self) -> Path:
+        """This device's delta log in the shared directory"""
+        return self.shared_dir / f"{self.device}.jsonl"
+    
+    def local_changes(self, app_data: AppData) -> List[Dict]:
+        """Delta lines for activity and token usage not yet published"""
+        lines = []
+        for streak in app_data.streaks:
+            published = self._published_days(streak)
+            if published is not None and self._all_published(streak, published):
+                continue
+            # Every unpublished day, including days back-filled before older ones
+            days = sorted(
+                [log.date, log.notes] for log in streak.activity_logs
+                if published is None or StreakManager.parse_date(log.date) not in published
+            )
+            self._dirty.add(streak.id)
+            if days or published is None:
+                header = {"id": streak.id, "name": streak.name, "created_date": streak.created_date}
+                if streak.rule is not None:
+                    header["rule"] = streak.rule.to_dict()
+                if streak.rest_days is not None:
+                    header["rest_days"] = streak.rest_days.to_dict()
+                lines.append({"streak": header, "days": days})
+        
+        tokens = {
+            month: token.tokens_used for month, token in app_data.restore_tokens.items()
+            if token.tokens_used > self._tokens.get(month, 0)
+        }
+        if tokens:
+            lines.append({"tokens": tokens})
+        return lines
+    
+    def publish(self, app_data: AppData) -> int:
+        """Append unpublished local changes to this device's log; returns lines written"""
+        lines = self.local_changes(app_data)
+        if lines:
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, 'a') as f:
+                f.write("".join(json.dumps(line, separators=(",", ":")) + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+        return len(lines)
+    
+    def incoming(self) -> List[Delta]:
+        """Read peer deltas added since the last sync"""
+        deltas = []
+        self._pending_offsets = dict(self._offsets)
+        if not self.shared_dir.exists():
+            return deltas
+        for path in sorted(self.shared_dir.glob("*.jsonl")):
+            peer = path.stem
+            if peer == self.device:
+                continue
+            offset = self._offsets.get(peer, 0)
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            # A line still being copied in by the folder sync tool has no newline yet
+            complete = data[:data.rfind(b"\n") + 1]
+            for raw in complete.splitlines():
+                if raw.strip():
+                    deltas.append((peer, json.loads(raw)))
+            self._pending_offsets[peer] = offset + len(complete)
+        return deltas
+    
+    @staticmethod
+    def _all_published(streak: Streak, published: DayBitset) -> bool:
+        """
+        Whether every loaded day of a streak was published, without walking its
+        logs: the loaded logs are every day from the first to the last one, so
+        they are all published when the published days in that range are as many.
+        """
+        logs = streak.activity_logs
+        if not logs:
+            return True
+        first = StreakManager.parse_date(logs[0].date).toordinal()
+        last = StreakManager.parse_date(logs[-1].date).toordinal()
+        return published.count(first, last) == len(logs)
+    
+    def _published_days(self, streak: Streak) -> Optional[DayBitset]:
+        """Days of a streak already published (None: never published)"""
+        published = self._published.get(streak.id)
+        if isinstance(published, str):
+            # Older state kept only the newest published day
+            published = DayBitset.from_days(log.date for log in streak.activity_logs if log.date <= published)
+            self._published[streak.id] = published
+        return published
+    
+    def has_new_streaks(self, app_data: AppData) -> bool:
+        """Whether any streak was never published (its first publish sends its whole history)"""
+        return any(streak.id not in self._published for streak in app_data.streaks)
+    
+    @staticmethod
+    def has_backfill(app_data: AppData, deltas: List[Delta]) -> bool:
+        """Whether any incoming day is older than its streak's last activity"""
+        for _, delta in deltas:
+            header = delta.get("streak")
+            if not header or not delta.get("days"):
+                continue
+            streak = app_data.get_streak(header["id"]) or app_data.find_streak(header["name"])
+            if streak is not None and delta["days"][0][0] < streak.last_activity_date:
+                return True
+        return False
+    
+    def apply(self, app_data: AppData, deltas: List[Delta]) -> int:
+        """Merge peer deltas into app_data; returns the number of new activity days"""
+        added = 0
+        for event_type in (ActivityAdded, StreakUpdated):
+            bus.subscribe(event_type, self._on_change)
+        try:
+            for _, delta in deltas:
+                if "tokens" in delta:
+                    for month, used in delta["tokens"].items():
+                        token = StreakManager.get_or_create_restore_token(app_data.restore_tokens, month)
+                        token.tokens_used = max(token.tokens_used, used)
+                header = delta.get("streak")
+                if header is not None:
+                    added += merge_days(self._streak_for(app_data, header), delta["days"])
+        finally:
+            for event_type in (ActivityAdded, StreakUpdated):
+                bus.unsubscribe(event_type, self._on_change)
+        return added
+    
+    def _on_change(self, event) -> None:
+        """Event bus handler: a merged-in day changed this streak"""
+        self._dirty.add(event.streak.id)
+    
+    @staticmethod
+    def _streak_for(app_data: AppData, header: Dict) -> Streak:
+        streak = app_data.get_streak(header["id"]) or app_data.find_streak(header["name"])
+        if streak is None:
+            rule, rest = header.get("rule"), header.get("rest_days")
+            streak = Streak(name=header["name"], created_date=header.get("created_date"),
+                            rule=StreakRule.from_dict(rule) if rule else None, id=header["id"],
+                            rest_days=RestCalendar.from_dict(rest) if rest is not None else None)
+            app_data.add_streak(streak)
+        elif header.get("created_date"):
+            streak.created_date = min(streak.created_date, header["created_date"])
+        return streak
+    
+    def commit(self, app_data: AppData) -> bool:
+        """
+        Record app_data (after apply) as fully synced and save the state.
+        Merged-in days are treated as published so they don't echo back.
+        Only streaks published or merged into since the last commit are read.
+        """
+        for streak in app_data.streaks:
+            published = self._published_days(streak)
+            if published is not None and streak.id not in self._dirty:
+                continue
+            published = published or DayBitset()
+            days = DayBitset.from_days(log.date for log in streak.activity_logs)
+            self._published[streak.id] = published.union(days)
+        self._dirty.clear()
+        for month, token in app_data.restore_tokens.items():
+            self._tokens[month] = max(self._tokens.get(month, 0), token.tokens_used)
+        self._offsets = dict(self._pending_offsets)
+        return self.save()
+    
+    def load(self) -> None:
+        """Load the sync state"""
+        with open(self.state_path, 'r') as f:
+            data = json.load(f)
+        self.device = data["device"]
+        self._published = {
+            streak_id: DayBitset.from_dict(days) if isinstance(days, dict) else days
+            for streak_id, days in data.get("published", {}).items()
+        }
+        self._tokens = data.get("tokens", {})
+        self._offsets = data.get("offsets", {})
+        self._pending_offsets = dict(self._offsets)
+    
+    def save(self) -> bool:
+        """Write the sync state atomically"""
+        data = {
+            "device": self.device,
+            "published": {streak_id: days.to_dict() for streak_id, days in self._published.items()
+                          if isinstance(days, DayBitset)},
+            "tokens": self._tokens,
+            "offsets": self._offsets,
+        }
+        try:
+            tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.state_path)
+            return True
+        except Exception as e:
+            print(f"Error saving sync state: {e}")
+            return False
+
+
+def merge_days(streak: Streak, days: List[List[str]]) -> int:
+    """
+    Add activity days (sorted [date, notes] pairs) missing from a streak.
+    Days after the last activity extend the streak incrementally; older days
+    are inserted and the streak is recalculated. Returns the number added.
+    """
+    last = streak.last_activity_date
+    older = [day for day in days if day[0] <= last]
+    added = 0
+    if older:
+        known = set()
+        for log in reversed(streak.activity_logs):
+            if log.date < older[0][0]:
+                break
+            known.add(log.date)
+        new_logs = [ActivityLog(date=d, notes=notes) for d, notes in older if d not in known]
+        if new_logs:
+            streak.activity_logs.extend(new_logs)
+            StreakManager.recalculate(streak)
+            added += len(new_logs)
+    for day, notes in days[len(older):]:
+        if StreakManager.mark_activity(streak, day, notes):
+            added += 1
+    return added
+
+
+def merge_app_data(app_data: AppData, other: AppData,
+                   load_history: Optional[Callable[[Streak], None]] = None) -> int:
+    """
+    Merge another copy of the data (e.g. the file as another process saved
+    it) into app_data with the same rules as a sync: activity days are
+    unioned, token usage takes the maximum and unknown streaks are added.
+    load_history is called before a streak gets days older than its last
+    activity. Returns the number of new activity days.
+    """
+    added = 0
+    for theirs in other.streaks:
+        streak = app_data.get_streak(theirs.id)
+        if streak is None:
+            if app_data.add_streak(theirs):
+                added += len(theirs.activity_logs)
+            continue
+        known = {log.date for log in streak.activity_logs}
+        days = sorted([log.date, log.notes] for log in theirs.activity_logs if log.date not in known)
+        if not days:
+            continue
+        if load_history is not None and days[0][0] < streak.last_activity_date:
+            load_history(streak)
+        added += merge_days(streak, days)
+    for month, theirs in other.restore_tokens.items():
+        token = StreakManager.get_or_create_restore_token(app_data.restore_tokens, month)
+        token.tokens_used = max(token.tokens_used, theirs.tokens_used)
+        token.redemptions.extend(r for r in theirs.redemptions if r not in token.redemptions)
+    return added
+
+
+def sync_storage(storage, shared_dir: str) -> Tuple[int, int]:
+    """
+    Sync a Storage data file through shared_dir.
+    Returns (lines published, activity days merged in).
+    """
+    sync = DeltaSync.for_storage(storage, shared_dir)
+    deltas = sync.incoming()
+    app_data = storage.load()
+    if DeltaSync.has_backfill(app_data, deltas) or sync.has_new_streaks(app_data):
+        # Out-of-order days need the whole history to recount the streak,
+        # and archived days must go out with a streak's first publish
+        app_data = storage.load(include_archive=True)
+    published = sync.publish(app_data)
+    added = sync.apply(app_data, deltas)
+    if not storage.save(app_data) or not sync.commit(app_data):
+        raise OSError("Sync failed: could not save data")
+    return published, added
+
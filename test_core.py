@@ -4,14 +4,39 @@ Test script for Daily Streak Tracker core functionality
 """
 import sys
 import os
-from datetime import date, timedelta
+import json
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from models import Streak, ActivityLog, RestoreToken, AppData
+from models import Streak, ActivityLog, RestoreToken, AppData, StreakRegistry
 from storage import Storage
-from streak_logic import StreakManager
+from streak_logic import StreakManager, MAX_RESTORE_DAYS
+from snapshots import StreakSnapshots
+from serializer import iter_app_data
+from reminders import ReminderScheduler
+from rules import EveryNDaysRule, TimesPerWeekRule, WeekdaysRule
+from search import NoteIndex
+from export import export_history
+from leaderboard import Leaderboard, Ranking
+from sync import DeltaSync, merge_app_data, sync_storage
+from backup import BackupStore
+from charts import ChartCache, build_series, lttb
+from watchers import DirectorySource, GitRepoSource, WatcherService, storage_callback
+from rest import DayBitset, RestCalendar
+from batch import mark_all, restore_all, delete_all
+from simulate import SimulationConfig, run_simulation
+from dashboard import build_dashboard
+from tokens import TokenLedger
+from groups import StreakGroup, at_least
+from events import (bus, EventBus, ChangeEvent, StreakEvent, ActivityAdded, StreakBroken,
+                    StreakCreated, StreakDeleted, StreakUpdated, TokenUsed)
+from legacy import detect_format, migrate_files, FORMAT_LEGACY, FORMAT_APPDATA
+import cli
 
 
 def test_streak_creation():
@@ -60,6 +85,26 @@ def test_consecutive_days():
     StreakManager.mark_activity(streak, day3)
     assert streak.current_streak == 3
     assert streak.longest_streak == 3
+    
+    # A back-filled day recounts the streak and keeps the newest day as the last
+    backfilled = Streak(name="Back-filled")
+    StreakManager.mark_activity(backfilled, day3)
+    StreakManager.mark_activity(backfilled, day1)
+    assert backfilled.current_streak == 1 and backfilled.last_activity_date == day3
+    assert StreakManager.check_streak_status(backfilled) == "active"
+    StreakManager.mark_activity(backfilled, day2)
+    assert backfilled.current_streak == backfilled.longest_streak == 3
+    
+    # The command line rejects invalid and future dates
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_dir=tmp_dir, backups=False)
+        app_data = AppData()
+        app_data.add_streak(Streak(name="Run"))
+        assert storage.save(app_data)
+        mark = lambda day: cli.main(["--data-dir", tmp_dir, "mark", "Run", "--date", day])
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        assert mark("2026-13-40") == 1 and mark(tomorrow) == 1
+        assert mark(day1) == 0 and storage.load().find_streak("Run").last_activity_date == day1
     print("✓ Consecutive day tracking successful")
 
 
@@ -134,7 +179,7 @@ def test_storage():
     app_data = AppData(streaks=[streak1, streak2])
     
     # Save to temporary file
-    storage = Storage(data_file="test_data.json")
+    storage = Storage(data_file="test_data.json", backups=False)
     success = storage.save(app_data)
     assert success
     
@@ -188,6 +233,1212 @@ def test_data_serialization():
     print("✓ Data serialization successful")
 
 
+def test_snapshot_as_of():
+    """Test point-in-time queries against a full replay"""
+    print("\nTest 10: Testing as-of snapshot queries...")
+    streak = Streak(name="History")
+    start = date(2024, 1, 1)
+    # Runs of varying length separated by gaps, spanning several months
+    offsets = [d for d in range(200) if d % 17 not in (5, 6) and d % 40 != 39]
+    for d in offsets:
+        StreakManager.mark_activity(streak, (start + timedelta(days=d)).isoformat())
+    app_data = AppData(streaks=[streak])
+    snapshots = StreakSnapshots(app_data)
+    
+    for d in range(-3, 210, 7):
+        day = start + timedelta(days=d)
+        replay = Streak(name="Replay")
+        for log in streak.activity_logs:
+            if log.date <= day.isoformat():
+                StreakManager.mark_activity(replay, log.date)
+        expected_current = replay.current_streak
+        if replay.last_activity_date and (day - StreakManager.parse_date(replay.last_activity_date)).days > 1:
+            expected_current = 0
+        assert snapshots.as_of(day)[streak.id] == (expected_current, replay.longest_streak)
+    
+    # New activity invalidates the cached history
+    StreakManager.mark_activity(streak, (start + timedelta(days=200)).isoformat())
+    assert snapshots.streak_as_of(streak, start + timedelta(days=200))[0] >= 1
+    print("✓ As-of snapshot queries successful")
+
+
+def test_archive_segments():
+    """Test archiving old activity into yearly compressed segments"""
+    print("\nTest 11: Testing tiered archival of old activity...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_file="archive_test.json", data_dir=tmp_dir, hot_days=30)
+        streak = Streak(name="GitHub")
+        for d in range(500, -1, -3):
+            StreakManager.mark_activity(streak, (date.today() - timedelta(days=d)).isoformat())
+        assert storage.save(AppData(streaks=[streak]))
+        
+        # Hot file only keeps the recent window
+        cutoff = storage.get_cutoff_date()
+        with open(storage.data_file) as f:
+            hot_logs = json.load(f)["streaks"][0]["activity_logs"]
+        assert hot_logs and all(log["date"] >= cutoff for log in hot_logs)
+        assert storage.archived_years()
+        
+        # Archived years load only on request
+        hot = storage.load()
+        assert len(hot.streaks[0].activity_logs) == len(hot_logs)
+        assert hot.streaks[0].last_activity_date == streak.last_activity_date
+        
+        # Saving hot-only data keeps the archive intact
+        StreakManager.mark_activity(hot.streaks[0], date.today().isoformat())
+        assert Storage(data_file="archive_test.json", data_dir=tmp_dir, hot_days=30).save(hot)
+        full = Storage(data_file="archive_test.json", data_dir=tmp_dir).load(include_archive=True)
+        dates = [log.date for log in full.streaks[0].activity_logs]
+        assert dates == sorted(set(log.date for log in streak.activity_logs) | {date.today().isoformat()})
+    print("✓ Tiered archival successful")
+
+
+def test_legacy_migration():
+    """Test loading and migrating the legacy streaks.json format"""
+    print("\nTest 12: Testing legacy format migration...")
+    legacy_a = {
+        "Github": {"name": "Github", "count": 3, "last_date": "2026-01-22",
+                   "restores": 1, "restore_month": 1},
+        "h": {"name": "h", "count": 0, "last_date": None, "restores": 0, "restore_month": None},
+    }
+    legacy_b = {
+        "github": {"name": "github", "count": 2, "last_date": "2026-01-24",
+                   "restores": 0, "restore_month": None},
+    }
+    assert detect_format(legacy_a) == FORMAT_LEGACY
+    assert detect_format(AppData().to_dict()) == FORMAT_APPDATA
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i, data in enumerate([legacy_a, legacy_b]):
+            path = os.path.join(tmp_dir, f"streaks_{i}.json")
+            with open(path, "w") as f:
+                json.dump(data, f)
+            paths.append(path)
+        
+        # Storage reads legacy files directly
+        storage = Storage(data_file="streaks_0.json", data_dir=tmp_dir)
+        loaded = storage.load()
+        assert [s.name for s in loaded.streaks] == ["Github", "h"]
+        assert loaded.streaks[0].current_streak == 3
+        assert loaded.restore_tokens["2026-01"].tokens_used == 1
+        
+        # Batch migration merges same-named streaks (Jan 20-22 + Jan 23-24)
+        merged = migrate_files(paths)
+        assert len(merged.streaks) == 2
+        github = merged.streaks[0]
+        assert github.current_streak == 5
+        assert github.last_activity_date == "2026-01-24"
+        assert merged.streaks[1].current_streak == 0
+    print("✓ Legacy format migration successful")
+
+
+def test_compact_models():
+    """Test slotted models keep the dict contract and share note strings"""
+    print("\nTest 13: Testing memory-compact models...")
+    log = ActivityLog(date="2026-01-01")
+    assert not hasattr(log, "__dict__")
+    assert not hasattr(Streak(name="Slots"), "__dict__")
+    assert not hasattr(RestoreToken(month="2026-01"), "__dict__")
+    
+    # Repeated notes and dates parsed separately end up as one object each
+    first = ActivityLog.from_dict(json.loads('{"date": "2026-01-02", "notes": "Restored using token"}'))
+    second = ActivityLog.from_dict(json.loads('{"date": "2026-01-02", "notes": "Restored using token"}'))
+    assert first.notes is second.notes
+    assert first.date is second.date
+    assert first == second
+    
+    streak = Streak(name="Round Trip")
+    StreakManager.mark_activity(streak, "2026-01-01", "Solved #1")
+    assert Streak.from_dict(streak.to_dict()) == streak
+    token = RestoreToken(month="2026-01", tokens_used=1)
+    assert RestoreToken.from_dict(token.to_dict()) == token
+    print("✓ Memory-compact models successful")
+
+
+def test_streaming_serializer():
+    """Test the streaming encoder matches json.dump output"""
+    print("\nTest 14: Testing streaming serializer...")
+    streak = Streak(name='Quote " and unicode é')
+    StreakManager.mark_activity(streak, "2026-01-01", "line\nbreak")
+    StreakManager.mark_activity(streak, "2026-01-02")
+    app_data = AppData(
+        streaks=[streak, Streak(name="Empty")],
+        restore_tokens={"2026-01": RestoreToken(month="2026-01", tokens_used=1)}
+    )
+    
+    for data in (app_data, AppData()):
+        assert "".join(iter_app_data(data, indent=2)) == json.dumps(data.to_dict(), indent=2)
+        compact = "".join(iter_app_data(data, indent=None))
+        assert compact == json.dumps(data.to_dict(), separators=(",", ":"))
+        assert AppData.from_dict(json.loads(compact)).to_dict() == data.to_dict()
+    
+    # Logs before min_log_date are skipped
+    hot = json.loads("".join(iter_app_data(app_data, min_log_date="2026-01-02")))
+    assert [log["date"] for log in hot["streaks"][0]["activity_logs"]] == ["2026-01-02"]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_file="compact.json", data_dir=tmp_dir, hot_days=36500, compact=True)
+        assert storage.save(app_data)
+        assert storage.load().to_dict() == app_data.to_dict()
+    print("✓ Streaming serializer successful")
+
+
+def test_reminder_scheduler():
+    """Test the deadline heap for streaks about to break"""
+    print("\nTest 15: Testing reminder scheduler...")
+    yesterday = date.today() - timedelta(days=1)
+    deadline = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    now = [deadline.timestamp() - 10 * 3600]
+    
+    fired = []
+    scheduler = ReminderScheduler(lambda s, d: fired.append(s.name),
+                                  lead=timedelta(hours=4), clock=lambda: now[0])
+    soon, later = Streak(name="Soon"), Streak(name="Later")
+    StreakManager.mark_activity(soon, yesterday.isoformat())
+    StreakManager.mark_activity(later, date.today().isoformat())
+    scheduler.update_all([soon, later, Streak(name="New")])
+    
+    assert scheduler.pop_due() == []
+    assert scheduler.next_reminder() == deadline.timestamp() - 4 * 3600
+    
+    # Marking today moves the deadline; the old heap entry is skipped
+    StreakManager.mark_activity(soon, date.today().isoformat())
+    scheduler.update(soon)
+    now[0] = deadline.timestamp() - 3600
+    assert scheduler.pop_due() == []
+    now[0] = deadline.timestamp() + 20 * 3600
+    assert sorted(s.name for s, _ in scheduler.pop_due()) == ["Later", "Soon"]
+    
+    # The background thread fires due reminders
+    done = threading.Event()
+    threaded = ReminderScheduler(lambda s, d: done.set(), lead=timedelta(days=3))
+    threaded.update(later)
+    threaded.start()
+    assert done.wait(5)
+    threaded.stop()
+    print("✓ Reminder scheduler successful")
+
+
+def test_streak_rules():
+    """Test rule-based streaks (weekdays, every N days, N per week)"""
+    print("\nTest 16: Testing streak rules...")
+    # Weekdays: Friday 2026-01-02 -> Monday 2026-01-05 continues
+    weekdays = Streak(name="Weekdays", rule=WeekdaysRule())
+    for day in ("2026-01-01", "2026-01-02", "2026-01-05"):
+        StreakManager.mark_activity(weekdays, day)
+    assert weekdays.current_streak == 3
+    assert StreakManager.get_break_date(weekdays) == date(2026, 1, 7)
+    StreakManager.mark_activity(weekdays, "2026-01-07")  # Missed Tuesday
+    assert weekdays.current_streak == 1
+    
+    # Every 3 days: gaps of up to 3 days continue
+    every = Streak(name="Every 3", rule=EveryNDaysRule(3))
+    for day in ("2026-01-01", "2026-01-04", "2026-01-06"):
+        StreakManager.mark_activity(every, day)
+    assert every.current_streak == 3
+    StreakManager.mark_activity(every, "2026-01-10")
+    assert every.current_streak == 1
+    
+    # 2 per week: a completed week carries into the next one
+    weekly = Streak(name="Twice weekly", rule=TimesPerWeekRule(2))
+    for day in ("2026-01-05", "2026-01-07", "2026-01-16", "2026-01-17"):
+        StreakManager.mark_activity(weekly, day)
+    assert weekly.current_streak == 4
+    assert weekly.rule_state == 2
+    StreakManager.mark_activity(weekly, "2026-01-26")  # Week of Jan 19 had nothing
+    assert weekly.current_streak == 1
+    
+    # Status comes from the precomputed break date
+    recent = Streak(name="Recent", rule=EveryNDaysRule(3))
+    StreakManager.mark_activity(recent, (date.today() - timedelta(days=3)).isoformat())
+    assert StreakManager.check_streak_status(recent) == "active"
+    StreakManager.mark_activity(weekdays, (date.today() - timedelta(days=10)).isoformat())
+    assert StreakManager.check_streak_status(weekdays) == "broken"
+    
+    # Rules survive serialization and back-filled days are recalculated
+    restored = Streak.from_dict(json.loads(json.dumps(weekly.to_dict())))
+    assert restored == weekly
+    app_data = AppData(streaks=[weekly, Streak(name="Plain")])
+    assert "".join(iter_app_data(app_data)) == json.dumps(app_data.to_dict(), indent=2)
+    StreakManager.mark_activity(weekly, "2026-01-20")
+    assert weekly.longest_streak == 5  # Jan 5 through Jan 20
+    assert weekly.current_streak == 1  # Week of Jan 19 still had only one day
+    
+    # Snapshots replay with the streak's rule
+    snapshots = StreakSnapshots(AppData(streaks=[every]))
+    assert snapshots.streak_as_of(every, "2026-01-09") == (3, 3)
+    assert snapshots.streak_as_of(every, "2026-01-10") == (1, 3)
+    assert snapshots.streak_as_of(every, "2026-01-14") == (0, 3)
+    print("✓ Streak rules successful")
+
+
+def test_note_search():
+    """Test the inverted index over activity notes"""
+    print("\nTest 17: Testing full-text note search...")
+    leetcode = Streak(name="LeetCode")
+    StreakManager.mark_activity(leetcode, "2026-01-01", "Dynamic programming: coin change")
+    StreakManager.mark_activity(leetcode, "2026-01-02", "Graphs, then more dynamic stuff")
+    StreakManager.mark_activity(leetcode, "2026-01-03", "Programming dynamic arrays")
+    github = Streak(name="GitHub")
+    StreakManager.mark_activity(github, "2026-01-02", "Refactored dynamic programming notes")
+    app_data = AppData(streaks=[leetcode, github])
+    lc, gh = leetcode.id, github.id
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "index.json")
+        index = NoteIndex(path)
+        assert index.update_from(app_data) == 4
+        assert index.search("DYNAMIC programming") == [
+            (lc, "2026-01-03"), (gh, "2026-01-02"), (lc, "2026-01-01")
+        ]
+        assert index.search('"dynamic programming"') == [(gh, "2026-01-02"), (lc, "2026-01-01")]
+        assert index.search('"dynamic program"') == []
+        assert index.search("graphs", streak_id=gh) == []
+        assert index.search("nothing here") == []
+        assert index.save()
+        
+        # Reloaded index only picks up logs after its watermark
+        StreakManager.mark_activity(github, "2026-01-03", "Dynamic programming blog post")
+        reloaded = NoteIndex(path)
+        assert reloaded.update_from(app_data) == 1
+        assert len(reloaded.search('"dynamic programming"')) == 3
+        
+        # Back-dated logs are indexed too, by update_from and from change events
+        StreakManager.mark_activity(leetcode, "2025-12-30", "Dynamic programming warm-up")
+        assert reloaded.update_from(app_data) == 1
+        bus.subscribe(ActivityAdded, reloaded.on_event)
+        try:
+            StreakManager.mark_activity(leetcode, "2025-12-29", "More dynamic programming")
+        finally:
+            bus.unsubscribe(ActivityAdded, reloaded.on_event)
+        assert reloaded.search('"dynamic programming"')[-2:] == [(lc, "2025-12-30"), (lc, "2025-12-29")]
+        assert reloaded.update_from(app_data) == 0
+        reloaded.remove_streak(gh)
+        assert reloaded.search("dynamic programming") == [
+            (lc, "2026-01-03"), (lc, "2026-01-01"), (lc, "2025-12-30"), (lc, "2025-12-29")
+        ]
+    print("✓ Full-text note search successful")
+
+
+def test_streaming_export():
+    """Test exporting history (hot and archived) to CSV, JSONL and ICS"""
+    print("\nTest 18: Testing streaming export...")
+    import csv
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_file="export_test.json", data_dir=tmp_dir, hot_days=30)
+        github, leetcode = Streak(name="GitHub"), Streak(name="LeetCode")
+        for d in range(400, -1, -1):
+            StreakManager.mark_activity(github, (date.today() - timedelta(days=d)).isoformat())
+        StreakManager.mark_activity(leetcode, date.today().isoformat(), "Two sum, again; sigh")
+        assert storage.save(AppData(streaks=[github, leetcode]))
+        assert storage.archived_years()
+        
+        csv_path = os.path.join(tmp_dir, "all.csv")
+        assert export_history(storage, csv_path) == 402
+        with open(csv_path, newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["streak", "date", "notes", "streak_id"]
+        assert sorted(r[1] for r in rows[1:] if r[0] == "GitHub") == sorted(l.date for l in github.activity_logs)
+        
+        start = (date.today() - timedelta(days=9)).isoformat()
+        jsonl_path = os.path.join(tmp_dir, "recent.jsonl")
+        assert export_history(storage, jsonl_path, streak_names=["github"], start=start) == 10
+        with open(jsonl_path) as f:
+            assert all(json.loads(line)["date"] >= start for line in f)
+        
+        ics_path = os.path.join(tmp_dir, "leetcode.ics")
+        assert export_history(storage, ics_path, streak_names=["LeetCode"]) == 1
+        with open(ics_path, newline="") as f:
+            ics = f.read()
+        assert ics.startswith("BEGIN:VCALENDAR\r\n") and ics.endswith("END:VCALENDAR\r\n")
+        assert "DESCRIPTION:Two sum\\, again\\; sigh" in ics
+    print("✓ Streaming export successful")
+
+
+def test_name_index():
+    """Test case-folded name lookups on AppData"""
+    print("\nTest 19: Testing case-folded name index...")
+    app_data = AppData()
+    github = Streak(name="GitHub Commits")
+    assert app_data.add_streak(github)
+    assert not app_data.add_streak(Streak(name="github COMMITS "))
+    assert app_data.has_streak("GITHUB commits")
+    assert app_data.find_streak("github commits") is github
+    
+    # Direct list edits are picked up too
+    leetcode = Streak(name="Straße")
+    app_data.streaks.append(leetcode)
+    assert app_data.find_streak("STRASSE") is leetcode
+    app_data.remove_streak(github)
+    assert not app_data.has_streak("GitHub Commits")
+    assert [s.name for s in app_data.streaks] == ["Straße"]
+    print("✓ Case-folded name index successful")
+
+
+def test_streak_registry():
+    """Test stable streak IDs and the ID-keyed registry"""
+    print("\nTest 20: Testing stable streak IDs...")
+    github, leetcode = Streak(name="GitHub"), Streak(name="LeetCode")
+    assert github.id != leetcode.id
+    app_data = AppData(streaks=[github, leetcode])
+    assert isinstance(app_data.streaks, StreakRegistry)
+    
+    # IDs survive a round trip and positional access still works
+    reloaded = AppData.from_dict(json.loads(json.dumps(app_data.to_dict())))
+    assert [s.id for s in reloaded.streaks] == [github.id, leetcode.id]
+    assert reloaded.streaks[0].id == github.id
+    assert reloaded.get_streak(leetcode.id).name == "LeetCode"
+    
+    try:
+        app_data.streaks.add(Streak(name="Copy", id=github.id))
+        assert False, "duplicate id accepted"
+    except ValueError:
+        pass
+    
+    # Renaming keeps the ID and moves the name index entry
+    app_data.streaks.rename(github.id, "Open Source")
+    assert app_data.find_streak("open source") is github
+    assert app_data.find_streak("GitHub") is None
+    assert app_data.remove_streak(github.id) is github
+    assert app_data.get_streak(github.id) is None
+    assert [s.name for s in app_data.streaks] == ["LeetCode"]
+    print("✓ Stable streak IDs successful")
+
+
+def test_leaderboard():
+    """Test incrementally maintained leaderboards"""
+    print("\nTest 21: Testing leaderboards...")
+    ranking = Ranking()
+    for i in range(200):
+        ranking.set(f"k{i:03}", i % 50 * 3)  # Scores past the initial tree size
+    assert ranking.top(3) == [("k049", 147), ("k099", 147), ("k149", 147)]
+    assert ranking.rank("k049") == 1 and ranking.rank("k000") == 197
+    ranking.set("k000", 1000)
+    ranking.remove("k049")
+    assert ranking.top(2) == [("k000", 1000), ("k099", 147)]
+    assert ranking.rank("k099") == 2 and ranking.rank("k049") is None
+    
+    today = date.today()
+    board = Leaderboard().attach()
+    try:
+        mine, theirs, idle = Streak(name="Mine"), Streak(name="Theirs"), Streak(name="Idle")
+        for d in range(40, 0, -1):
+            StreakManager.mark_activity(mine, (today - timedelta(days=d)).isoformat())
+        for d in range(3, 0, -1):
+            StreakManager.mark_activity(theirs, (today - timedelta(days=d)).isoformat())
+        board.track_all(AppData(streaks=[mine, idle]), "me")
+        board.track(theirs, "them")
+        assert [(s.name, n) for s, n in board.top("current", 2)] == [("Mine", 40), ("Theirs", 3)]
+        assert board.top("last_30_days", 1)[0] == (mine, 29)  # Not marked today
+        assert board.rank("current", theirs) == 2 and board.rank("current", theirs, "them") == 1
+        
+        # Marking activity re-ranks through the StreakManager hook
+        for d in range(0, 60):
+            StreakManager.mark_activity(idle, (today - timedelta(days=100 - d)).isoformat())
+        assert board.top("longest", 1)[0] == (idle, 60)
+        assert board.top("current", 1, tenant="me")[0] == (mine, 40)
+        
+        # A daily sweep zeroes broken streaks and slides the window
+        board.sweep((today + timedelta(days=5)).isoformat())
+        assert board.top("current", 3)[0][1] == 0
+        assert board.top("last_30_days", 1)[0] == (mine, 24)
+        board.untrack(mine)
+        assert board.rank("longest", mine) is None and len(board) == 2
+        
+        # A copied data file shares streak IDs but stays on its own tenant's board
+        board.sweep()
+        copy = Streak.from_dict(theirs.to_dict())
+        board.track(copy, "copy")
+        StreakManager.mark_activity(copy, today.isoformat())
+        assert len(board) == 3 and board.tenant_of(theirs) == "them" and board.tenant_of(copy) == "copy"
+        assert board.top("current", 1, tenant="copy")[0] == (copy, 4)
+        assert board.top("current", 1, tenant="them")[0] == (theirs, 3)
+        assert board.rank("current", copy) == 1 and board.rank("current", theirs) == 2
+        board.untrack(copy)
+        assert board.top("current", 1, tenant="them")[0] == (theirs, 3) and len(board) == 2
+    finally:
+        board.detach()
+    print("✓ Leaderboards successful")
+
+
+def test_delta_sync():
+    """Test syncing two devices through a shared directory"""
+    print("\nTest 22: Testing delta sync between devices...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shared = os.path.join(tmp_dir, "shared")
+        laptop = Storage(data_dir=os.path.join(tmp_dir, "laptop"))
+        desktop = Storage(data_dir=os.path.join(tmp_dir, "desktop"))
+        today = date.today()
+        day = lambda n: (today - timedelta(days=n)).isoformat()
+        
+        app_data = AppData()
+        streak = Streak(name="GitHub")
+        app_data.add_streak(streak)
+        for n in (5, 4, 3):
+            StreakManager.mark_activity(streak, day(n), f"day {n}")
+        assert laptop.save(app_data)
+        assert sync_storage(laptop, shared) == (1, 0)
+        assert sync_storage(desktop, shared) == (0, 3)
+        
+        # Both devices check in; the desktop also uses a restore token
+        app_data = laptop.load()
+        StreakManager.mark_activity(app_data.get_streak(streak.id), day(2))
+        assert laptop.save(app_data)
+        app_data = desktop.load()
+        assert app_data.get_streak(streak.id).current_streak == 3
+        StreakManager.mark_activity(app_data.get_streak(streak.id), day(1))
+        StreakManager.get_or_create_restore_token(app_data.restore_tokens).use_token()
+        assert desktop.save(app_data)
+        
+        assert sync_storage(desktop, shared) == (2, 0)
+        assert sync_storage(laptop, shared) == (1, 1)
+        assert sync_storage(desktop, shared) == (0, 1)  # Day 2 arrives out of order
+        for storage in (laptop, desktop):
+            merged = storage.load()
+            synced = merged.get_streak(streak.id)
+            assert [log.date for log in synced.activity_logs] == [day(n) for n in (5, 4, 3, 2, 1)]
+            assert synced.current_streak == 5 and synced.activity_logs[0].notes == "day 5"
+            assert merged.restore_tokens[StreakManager.get_current_month()].tokens_used == 1
+        
+        # Nothing changed: nothing is published or read again
+        assert sync_storage(laptop, shared) == (0, 0)
+        sync = DeltaSync.for_storage(laptop, shared)
+        assert sync.incoming() == [] and sync.local_changes(laptop.load()) == []
+        assert not sync._dirty  # Fully published streaks aren't walked or recommitted
+        
+        # A back-dated day is appended after newer ones and still published
+        app_data = laptop.load()
+        StreakManager.mark_activity(app_data.get_streak(streak.id), day(7), "back-dated")
+        assert laptop.save(app_data)
+        assert sync_storage(laptop, shared) == (1, 0)
+        assert sync_storage(desktop, shared) == (0, 1)
+        assert desktop.load().get_streak(streak.id).activity_logs[0].notes == "back-dated"
+        assert sync_storage(desktop, shared) == (0, 0)  # The merged-in day isn't echoed back
+        
+        # A streak's first publish includes its archived days
+        veteran = Storage(data_dir=os.path.join(tmp_dir, "veteran"), hot_days=90, backups=False)
+        fresh = Storage(data_dir=os.path.join(tmp_dir, "fresh"), hot_days=90, backups=False)
+        long_run = Streak(name="Long run")
+        for n in range(200, 0, -1):
+            StreakManager.mark_activity(long_run, day(n))
+        assert veteran.save(AppData(streaks=[long_run]))
+        other_shared = os.path.join(tmp_dir, "shared2")
+        sync_storage(veteran, other_shared)
+        assert sync_storage(fresh, other_shared) == (0, 200)
+        synced = fresh.load(include_archive=True).get_streak(long_run.id)
+        assert len(synced.activity_logs) == 200 and synced.current_streak == synced.longest_streak == 200
+    print("✓ Delta sync successful")
+
+
+def test_backups():
+    """Test content-addressed backups, restore and retention"""
+    print("\nTest 23: Testing incremental backups...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_file="backup_test.json", data_dir=tmp_dir, hot_days=30)
+        backups = storage.backups
+        app_data = AppData()
+        github, leetcode = Streak(name="GitHub"), Streak(name="LeetCode")
+        app_data.add_streak(github)
+        app_data.add_streak(leetcode)
+        for d in range(400, 0, -1):
+            StreakManager.mark_activity(github, (date.today() - timedelta(days=d)).isoformat())
+        assert storage.save(app_data)
+        first = backups.versions()
+        assert len(first) == 1 and backups.manifest(first[0])["segments"]
+        objects = set(backups.objects_dir.glob("*/*"))
+        
+        # Saving unchanged data adds no version; one changed streak adds one chunk
+        assert storage.save(app_data) and backups.versions() == first
+        assert backups.backup() is None  # Chunks read back from the file are the same
+        StreakManager.mark_activity(leetcode, date.today().isoformat(), "one")
+        assert storage.save(app_data)
+        assert len(backups.versions()) == 2
+        assert len(set(backups.objects_dir.glob("*/*")) - objects) == 1
+        
+        # Restore the first version, then undo the restore
+        storage.data_file.write_text("{ broken")
+        assert backups.restore(first[0]) == first[0]
+        restored = storage.load(include_archive=True)
+        assert restored.get_streak(leetcode.id).activity_logs == []
+        assert len(restored.get_streak(github.id).activity_logs) == 400
+        assert len(backups.versions()) == 2  # The broken file isn't valid JSON to back up
+        
+        # Retention keeps the newest version per hour, day and month
+        versions = ["20250101T100000000000", "20250101T110000000000", "20250101T113000000000",
+                    "20250102T090000000000", "20250301T090000000000"]
+        policy = BackupStore(storage, keep_last=1, keep_hourly=3, keep_daily=2, keep_monthly=3)
+        assert policy.kept_versions(versions) == [
+            "20250101T113000000000", "20250102T090000000000", "20250301T090000000000"
+        ]
+    print("✓ Incremental backups successful")
+
+
+def test_history_charts():
+    """Test per-day chart series, LTTB downsampling and the chart cache"""
+    print("\nTest 24: Testing history chart series...")
+    streak = Streak(name="Charted", rule=EveryNDaysRule(2))
+    start = date(2016, 1, 1)
+    for offset in range(0, 3650):
+        if offset % 7 not in (2, 5) and offset % 400 < 300:
+            StreakManager.mark_activity(streak, (start + timedelta(days=offset)).isoformat())
+    end = date(2026, 1, 1)
+    series = build_series(streak.rule, (log.date for log in streak.activity_logs), end)
+    assert series.start == start and len(series) == (end - start).days + 1
+    
+    # Every day agrees with the as-of snapshot query
+    snapshots = StreakSnapshots(AppData(streaks=[streak]))
+    for offset in range(0, len(series), 37):
+        day = start + timedelta(days=offset)
+        assert series.lengths[offset] == snapshots.streak_as_of(streak, day)[0]
+    window_start = (end - timedelta(days=29)).isoformat()
+    recent = sum(1 for log in streak.activity_logs if log.date >= window_start)
+    assert series.completion[0] == 100.0 and series.completion[-1] == 100.0 * recent / 30
+    
+    reduced = lttb(series.lengths, 300)
+    assert len(reduced) == 300 and reduced[0] == (0, series.lengths[0])
+    assert reduced[-1] == (len(series) - 1, series.lengths[-1])
+    assert max(v for _, v in reduced) >= 0.99 * max(series.lengths)  # Peaks survive
+    assert lttb([1, 2, 3], 10) == [(0, 1), (1, 2), (2, 3)]
+    
+    cache = ChartCache()
+    first = cache.reduced(streak, 200)
+    assert cache.reduced(streak, 200) is first
+    StreakManager.mark_activity(streak, date.today().isoformat())
+    assert cache.reduced(streak, 200) is not first
+    assert cache.series(streak).lengths[-1] == streak.current_streak
+    
+    # Archived days come from the streak's own segments; "today" is the virtual clock's
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_file="charts.json", data_dir=tmp_dir, hot_days=30, backups=False)
+        app_data = AppData()
+        archived = Streak(name="Archived")
+        for n in range(60, 0, -1):
+            StreakManager.mark_activity(archived, (date.today() - timedelta(days=n)).isoformat())
+        app_data.add_streak(archived)
+        assert storage.save(app_data)
+        archived = storage.load().find_streak("Archived")
+        assert len(archived.activity_logs) < 60
+        storage.data_file.write_text("{ broken")  # Not read again for a chart
+        StreakManager.set_clock(lambda: date.today() + timedelta(days=2))
+        try:
+            series = ChartCache(storage).series(archived)
+        finally:
+            StreakManager.set_clock(None)
+        assert len(series) == 63 and series.lengths[-4] == 60 and series.lengths[-1] == 0
+    print("✓ History chart series successful")
+
+
+def test_activity_watchers():
+    """Test stat-polling sources and debounced automatic check-ins"""
+    print("\nTest 25: Testing automatic check-ins from watchers...")
+    import asyncio
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        solutions = os.path.join(tmp_dir, "solutions")
+        os.makedirs(os.path.join(solutions, "old"))
+        open(os.path.join(solutions, "old", "1.py"), "w").close()
+        reflog = os.path.join(tmp_dir, "repo", ".git", "logs", "HEAD")
+        os.makedirs(os.path.dirname(reflog))
+        entry = "{0} {1} Dev <dev@example.com> {2} +0000\t{3}\n"
+        with open(reflog, "w") as f:
+            f.write(entry.format("0" * 40, "a" * 40, 1700000000, "commit (initial): start"))
+        
+        directory = DirectorySource("LeetCode", solutions, pattern="*.py")
+        git = GitRepoSource("GitHub", os.path.join(tmp_dir, "repo"))
+        now = [0.0]
+        batches = []
+        service = WatcherService([directory, git], batches.append, debounce=2.0, clock=lambda: now[0])
+        assert service.poll_once() == 0  # Existing files and commits only prime the caches
+        
+        os.makedirs(os.path.join(solutions, "week2"))
+        open(os.path.join(solutions, "week2", "2.py"), "w").close()
+        open(os.path.join(solutions, "notes.txt"), "w").close()
+        commit_time = int(datetime(2026, 3, 4, 12).timestamp())
+        with open(reflog, "a") as f:
+            f.write(entry.format("a" * 40, "b" * 40, commit_time, "checkout: moving to main"))
+            f.write(entry.format("a" * 40, "c" * 40, commit_time, "commit: add feature"))
+            f.write(entry.format("c" * 40, "d" * 40, commit_time + 60, "commit: fix"))
+        assert service.poll_once() == 2
+        assert service.flush() == {}  # Still inside the debounce window
+        open(os.path.join(solutions, "week2", "3.py"), "w").close()
+        now[0] = 1.0
+        assert service.poll_once() == 0  # Same streak and day as the pending event
+        now[0] = 3.5
+        today = date.today().isoformat()
+        assert service.flush() == {"LeetCode": {today}, "GitHub": {"2026-03-04"}}
+        
+        # Later events for a day already checked in are dropped
+        open(os.path.join(solutions, "4.py"), "w").close()
+        assert service.poll_once() == 0 and service.flush(force=True) == {}
+        
+        # The storage callback marks each batch and saves once
+        storage = Storage(data_file="watch.json", data_dir=tmp_dir, backups=False)
+        app_data = AppData()
+        app_data.add_streak(Streak(name="LeetCode"))
+        assert storage.save(app_data)
+        stop = asyncio.Event()
+        service = WatcherService([DirectorySource("leetcode", solutions)],
+                                 storage_callback(storage), interval=0.01, debounce=0.0)
+        
+        async def scenario():
+            task = asyncio.create_task(service.run(stop))
+            await asyncio.sleep(0.05)
+            open(os.path.join(solutions, "5.py"), "w").close()
+            await asyncio.sleep(0.05)
+            stop.set()
+            await task
+        asyncio.run(scenario())
+        streak = storage.load().find_streak("LeetCode")
+        assert [log.date for log in streak.activity_logs] == [today] and streak.current_streak == 1
+        
+        # A back-filled day recounts the streak over its archived history too
+        app_data = storage.load()
+        streak = Streak(name="Run")
+        for n in range(201, 0, -1):
+            if n != 100:
+                StreakManager.mark_activity(streak, (date.today() - timedelta(days=n)).isoformat())
+        app_data.add_streak(streak)
+        assert storage.save(app_data) and streak.current_streak == 99
+        storage_callback(storage)({"Run": {(date.today() - timedelta(days=100)).isoformat()}})
+        streak = storage.load().find_streak("Run")
+        assert (streak.current_streak, streak.longest_streak) == (201, 201)
+        
+        # An open app merges the watcher's saves before writing its own copy
+        stamp = storage.disk_stamp()
+        open_copy = storage.load()
+        time.sleep(0.01)
+        storage_callback(storage)({"LeetCode": {(date.today() - timedelta(days=1)).isoformat()}})
+        StreakManager.mark_activity(open_copy.find_streak("Run"), today)
+        assert storage.disk_stamp() != stamp
+        assert merge_app_data(open_copy, storage.load(), storage.load_history) == 1
+        assert merge_app_data(open_copy, storage.load()) == 0
+        assert storage.save(open_copy)
+        saved = storage.load()
+        assert saved.find_streak("LeetCode").current_streak == 2
+        assert saved.find_streak("Run").current_streak == 202
+    print("✓ Automatic check-ins successful")
+
+
+def test_query_engine():
+    """Test indexed streak queries and their incremental maintenance"""
+    print("\nTest 26: Testing indexed streak queries...")
+    today = date.today()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    app_data = AppData()
+    for name, days in [("LeetCode Daily", [3, 2, 1, 0]), ("Leetcode Hard", [6, 5]),
+                       ("Gym", [1]), ("Reading", [])]:
+        streak = Streak(name=name)
+        for n in days:
+            StreakManager.mark_activity(streak, day(n))
+        app_data.add_streak(streak)
+    leet, hard, gym, reading = app_data.streaks
+    
+    names = lambda streaks: [s.name for s in streaks]
+    assert names(app_data.query(current_streak__gte=2)) == ["LeetCode Daily", "Leetcode Hard"]
+    assert names(app_data.query(last_active_within=1)) == ["LeetCode Daily", "Gym"]
+    assert names(app_data.query(name_contains="leetcode")) == ["LeetCode Daily", "Leetcode Hard"]
+    assert names(app_data.query(name_contains="ea")) == ["Reading"]
+    assert names(app_data.query(status="broken")) == ["Leetcode Hard"]
+    assert names(app_data.query(status="new")) == ["Reading"]
+    assert names(app_data.query(status="active", current_streak__lt=2)) == ["Gym"]
+    assert names(app_data.query(last_activity_date__lte=day(1), longest_streak=1)) == ["Gym"]
+    assert names(app_data.query(break_date__gt=day(1), break_date__lte=day(-1))) == ["Gym"]
+    assert names(app_data.query(break_date__lte=day(0))) == ["Leetcode Hard"]  # Never new streaks
+    assert len(app_data.query()) == 4
+    
+    # Marks and breaks move index entries without a rebuild
+    StreakManager.mark_activity(gym, day(0))
+    assert names(app_data.query(current_streak__gte=2)) == ["LeetCode Daily", "Leetcode Hard", "Gym"]
+    StreakManager.update_streak_if_broken(hard)
+    assert names(app_data.query(current_streak__gte=2)) == ["LeetCode Daily", "Gym"]
+    
+    # Adding, removing and renaming streaks re-indexes them
+    app_data.add_streak(Streak(name="Leet Weekly"))
+    app_data.remove_streak(leet.id)
+    app_data.streaks.rename(gym.id, "Gym Leetcode")
+    assert names(app_data.query(name_contains="leet")) == ["Leetcode Hard", "Gym Leetcode", "Leet Weekly"]
+    
+    try:
+        app_data.query(colour="red")
+        assert False, "Unknown filters should be rejected"
+    except ValueError:
+        pass
+    print("✓ Indexed queries successful")
+
+
+def test_rest_days():
+    """Test bitset rest calendars, paused break dates and freezes"""
+    print("\nTest 27: Testing planned rest days...")
+    days = DayBitset()
+    days.add_range(date(2026, 8, 10), date(2026, 8, 20))
+    days.add_range(date(2026, 8, 1), date(2026, 8, 2))
+    days.remove_range(date(2026, 8, 12), date(2026, 8, 18))
+    assert len(days) == 6 and date(2026, 8, 19) in days and date(2026, 8, 12) not in days
+    assert DayBitset.from_dict(days.to_dict()) == days
+    assert DayBitset.from_days(d.isoformat() for d in days.days()) == days
+    
+    # The bitset search agrees with walking day by day, across many windows
+    calendar = RestCalendar([5, 6])
+    calendar.add_days(date(2026, 12, 21), date(2028, 1, 9))
+    calendar.add_days(date(2026, 11, 3))
+    for last, n in [(date(2026, 10, 30), 1), (date(2026, 10, 30), 3), (date(2026, 12, 18), 2), (date(2026, 11, 1), 40)]:
+        day, left = last, n
+        while left:
+            day += timedelta(days=1)
+            left -= not calendar.is_rest(day)
+        assert calendar.open_day(last, n) == day
+    
+    # Weekends don't break a daily streak; a planned vacation doesn't either
+    streak = Streak(name="Run", rest_days=RestCalendar([5, 6]))
+    for day in ["2026-10-15", "2026-10-16", "2026-10-19"]:
+        StreakManager.mark_activity(streak, day)
+    assert streak.current_streak == 3
+    assert StreakManager.get_break_date(streak) == date(2026, 10, 21)
+    streak.rest_days.add_days(date(2026, 10, 20), date(2026, 11, 8))
+    assert StreakManager.get_break_date(streak) == date(2026, 11, 10)
+    
+    # A freeze over a missed day recounts the streak
+    StreakManager.mark_activity(streak, "2026-11-11")
+    assert streak.current_streak == 1
+    activity = DayBitset.from_days(log.date for log in streak.activity_logs)
+    assert streak.rest_days.missed_days(activity, date(2026, 10, 15), date(2026, 11, 11)) == [date(2026, 11, 9), date(2026, 11, 10)]
+    StreakManager.plan_rest(streak, "2026-11-09", "2026-11-10")
+    assert streak.current_streak == 4 and streak.longest_streak == 4
+    assert streak.rest_days.missed_days(activity, date(2026, 10, 15), date(2026, 11, 11)) == []
+    
+    # Rest days are saved with the streak, in both encoders
+    app_data = AppData()
+    app_data.add_streak(streak)
+    for indent in (2, None):
+        expected = json.dumps(app_data.to_dict(), indent=indent,
+                              separators=(",", ":") if indent is None else None)
+        assert "".join(iter_app_data(app_data, indent)) == expected
+    loaded = AppData.from_dict(json.loads(expected)).find_streak("Run")
+    assert loaded.rest_days == streak.rest_days and loaded == streak
+    
+    # A stored streak keeps its count: future rest days don't recount it, and a
+    # freeze in the past recounts over its archived history
+    today = date.today()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_file="rest.json", data_dir=tmp_dir, backups=False)
+        app_data = AppData()
+        streak = Streak(name="Long")
+        for n in range(201, -1, -1):
+            if n != 5:
+                StreakManager.mark_activity(streak, day(n))
+        app_data.add_streak(streak)
+        assert storage.save(app_data) and streak.current_streak == 5
+        streak = storage.load().find_streak("Long")
+        updated = []
+        bus.subscribe(StreakUpdated, updated.append)
+        try:
+            StreakManager.plan_rest(streak, day(-3), load_history=storage.load_history)
+        finally:
+            bus.unsubscribe(StreakUpdated, updated.append)
+        assert len(streak.activity_logs) < 100 and streak.current_streak == 5
+        assert [event.streak for event in updated] == [streak]  # Indexes follow the new break day
+        StreakManager.plan_rest(streak, day(5), load_history=storage.load_history)
+        assert (streak.current_streak, streak.longest_streak) == (201, 201)
+    print("✓ Planned rest days successful")
+
+
+def test_batch_actions():
+    """Test batch mark, restore and delete with rollback"""
+    print("\nTest 28: Testing batch actions...")
+    today = date.today()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    app_data = AppData()
+    for i in range(25):
+        streak = Streak(name=f"Habit {i}")
+        StreakManager.mark_activity(streak, day(3 if i < 4 else 1))
+        app_data.add_streak(streak)
+    streaks = list(app_data.streaks)
+    StreakManager.mark_activity(streaks[24], day(0))
+    
+    result = mark_all(app_data, [s.id for s in streaks])
+    assert len(result.done) == 24 and [s for s, _ in result.skipped] == [streaks[24]]
+    assert all(s.last_activity_date == day(0) for s in streaks)
+    assert "Marked: 24 streak(s)" in result.summary()
+    
+    # Restores stop when the month's tokens run out
+    broken = [Streak(name=f"Old {i}") for i in range(3)]
+    for streak in broken:
+        StreakManager.mark_activity(streak, day(5))
+        app_data.add_streak(streak)
+    result = restore_all(app_data, [s.id for s in broken] + [streaks[0].id])
+    assert result.done == broken[:2]
+    assert [reason for _, reason in result.skipped] == ["not broken", "no restore tokens left"]
+    assert app_data.restore_tokens[StreakManager.get_current_month()].remaining_tokens() == 0
+    
+    # A failure part-way leaves every streak as it was
+    before = [s.to_dict() for s in app_data.streaks]
+    failed = []
+    def fail_once(event):
+        if event.streak is streaks[10] and not failed:
+            failed.append(event.streak)
+            raise RuntimeError("disk full")
+    bus.subscribe(StreakEvent, fail_once)
+    try:
+        mark_all(app_data, [s.id for s in streaks], day=(today + timedelta(days=1)).isoformat())
+        assert False, "The failure should propagate"
+    except RuntimeError:
+        pass
+    finally:
+        bus.unsubscribe(StreakEvent, fail_once)
+    assert [s.to_dict() for s in app_data.streaks] == before
+    
+    # ... including the restore tokens spent and their redemptions
+    other = AppData()
+    for i in range(2):
+        streak = Streak(name=f"Lapsed {i}")
+        StreakManager.mark_activity(streak, day(3))
+        other.add_streak(streak)
+    token = StreakManager.get_or_create_restore_token(other.restore_tokens)
+    token.max_tokens = 3
+    assert StreakManager.restore_streak(other.find_streak("Lapsed 0"), token)
+    spent = other.to_dict()["restore_tokens"]
+    relapsed = Streak(name="Relapsed")
+    StreakManager.mark_activity(relapsed, day(3))
+    other.add_streak(relapsed)
+    failed.clear()
+    def fail_on(event):
+        if event.streak is relapsed and isinstance(event, ActivityAdded):
+            raise RuntimeError("disk full")
+    bus.subscribe(StreakEvent, fail_on)
+    try:
+        restore_all(other, [s.id for s in other.streaks])
+        assert False, "The failure should propagate"
+    except RuntimeError:
+        pass
+    finally:
+        bus.unsubscribe(StreakEvent, fail_on)
+    assert other.to_dict()["restore_tokens"] == spent and len(token.redemptions) == 1
+    
+    result = delete_all(app_data, [streaks[3].id, broken[2].id, "missing"])
+    assert result.done == [streaks[3], broken[2]] and len(app_data.streaks) == 26
+    assert app_data.get_streak(streaks[3].id) is None and app_data.find_streak("Habit 3") is None
+    print("✓ Batch actions successful")
+
+
+def test_simulation():
+    """Test the virtual-clock simulation of many users"""
+    print("\nTest 29: Testing time-compressed simulation...")
+    # Perfect users never break and never need tokens
+    stats = run_simulation(SimulationConfig(users=3, days=400, checkin_probability=1.0,
+                                            weekend_probability=1.0), workers=1)
+    assert stats.checkins == stats.days == 1200 and stats.breaks == stats.restores == 0
+    assert stats.longest == [400, 400, 400]
+    assert StreakManager.get_today() == date.today().isoformat()  # Real clock is back
+    
+    # Tokens cap restores at two a month; the rest are denied and break
+    config = SimulationConfig(users=12, days=120, checkin_probability=0.6, weekend_probability=0.3)
+    stats = run_simulation(config, workers=1)
+    assert 0 < stats.restores <= 2 * 5 * 12 and stats.denied_restores == stats.breaks > 0
+    assert stats.exhausted_months > 0 and stats.users_denied > 0
+    assert "Breaks:" in stats.report()
+    
+    # Parallel workers give the same totals as one process
+    parallel = run_simulation(config, workers=3)
+    for name in ("days", "checkins", "breaks", "restores", "denied_restores", "exhausted_months"):
+        assert getattr(parallel, name) == getattr(stats, name)
+    assert sorted(parallel.longest) == sorted(stats.longest)
+    
+    never = run_simulation(SimulationConfig(users=4, days=60, restore_policy="never"), workers=1)
+    assert never.restores == never.denied_restores == 0 and never.breaks > 0
+    try:
+        run_simulation(SimulationConfig(restore_policy="sometimes"))
+        assert False, "Unknown policies should be rejected"
+    except ValueError:
+        pass
+    print("✓ Simulation successful")
+
+
+def test_dashboard():
+    """Test the static dashboard and its incremental rebuilds"""
+    print("\nTest 30: Testing the static HTML dashboard...")
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storages = []
+        for tenant, names in [("alice", ["Run", "<Read>"]), ("bob", ["Run", "Code"])]:
+            storage = Storage(data_file=f"{tenant}.json", data_dir=tmp_dir, backups=False)
+            app_data = AppData()
+            for name in names:
+                streak = Streak(name=name)
+                for n in range(len(name) + 1, 0, -1):
+                    StreakManager.mark_activity(streak, (today - timedelta(days=n)).isoformat())
+                app_data.add_streak(streak)
+            assert storage.save(app_data)
+            storages.append(storage)
+        site = os.path.join(tmp_dir, "site")
+        
+        result = build_dashboard(storages, site, workers=2)
+        assert (result.rendered, result.unchanged, result.removed) == (4, 0, 0)
+        alice = storages[0].load()
+        read = alice.find_streak("<Read>")
+        with open(os.path.join(site, "alice", f"{read.id}.html"), encoding="utf-8") as f:
+            page = f.read()
+        assert "&lt;Read&gt;" in page and "<Read>" not in page and "<svg" in page
+        with open(os.path.join(site, "index.html"), encoding="utf-8") as f:
+            index = f.read()
+        assert f'href="alice/{read.id}.html"' in index and "bob/index.html" in index
+        
+        # Only changed streaks are rendered again; deleted ones are removed
+        assert build_dashboard(storages, site, workers=1).unchanged == 4
+        StreakManager.mark_activity(read, today.isoformat())
+        run = alice.find_streak("Run")
+        alice.remove_streak(run.id)
+        assert storages[0].save(alice)
+        result = build_dashboard(storages, site, workers=1)
+        assert (result.rendered, result.unchanged, result.removed) == (1, 2, 1)
+        assert not os.path.exists(os.path.join(site, "alice", f"{run.id}.html"))
+        assert build_dashboard(storages, site, force=True, workers=1).rendered == 3
+        
+        # A page depends on its own streak's archived days, not on segment files
+        carol = Storage(data_file="carol.json", data_dir=tmp_dir, hot_days=30, backups=False)
+        app_data = AppData()
+        for name in ["Old", "Older"]:
+            streak = Streak(name=name)
+            for n in range(60, 0, -1):
+                StreakManager.mark_activity(streak, (today - timedelta(days=n)).isoformat())
+            app_data.add_streak(streak)
+        assert carol.save(app_data)
+        old, older = app_data.find_streak("Old"), app_data.find_streak("Older")
+        site = os.path.join(tmp_dir, "carol_site")
+        assert build_dashboard([carol], site, workers=1).rendered == 2
+        for year in carol.archived_years():
+            carol._write_segment(year, dict(carol._read_segment(year)))  # Rewritten as-is
+        assert build_dashboard([carol], site, workers=1).unchanged == 2
+        year = carol.archived_years()[0]
+        segment = dict(carol._read_segment(year))
+        segment[older.id] = [{"date": f"{year}-01-01", "notes": ""}] + segment[older.id]
+        carol._write_segment(year, segment)
+        result = build_dashboard([carol], site, workers=1)
+        assert (result.rendered, result.unchanged) == (1, 1)
+    print("✓ Dashboard successful")
+
+
+def test_event_bus():
+    """Test typed change events with synchronous and queued delivery"""
+    print("\nTest 31: Testing the change event bus...")
+    today = date.today()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    seen, queued = [], []
+    bus.subscribe(ChangeEvent, seen.append)
+    bus.subscribe(StreakEvent, queued.append, queued=True)
+    try:
+        app_data = AppData()
+        streak = Streak(name="Events")
+        app_data.add_streak(streak)
+        StreakManager.mark_activity(streak, day(3))
+        StreakManager.mark_activity(streak, day(3))  # Duplicate: no event
+        StreakManager.update_streak_if_broken(streak)
+        token = StreakManager.get_or_create_restore_token(app_data.restore_tokens)
+        StreakManager.mark_activity(streak, day(2))
+        StreakManager.restore_streak(streak, token)
+        StreakManager.recalculate(streak)
+        app_data.remove_streak(streak.id)
+        
+        kinds = [event.__class__ for event in seen]
+        assert kinds == [StreakCreated, ActivityAdded, StreakBroken, ActivityAdded,
+                         TokenUsed, ActivityAdded, StreakUpdated, StreakDeleted], kinds
+        assert seen[1].date == day(3) and seen[5].notes == "Restored using token"
+        assert seen[4].token is token and streak.current_streak == 3
+        assert all(event.streak is streak for event in seen)
+        
+        # Queued handlers run only when drained, in publish order
+        assert queued == [] and bus.pending() == 7
+        assert bus.drain(limit=3) == 3 and bus.drain() == 4
+        assert queued == [e for e in seen if isinstance(e, StreakEvent)]
+    finally:
+        bus.unsubscribe(ChangeEvent, seen.append)
+        bus.unsubscribe(StreakEvent, queued.append)
+    
+    # A private bus: routing by type, unsubscribe, and dispatch cost
+    local = EventBus()
+    counts = {"broken": 0, "all": 0}
+    def on_broken(event):
+        counts["broken"] += 1
+    def on_any(event):
+        counts["all"] += 1
+    local.subscribe(StreakBroken, on_broken)
+    local.subscribe(StreakEvent, on_any)
+    event = StreakBroken(None)
+    local.publish(event)
+    local.publish(ActivityAdded(None, day(0)))
+    assert counts == {"broken": 1, "all": 2}
+    local.unsubscribe(StreakBroken, on_broken)
+    local.publish(event)
+    assert counts == {"broken": 1, "all": 3}
+    
+    started = time.perf_counter()
+    for _ in range(10000):
+        local.publish(event)
+    assert (time.perf_counter() - started) / 10000 < 20e-6
+    print("✓ Event bus successful")
+
+
+def test_token_ledger():
+    """Test gap-filling restores and the restore token ledger"""
+    print("\nTest 32: Testing the restore token ledger...")
+    today = date.today()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    app_data = AppData()
+    ledger = TokenLedger(app_data.restore_tokens)
+    month = StreakManager.get_current_month()
+    
+    # Reading what is left doesn't add an empty month
+    assert ledger.remaining() == 2 and app_data.restore_tokens == {}
+    
+    # A broken (reset) streak: one token fills all three missed days, recounted once
+    reset = Streak(name="Reset")
+    for n in range(10, 3, -1):
+        StreakManager.mark_activity(reset, day(n))
+    StreakManager.update_streak_if_broken(reset)
+    assert reset.current_streak == 0
+    token = StreakManager.get_or_create_restore_token(app_data.restore_tokens)
+    seen = []
+    bus.subscribe(ChangeEvent, seen.append)
+    try:
+        assert StreakManager.restore_streak(reset, token)
+    finally:
+        bus.unsubscribe(ChangeEvent, seen.append)
+    assert [e.__class__ for e in seen] == [TokenUsed] + [ActivityAdded] * 3
+    assert reset.current_streak == reset.longest_streak == 10
+    assert reset.last_activity_date == day(1) and StreakManager.check_streak_status(reset) == "active"
+    
+    # Not reset yet: counted on from the current streak
+    running = Streak(name="Running")
+    for n in (6, 5):
+        StreakManager.mark_activity(running, day(n))
+    assert StreakManager.gap_days(running) == [today - timedelta(days=n) for n in (4, 3, 2, 1)]
+    assert StreakManager.restore_streak(running, token) and running.current_streak == 6
+    
+    # Longer gaps than a token covers are refused without spending one
+    lapsed = Streak(name="Lapsed")
+    StreakManager.mark_activity(lapsed, day(MAX_RESTORE_DAYS + 2))
+    token.max_tokens = 3
+    assert StreakManager.gap_days(lapsed) is None
+    assert not StreakManager.restore_streak(lapsed, token) and token.tokens_used == 2
+    
+    # Rules fill only the days they need
+    every_other = Streak(name="Every other day", rule=EveryNDaysRule(2))
+    StreakManager.mark_activity(every_other, day(6))
+    assert StreakManager.restore_streak(every_other, token)
+    assert [log.date for log in every_other.activity_logs] == [day(6), day(4), day(2)]
+    assert StreakManager.gap_days(every_other) == []
+    
+    # A reset streak whose run goes back into the archive needs its history loaded
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(data_dir=tmp_dir, hot_days=90, backups=False)
+        long_run = Streak(name="Long")
+        long_run.activity_logs = [ActivityLog(date=day(n)) for n in range(200, 2, -1)]
+        StreakManager.recalculate(long_run)
+        storage.save(AppData(streaks=[long_run]))
+        loaded = storage.load()
+        hot = loaded.find_streak("Long")
+        StreakManager.update_streak_if_broken(hot)
+        spare = RestoreToken(month=month)
+        assert len(hot.activity_logs) < 198 and hot.current_streak == 0
+        assert not StreakManager.restore_streak(hot, spare) and spare.tokens_used == 0
+        assert StreakManager.restore_streak(hot, spare, load_history=storage.load_history)
+        assert hot.current_streak == hot.longest_streak == 200
+    
+    # Remaining tokens and usage history come from the per-month counters
+    assert ledger.remaining() == 0 and ledger.usage() == [(month, 3, 3)]
+    assert [r.streak_id for _, r in ledger.history()] == [reset.id, running.id, every_other.id]
+    assert ledger.history(reset.id) == [(month, token.redemptions[0])]
+    assert ledger.restored_days(reset.id) == [day(3), day(2), day(1)]
+    assert ledger.history(month="1999-01") == []
+    
+    # Only months with usage are saved; redemptions survive a round trip
+    StreakManager.get_or_create_restore_token(app_data.restore_tokens, "2026-01")
+    for streak in (reset, running, every_other):
+        app_data.add_streak(streak)
+    data = app_data.to_dict()
+    assert list(data["restore_tokens"]) == [month]
+    assert data["restore_tokens"][month]["redemptions"][0] == [reset.id, day(3), day(2), day(1)]
+    assert "".join(iter_app_data(app_data, indent=2)) == json.dumps(data, indent=2)
+    assert "".join(iter_app_data(app_data, indent=None)) == json.dumps(data, separators=(",", ":"))
+    loaded = AppData.from_dict(json.loads(json.dumps(data)))
+    assert loaded.restore_tokens == {month: token}
+    print("✓ Token ledger successful")
+
+
+def test_group_streaks():
+    """Test group streaks over intersecting member activity"""
+    print("\nTest 33: Testing group streaks...")
+    import random
+    today = date.today()
+    day = lambda n: (today - timedelta(days=n)).isoformat()
+    app_data = AppData()
+    plan = {"A": range(10, 0, -1), "B": [10, 9, 8, 6, 5, 4, 3, 2, 1], "C": [10, 9, 8, 4, 3, 2, 1]}
+    for name, days in plan.items():
+        streak = Streak(name=name)
+        for n in days:
+            StreakManager.mark_activity(streak, day(n))
+        app_data.add_streak(streak)
+    a, b, c = (app_data.find_streak(name) for name in plan)
+    
+    everyone = StreakGroup("Team", [a, b, c])
+    two = StreakGroup("Two of three", [a, b, c], needed=2)
+    try:
+        assert [d.isoformat() for d in everyone.days()] == [day(n) for n in (10, 9, 8, 4, 3, 2, 1)]
+        assert everyone.current() == everyone.longest_streak == 4 and everyone.check_status() == "active"
+        assert two.current() == two.longest_streak == 6
+        assert everyone.missing(today - timedelta(days=5)) == [c]
+        
+        # Member check-ins update the group one day at a time
+        StreakManager.mark_activity(c, day(5))
+        assert everyone.current() == 5 and everyone.last_activity_date == day(1)
+        for streak in (a, b):
+            StreakManager.mark_activity(streak, day(0))
+        assert everyone.current() == 5 and two.current() == 7
+        StreakManager.mark_activity(c, day(0))
+        assert everyone.current() == everyone.longest_streak == 6
+        fresh = StreakGroup("Fresh", [a, b, c], watch=False)
+        assert (fresh.bits, fresh.base, fresh.longest_streak) == \
+            (everyone.bits, everyone.base, everyone.longest_streak)
+        
+        # Back-filled days, recounts and deleted members
+        c.activity_logs += [ActivityLog(date=day(7)), ActivityLog(date=day(6))]
+        StreakManager.recalculate(c)
+        assert everyone.current() == everyone.longest_streak == 7
+        StreakManager.mark_activity(a, day(12))
+        assert everyone.base == fresh.base - 2 and everyone.longest_streak == 7
+        app_data.remove_streak(c.id)
+        assert len(everyone.members) == 2 and everyone.missing(today - timedelta(days=7)) == [b]
+    finally:
+        everyone.close()
+        two.close()
+    StreakManager.mark_activity(b, day(7))
+    assert everyone.current() == 7  # Closed: no longer following
+    assert StreakGroup("Pair", [a, b], watch=False).current() == 11
+    
+    # Threshold counting matches a plain count per bit
+    rng = random.Random(7)
+    bitsets = [rng.getrandbits(300) for _ in range(9)]
+    for needed in range(1, 11):
+        expected = sum(1 << i for i in range(300) if sum(b >> i & 1 for b in bitsets) >= needed)
+        assert at_least(bitsets, needed) == expected
+    
+    # Dozens of members over three years stay cheap
+    members = []
+    start = today - timedelta(days=3 * 365)
+    for i in range(40):
+        streak = Streak(name=f"Member {i}")
+        streak.activity_logs = [ActivityLog(date=(start + timedelta(days=n)).isoformat())
+                                for n in range(3 * 365) if rng.random() < 0.97]
+        members.append(streak)
+    started = time.perf_counter()
+    big = StreakGroup("Big", members, needed=30, watch=False)
+    for i, streak in enumerate(members):
+        big.add_day(streak, today)
+    assert time.perf_counter() - started < 1.0
+    assert big.last_activity_date == day(0) and big.longest_streak > 30
+    print("✓ Group streaks successful")
+
+
 def run_all_tests():
     """Run all tests"""
     print("=" * 60)
@@ -204,6 +1455,30 @@ def run_all_tests():
         test_storage()
         test_duplicate_activity()
         test_data_serialization()
+        test_snapshot_as_of()
+        test_archive_segments()
+        test_legacy_migration()
+        test_compact_models()
+        test_streaming_serializer()
+        test_reminder_scheduler()
+        test_streak_rules()
+        test_note_search()
+        test_streaming_export()
+        test_name_index()
+        test_streak_registry()
+        test_leaderboard()
+        test_delta_sync()
+        test_backups()
+        test_history_charts()
+        test_activity_watchers()
+        test_query_engine()
+        test_rest_days()
+        test_batch_actions()
+        test_simulation()
+        test_dashboard()
+        test_event_bus()
+        test_token_ledger()
+        test_group_streaks()
         
         print("\n" + "=" * 60)
         print("✅ All tests passed successfully!")
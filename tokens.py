@@ -0,0 +1,53 @@
+"""
+Restore token ledger
+
+AppData.restore_tokens holds one RestoreToken per month in which tokens
+were spent: tokens_used is that month's counter and redemptions records
+which streak each token went to and which days it filled. Months where
+nothing was spent are never saved, so the dict no longer grows by a month
+every time the app is opened.
+
+TokenLedger answers questions over all months from those counters, without
+adding empty months: tokens left, usage per month, and the redemption
+history of one streak.
+"""
+from typing import Dict, List, Optional, Tuple
+from models import Redemption, RestoreToken
+from streak_logic import StreakManager
+
+
+class TokenLedger:
+    """Read-only queries over a restore_tokens dict (month -> RestoreToken)"""
+    
+    def __init__(self, restore_tokens: Dict[str, RestoreToken]):
+        self.tokens = restore_tokens
+    
+    def token(self, month: Optional[str] = None) -> RestoreToken:
+        """The month's token (default this month); a fresh one if none were spent"""
+        return StreakManager.get_restore_token(self.tokens, month)
+    
+    def remaining(self, month: Optional[str] = None) -> int:
+        """Tokens left in a month (default this month)"""
+        return self.token(month).remaining_tokens()
+    
+    def usage(self) -> List[Tuple[str, int, int]]:
+        """(month, tokens used, max tokens) for every month with usage, oldest first"""
+        return [(month, token.tokens_used, token.max_tokens)
+                for month, token in sorted(self.tokens.items()) if token.tokens_used]
+    
+    def history(self, streak_id: Optional[str] = None,
+                month: Optional[str] = None) -> List[Tuple[str, Redemption]]:
+        """(month, redemption) pairs, oldest first, optionally for one streak or month"""
+        months = [month] if month is not None else sorted(self.tokens)
+        entries = []
+        for key in months:
+            token = self.tokens.get(key)
+            if token is None:
+                continue
+            entries.extend((key, r) for r in token.redemptions
+                           if streak_id is None or r.streak_id == streak_id)
+        return entries
+    
+    def restored_days(self, streak_id: str) -> List[str]:
+        """Every day filled by a token for a streak, oldest first"""
+        return sorted(day for _, r in self.history(streak_id) for day in r.days)
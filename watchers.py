@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Automatic check-ins from local activity
+
+Sources are polled with plain stat() calls and only do real work when a
+cached mtime or size changed: DirectorySource notices new files (one stat
+per watched directory), GitRepoSource reads just the bytes appended to
+.git/logs/HEAD. WatcherService polls them from an asyncio loop, collects
+activity days per streak, waits for events to settle and hands a batch to
+a callback, at most once per streak and day.
+
+Usage: python watchers.py --git "GitHub Commits=~/code/project" --dir "LeetCode Problem=~/leetcode"
+"""
+import argparse
+import asyncio
+import fnmatch
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sync import merge_days
+
+
+# callback({streak name or id: {YYYY-MM-DD, ...}}) receives each batch of check-ins
+CheckinCallback = Callable[[Dict[str, Set[str]]], None]
+
+AUTO_NOTES = "Automatic check-in"
+
+
+class ActivitySource:
+    """Reports activity days for one streak; the first poll only primes caches"""
+    
+    def __init__(self, streak: str):
+        self.streak = streak  # Streak name or id
+    
+    def poll(self) -> List[str]:
+        """Activity days (YYYY-MM-DD) seen since the previous poll"""
+        raise NotImplementedError
+
+
+class DirectorySource(ActivitySource):
+    """New files under a directory (e.g. one file per solved problem)"""
+    
+    def __init__(self, streak: str, path: str, pattern: str = "*", recursive: bool = True):
+        super().__init__(streak)
+        self.root = os.path.expanduser(path)
+        self.pattern = pattern
+        self.recursive = recursive
+        self._mtimes: Dict[str, int] = {}  # Directory -> mtime_ns at the last scan
+        self._files: Dict[str, Set[str]] = {}  # Directory -> matching file names
+        self._primed = False
+    
+    def _scan(self, directory: str, new_files: List[str]) -> None:
+        """Rescan one directory, recording files that weren't there before"""
+        try:
+            self._mtimes[directory] = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except OSError:
+            self._forget(directory)  # Removed or unreadable
+            return
+        known = self._files.get(directory)
+        files = set()
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive and entry.path not in self._mtimes:
+                    self._scan(entry.path, new_files)  # Everything in a new subdirectory is new
+            elif fnmatch.fnmatch(entry.name, self.pattern):
+                files.add(entry.name)
+                if known is not None and entry.name not in known:
+                    new_files.append(entry.path)
+        if known is None and self._primed:
+            new_files.extend(os.path.join(directory, name) for name in files)
+        self._files[directory] = files
+    
+    def _forget(self, directory: str) -> None:
+        prefix = directory + os.sep
+        for path in [p for p in self._mtimes if p == directory or p.startswith(prefix)]:
+            del self._mtimes[path]
+            self._files.pop(path, None)
+    
+    def poll(self) -> List[str]:
+        new_files: List[str] = []
+        if not self._primed:
+            self._scan(self.root, new_files)
+            self._primed = True
+            return []
+        for directory, mtime in list(self._mtimes.items()):
+            try:
+                changed = os.stat(directory).st_mtime_ns != mtime
+            except OSError:
+                self._forget(directory)
+                continue
+            if changed:
+                self._scan(directory, new_files)
+        if self.root not in self._mtimes and os.path.isdir(self.root):
+            self._scan(self.root, new_files)  # Root created after we started
+        # Copied files keep old mtimes, so a new file counts for the day it appeared
+        return [date.today().isoformat()] if new_files else []
+
+
+class GitRepoSource(ActivitySource):
+    """Commits in a git repository, read from the tail of .git/logs/HEAD"""
+    
+    def __init__(self, streak: str, repo: str):
+        super().__init__(streak)
+        self.log_path = Path(os.path.expanduser(repo)) / ".git" / "logs" / "HEAD"
+        self._offset: Optional[int] = None
+    
+    def poll(self) -> List[str]:
+        try:
+            size = os.stat(self.log_path).st_size
+        except OSError:
+            return []
+        if self._offset is None or size < self._offset:
+            self._offset = size  # First poll, or the reflog was rewritten
+            return []
+        if size == self._offset:
+            return []
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        
+        days = []
+        for line in complete.decode("utf-8", "replace").splitlines():
+            # "<old> <new> <author> <email> <unix time> <tz>\t<action>: <message>"
+            head, _, action = line.partition("\t")
+            if not action.startswith("commit"):
+                continue  # Checkouts, resets, ...
+            try:
+                timestamp = int(head.rsplit(" ", 2)[1])
+            except (IndexError, ValueError):
+                continue
+            days.append(date.fromtimestamp(timestamp).isoformat())
+        return days
+
+
+class WatcherService:
+    """Polls sources from an asyncio loop and delivers debounced check-in batches"""
+    
+    def __init__(self, sources: Iterable[ActivitySource], callback: CheckinCallback,
+                 interval: float = 5.0, debounce: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sources = list(sources)
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.clock = clock
+        self._pending: Dict[str, Set[str]] = {}
+        self._delivered: Dict[str, Set[str]] = {}  # Recent days already checked in per streak
+        self._last_event = 0.0
+    
+    def poll_once(self) -> int:
+        """Poll every source; returns the number of new (streak, day) events"""
+        count = 0
+        for source in self.sources:
+            try:
+                days = source.poll()
+            except Exception as e:
+                print(f"Error polling {source.__class__.__name__} for '{source.streak}': {e}")
+                continue
+            for day in days:
+                if day in self._delivered.get(source.streak, ()):
+                    continue
+                pending = self._pending.setdefault(source.streak, set())
+                if day not in pending:
+                    pending.add(day)
+                    count += 1
+        if count:
+            self._last_event = self.clock()
+        return count
+    
+    def flush(self, force: bool = False) -> Dict[str, Set[str]]:
+        """Deliver pending check-ins once events have been quiet for the debounce time"""
+        if not self._pending or (not force and self.clock() - self._last_event < self.debounce):
+            return {}
+        batch, self._pending = self._pending, {}
+        self.callback(batch)
+        horizon = (date.today() - timedelta(days=7)).isoformat()
+        for streak, days in batch.items():
+            delivered = self._delivered.setdefault(streak, set())
+            delivered.update(days)
+            delivered.difference_update([d for d in delivered if d < horizon])
+        return batch
+    
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Poll until stop is set, then deliver what is still pending"""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            self.poll_once()
+            self.flush()
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        self.flush(force=True)
+
+
+def storage_callback(storage, notes: str = AUTO_NOTES) -> CheckinCallback:
+    """Build a callback that marks each batch in a Storage data file and saves once"""
+    def check_in(batch: Dict[str, Set[str]]) -> None:
+        app_data = storage.load()
+        added = 0
+        for key, days in batch.items():
+            streak = app_data.get_streak(key) or app_data.find_streak(key)
+            if streak is None:
+                print(f"No streak named '{key}'; skipping its activity")
+                continue
+            days = sorted(days)
+            if days[0] < streak.last_activity_date:
+                storage.load_history(streak)  # Back-filled days recount the whole history
+            added += merge_days(streak, [[day, notes] for day in days])
+        if added and storage.save(app_data):
+            print(f"Checked in {added} day(s): {', '.join(sorted(batch))}")
+    return check_in
+
+
+def _parse_pairs(values: Optional[List[str]], option: str) -> List[List[str]]:
+    pairs = []
+    for value in values or []:
+        streak, sep, path = value.partition("=")
+        if not sep or not streak or not path:
+            raise SystemExit(f"{option} expects STREAK=PATH, got {value!r}")
+        pairs.append([streak, path])
+    return pairs
+
+
+def main(argv=None) -> int:
+    """Run the watchers from the command line until interrupted"""
+    from storage import Storage
+    
+    parser = argparse.ArgumentParser(description="Check in streaks automatically from local activity")
+    parser.add_argument("--git", action="append", metavar="STREAK=REPO",
+                        help="check in STREAK for each commit in REPO (repeatable)")
+    parser.add_argument("--dir", action="append", metavar="STREAK=DIR",
+                        help="check in STREAK when a file is added under DIR (repeatable)")
+    parser.add_argument("--pattern", default="*", help="file name pattern for --dir (default *)")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls")
+    parser.add_argument("--data-file", default="streak_data.json", help="data file name")
+    parser.add_argument("--data-dir", default=None, help="data directory")
+    args = parser.parse_args(argv)
+    
+    sources: List[ActivitySource] = [GitRepoSource(s, p) for s, p in _parse_pairs(args.git, "--git")]
+    sources += [DirectorySource(s, p, args.pattern) for s, p in _parse_pairs(args.dir, "--dir")]
+    if not sources:
+        parser.error("nothing to watch; use --git and/or --dir")
+    
+    storage = Storage(data_file=args.data_file, data_dir=args.data_dir)
+    service = WatcherService(sources, storage_callback(storage), interval=args.interval)
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        service.flush(force=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())